@@ -0,0 +1,1841 @@
+"""
+Núcleo de análise do Football Studio, sem dependência do Streamlit.
+
+Pode ser importado por workers, scripts e testes sem o custo de iniciar a
+interface. Uso pela linha de comando: python analysis_core.py resultados.txt
+"""
+import argparse
+import json
+import sys
+import threading
+import collections
+import collections.abc
+import array
+import copy
+import bisect
+import enum
+import functools
+import itertools
+import operator
+import os
+import re
+import string
+
+# --- Constantes e Funções Auxiliares ---
+NUM_RECENT_RESULTS_FOR_ANALYSIS = 27
+MAX_HISTORY_TO_STORE = 1000
+UNDO_DEPTH = 100  # Rodadas que podem ser desfeitas (ou corrigidas) sem refazer a análise
+NUM_HISTORY_TO_DISPLAY = 100
+MIN_RESULTS_FOR_SUGGESTION = 9
+
+def get_color(result):
+    """Retorna a cor associada ao resultado."""
+    if result == 'home':
+        return 'red'
+    elif result == 'away':
+        return 'blue'
+    else: # 'draw'
+        return 'yellow'
+
+def get_color_emoji(color):
+    """Retorna o emoji correspondente à cor."""
+    if color == 'red':
+        return '🔴'
+    elif color == 'blue':
+        return '🔵'
+    elif color == 'yellow':
+        return '🟡'
+    return ''
+
+def get_result_emoji(result_type):
+    """Retorna o emoji correspondente ao tipo de resultado."""
+    if result_type == 'home':
+        return '🏠'
+    elif result_type == 'away':
+        return '✈️'
+    elif result_type == 'draw':
+        return '🤝'
+    return ''
+
+# Textos da sugestão: esperando resultados, sem aposta e por aposta
+WAITING_SUGGESTION = f'Aguardando no mínimo {MIN_RESULTS_FOR_SUGGESTION} resultados para análise detalhada.'
+NO_BET_SUGGESTION = "Manter observação."
+BET_SUGGESTIONS = {
+    'home': f"APOSTAR em **CASA** {get_color_emoji('red')} {get_result_emoji('home')}",
+    'away': f"APOSTAR em **VISITANTE** {get_color_emoji('blue')} {get_result_emoji('away')}",
+    'draw': f"APOSTAR em **EMPATE** {get_color_emoji('yellow')} {get_result_emoji('draw')}",
+}
+
+# --- Histórico Compacto ---
+
+RESULT_TYPES = ('home', 'away', 'draw')
+RESULT_CODES = {'home': 0, 'away': 1, 'draw': 2}
+
+class _HistorySequence(collections.abc.Sequence):
+    """
+    Sequência de resultados (mais recente primeiro) sobre o buffer circular.
+    Subclasses definem `_buffer`, `_start` e `__len__`.
+    """
+
+    def _segments(self):
+        """Faixas físicas [lo, hi) do buffer que cobrem esta sequência."""
+        buffer = self._buffer
+        length = len(self)
+        if not length:
+            return []
+        hi = (buffer._head - self._start) % buffer.capacity or buffer.capacity
+        lo = hi - length
+        if lo >= 0:
+            return [(lo, hi)]
+        return [(0, hi), (lo + buffer.capacity, buffer.capacity)]
+
+    def code_at(self, index):
+        """Código (0/1/2) do resultado na posição `index` (0 = mais recente)."""
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError('índice fora do histórico')
+        buffer = self._buffer
+        return buffer._data[(buffer._head - 1 - self._start - index) % buffer.capacity]
+
+    def codes(self):
+        """Códigos dos resultados como `bytes`, mais recente primeiro."""
+        data = self._buffer._data
+        return b''.join(data[lo:hi][::-1] for lo, hi in self._segments())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return HistoryView(self._buffer, self._start + start, max(0, stop - start))
+        return RESULT_TYPES[self.code_at(index)]
+
+    def __iter__(self):
+        for code in self.codes():
+            yield RESULT_TYPES[code]
+
+    def count(self, result):
+        code = RESULT_CODES.get(result)
+        if code is None:
+            return 0
+        data = self._buffer._data
+        return sum(data.count(code, lo, hi) for lo, hi in self._segments())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)!r})"
+
+class HistoryView(_HistorySequence):
+    """
+    Fatia do histórico sem cópia (ex: `results[:27]`). Válida até o próximo
+    `append` no buffer, pois as posições são contadas a partir do mais recente.
+    """
+
+    def __init__(self, buffer, start, length):
+        self._buffer = buffer
+        self._start = start
+        self._length = max(0, min(length, len(buffer) - start))
+
+    def __len__(self):
+        return self._length
+
+class HistoryBuffer(_HistorySequence):
+    """
+    Histórico de capacidade fixa em um buffer circular de `bytearray`, com um
+    byte por resultado (0 = casa, 1 = visitante, 2 = empate). Indexação e
+    fatias são do mais recente para o mais antigo, como a antiga lista
+    `results`; `append` é O(1) e descarta o resultado mais antigo quando cheio.
+    """
+
+    def __init__(self, capacity=MAX_HISTORY_TO_STORE, results=()):
+        self.capacity = capacity
+        self._data = bytearray(capacity)
+        self._head = 0  # Próxima posição de escrita
+        self._size = 0
+        self._buffer = self
+        self._start = 0
+        for result in reversed(list(results)[:capacity]):
+            self.append(result)
+
+    def __len__(self):
+        return self._size
+
+    def append(self, result):
+        """Adiciona o resultado mais recente, descartando o mais antigo se cheio."""
+        self._data[self._head] = RESULT_CODES[result]
+        self._head = (self._head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def extend_codes(self, codes):
+        """
+        Adiciona vários códigos de uma vez (bytes, do mais antigo ao mais recente).
+        Só os últimos `capacity` são copiados, em no máximo duas fatias.
+        """
+        codes = memoryview(codes)[-self.capacity:]
+        n = len(codes)
+        first = min(n, self.capacity - self._head)
+        self._data[self._head:self._head + first] = codes[:first]
+        self._data[:n - first] = codes[first:]
+        self._head = (self._head + n) % self.capacity
+        self._size = min(self.capacity, self._size + n)
+
+    def pop(self, restore=None):
+        """
+        Remove e retorna o código do resultado mais recente. `restore` é o
+        código que o `append` desfeito descartou com o buffer cheio; ele volta
+        a ser o mais antigo.
+        """
+        if not self._size:
+            raise IndexError('histórico vazio')
+        self._head = (self._head - 1) % self.capacity
+        code = self._data[self._head]
+        if restore is None:
+            self._size -= 1
+        else:
+            self._data[self._head] = restore
+        return code
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+
+# --- Identificadores de Padrões ---
+
+# Códigos de cor: mesmos valores dos códigos de resultado (casa = vermelho, ...)
+COLORS = ('red', 'blue', 'yellow')
+RED, BLUE, YELLOW = 0, 1, 2
+
+class PatternKind(enum.IntEnum):
+    """Tipos de padrão detectados. Cada tipo combinado às suas cores forma um id."""
+    SIMPLE_BREAK = 0       # Quebra Simples (X para Y)
+    REPEATED_PAIR = 1      # Dupla Repetida (X X)
+    TWO_ONE = 2            # 2x1 (X X Y)
+    ZIG_ZAG = 3            # Zig-Zag / Alternado (X Y X)
+    DRAW_IN_MIDDLE = 4     # Alternância c/ Empate no Meio (X Empate Y)
+    WAVE_121 = 5           # Padrão Onda 1-2-1 (X Y Y X)
+    THREE_ONE = 6          # 3x1 (X X X Y)
+    TWO_TWO = 7            # 2x2 (X X Y Y)
+    MIRROR = 8             # Padrão Espelho (X Y Y X)
+    THREE_THREE = 9        # 3x3 (X X X Y Y Y)
+    BLOCK_2 = 10           # Padrão Reversão/Bloco 2x2
+    BLOCK_3 = 11           # Padrão Reversão/Bloco 3x3
+    ALT_BLOCK_2 = 12       # Padrão Reversão/Bloco Alternado 2x2
+    ALT_BLOCK_3 = 13       # Padrão Reversão/Bloco Alternado 3x3
+    BREAK_TO_DRAW = 14     # Quebra para Empate (X para Empate)
+    RED_BLUE_DRAW = 15     # Red-Blue-Draw
+    BLUE_RED_DRAW = 16     # Blue-Red-Draw
+
+# Quantas cores identificam cada tipo de padrão
+PATTERN_ARITY = {
+    PatternKind.SIMPLE_BREAK: 2, PatternKind.REPEATED_PAIR: 1, PatternKind.TWO_ONE: 2,
+    PatternKind.ZIG_ZAG: 3, PatternKind.DRAW_IN_MIDDLE: 2, PatternKind.WAVE_121: 4,
+    PatternKind.THREE_ONE: 2, PatternKind.TWO_TWO: 2, PatternKind.MIRROR: 4,
+    PatternKind.THREE_THREE: 2, PatternKind.BLOCK_2: 2, PatternKind.BLOCK_3: 2,
+    PatternKind.ALT_BLOCK_2: 2, PatternKind.ALT_BLOCK_3: 2, PatternKind.BREAK_TO_DRAW: 1,
+    PatternKind.RED_BLUE_DRAW: 0, PatternKind.BLUE_RED_DRAW: 0,
+}
+PATTERN_ID_STRIDE = 3 ** 4  # Combinações de até 4 cores por tipo
+PATTERN_ID_SPACE = len(PatternKind) * PATTERN_ID_STRIDE
+
+def pattern_id(kind, *colors):
+    """Id inteiro do padrão: tipo seguido das cores em base 3."""
+    code = 0
+    for color in colors:
+        code = code * 3 + color
+    return kind * PATTERN_ID_STRIDE + code
+
+def pattern_colors(pid):
+    """Tipo e cores (códigos) de um id de padrão."""
+    kind = PatternKind(pid // PATTERN_ID_STRIDE)
+    code = pid % PATTERN_ID_STRIDE
+    colors = []
+    for _ in range(PATTERN_ARITY[kind]):
+        code, color = divmod(code, 3)
+        colors.append(color)
+    return kind, tuple(reversed(colors))
+
+def _label_color(color, sep=''):
+    return f"{COLORS[color].capitalize()}{sep}{get_color_emoji(COLORS[color])}"
+
+def pattern_label(pid):
+    """Texto de exibição do padrão. Só é formatado na renderização."""
+    kind, c = pattern_colors(pid)
+    if kind == PatternKind.SIMPLE_BREAK:
+        return f"Quebra Simples ({_label_color(c[0])} para {_label_color(c[1])})"
+    elif kind == PatternKind.REPEATED_PAIR:
+        return f"Dupla Repetida ({_label_color(c[0], ' ')})"
+    elif kind == PatternKind.TWO_ONE:
+        return f"2x1 ({_label_color(c[0], ' ')} {_label_color(c[1])})"
+    elif kind == PatternKind.ZIG_ZAG:
+        return f"Zig-Zag / Alternado ({_label_color(c[0])} {_label_color(c[1])} {_label_color(c[2])})"
+    elif kind == PatternKind.DRAW_IN_MIDDLE:
+        return f"Alternância c/ Empate no Meio ({_label_color(c[0])} Empate{get_color_emoji('yellow')} {_label_color(c[1])})"
+    elif kind == PatternKind.WAVE_121:
+        return f"Padrão Onda 1-2-1 ({' '.join(_label_color(x) for x in c)})"
+    elif kind == PatternKind.THREE_ONE:
+        return f"3x1 ({_label_color(c[0], ' ')} {_label_color(c[1])})"
+    elif kind == PatternKind.TWO_TWO:
+        return f"2x2 ({_label_color(c[0], ' ')} {_label_color(c[1])})"
+    elif kind == PatternKind.MIRROR:
+        return f"Padrão Espelho ({' '.join(_label_color(x) for x in c)})"
+    elif kind == PatternKind.THREE_THREE:
+        return f"3x3 ({_label_color(c[0], ' ')} {_label_color(c[1])})"
+    elif kind in (PatternKind.BLOCK_2, PatternKind.BLOCK_3):
+        size = 2 if kind == PatternKind.BLOCK_2 else 3
+        return f"Padrão Reversão/Bloco {size}x{size} ({_label_color(c[0])} {_label_color(c[1])})"
+    elif kind in (PatternKind.ALT_BLOCK_2, PatternKind.ALT_BLOCK_3):
+        size = 2 if kind == PatternKind.ALT_BLOCK_2 else 3
+        return f"Padrão Reversão/Bloco Alternado {size}x{size} ({_label_color(c[0])} {_label_color(c[1])})"
+    elif kind == PatternKind.BREAK_TO_DRAW:
+        return f"Quebra para Empate ({_label_color(c[0])} para Empate{get_color_emoji('yellow')})"
+    elif kind == PatternKind.RED_BLUE_DRAW:
+        return "Red-Blue-Draw (🔴🔵🟡)"
+    else: # BLUE_RED_DRAW
+        return "Blue-Red-Draw (🔵🔴🟡)"
+
+class PatternCounts:
+    """
+    Contagens de padrões em um array indexado pelo id do padrão, um byte por
+    id (as contagens são de uma janela de NUM_RECENT_RESULTS_FOR_ANALYSIS
+    resultados). `items()` percorre só os padrões presentes; os textos só são
+    montados por `labels()`, na exibição.
+    """
+
+    __slots__ = ('_counts',)
+
+    def __init__(self, counts=None):
+        self._counts = array.array('B', counts) if counts is not None else array.array('B', bytes(PATTERN_ID_SPACE))
+
+    def add(self, pid, delta=1):
+        self._counts[pid] += delta
+
+    def __getitem__(self, pid):
+        return self._counts[pid]
+
+    def get(self, pid, default=0):
+        return self._counts[pid] or default
+
+    def items(self):
+        return [(pid, count) for pid, count in enumerate(self._counts) if count]
+
+    def labels(self):
+        """Dicionário {texto do padrão: contagem}, no formato exibido na tela."""
+        return {pattern_label(pid): count for pid, count in self.items()}
+
+    def copy(self):
+        return PatternCounts(self._counts)
+
+    def __len__(self):
+        return len(self._counts) - self._counts.count(0)
+
+    def __eq__(self, other):
+        return isinstance(other, PatternCounts) and self._counts == other._counts
+
+    def __repr__(self):
+        return f"PatternCounts({self.labels()!r})"
+
+def _codes(results):
+    """Códigos (0/1/2) dos resultados, mais recente primeiro."""
+    if isinstance(results, _HistorySequence):
+        return results.codes()
+    return bytes(RESULT_CODES[r] for r in results)
+
+# --- Detector de Padrões ---
+
+def _ngram_break_ids(c):
+    """
+    Ids dos padrões complexos que começam na primeira posição de `c` e usam
+    exatamente len(c) cores (2, 3, 4 ou 6).
+    """
+    ids = []
+    if len(c) == 2:
+        # 1. Quebra Simples / 10. Duplas Repetidas (Ex: R R, B B, Y Y)
+        if c[0] != c[1]:
+            ids.append(pattern_id(PatternKind.SIMPLE_BREAK, c[0], c[1]))
+        else:
+            ids.append(pattern_id(PatternKind.REPEATED_PAIR, c[0]))
+    elif len(c) == 3:
+        # 2. Padrões 2x1 (Ex: R R B)
+        if c[0] == c[1] and c[0] != c[2]:
+            ids.append(pattern_id(PatternKind.TWO_ONE, c[0], c[2]))
+        # 3. Zig-Zag / Padrão Alternado (Ex: R B R)
+        if c[0] != c[1] and c[1] != c[2] and c[0] == c[2]:
+            ids.append(pattern_id(PatternKind.ZIG_ZAG, c[0], c[1], c[2]))
+        # 4. Alternância com Empate no Meio (X Draw Y - Ex: R Y B)
+        if c[1] == YELLOW and c[0] != YELLOW and c[2] != YELLOW and c[0] != c[2]:
+            ids.append(pattern_id(PatternKind.DRAW_IN_MIDDLE, c[0], c[2]))
+    elif len(c) == 4:
+        # 5. Padrão Onda 1-2-1 e 8. Padrão de Espelho (Ex: R B B R)
+        if c[0] != c[1] and c[1] == c[2] and c[2] != c[3] and c[0] == c[3]:
+            ids.append(pattern_id(PatternKind.WAVE_121, *c))
+            ids.append(pattern_id(PatternKind.MIRROR, *c))
+        # 6. Padrões 3x1 (Ex: R R R B)
+        if c[0] == c[1] and c[1] == c[2] and c[0] != c[3]:
+            ids.append(pattern_id(PatternKind.THREE_ONE, c[0], c[3]))
+        # 7. Padrões 2x2 (Ex: R R B B)
+        if c[0] == c[1] and c[2] == c[3] and c[0] != c[2]:
+            ids.append(pattern_id(PatternKind.TWO_TWO, c[0], c[2]))
+    elif len(c) == 6:
+        # 9. Padrões 3x3 (Ex: R R R B B B)
+        if c[0] == c[1] and c[1] == c[2] and c[3] == c[4] and c[4] == c[5] and c[0] != c[3]:
+            ids.append(pattern_id(PatternKind.THREE_THREE, c[0], c[3]))
+    return ids
+
+def _ngram_draw_ids(c):
+    """Ids dos padrões de empate que começam na primeira posição de `c` (2 ou 3 cores)."""
+    ids = []
+    if len(c) == 2:
+        if c[1] == YELLOW and c[0] != YELLOW:
+            ids.append(pattern_id(PatternKind.BREAK_TO_DRAW, c[0]))
+    elif len(c) == 3 and c[2] == YELLOW:
+        if c[0] == RED and c[1] == BLUE:
+            ids.append(pattern_id(PatternKind.RED_BLUE_DRAW))
+        elif c[0] == BLUE and c[1] == RED:
+            ids.append(pattern_id(PatternKind.BLUE_RED_DRAW))
+    return ids
+
+_NGRAM_WIDTHS = (2, 3, 4, 6)
+_MAX_NGRAM = 6
+
+def _digits(code, width):
+    """Cores (mais significativa primeiro) de um código em base 3 com `width` dígitos."""
+    colors = []
+    for _ in range(width):
+        code, color = divmod(code, 3)
+        colors.append(color)
+    return tuple(reversed(colors))
+
+# Padrões de largura exata: _EXACT_NGRAMS[w][código] = (ids de quebra, ids de empate)
+_EXACT_NGRAMS = {
+    width: [(tuple(_ngram_break_ids(_digits(code, width))), tuple(_ngram_draw_ids(_digits(code, width))))
+            for code in range(3 ** width)]
+    for width in _NGRAM_WIDTHS
+}
+
+def _build_prefix_table(length):
+    """
+    Tabela com 3^length entradas: para cada trecho de `length` cores, todos os
+    padrões que começam na primeira cor e cabem no trecho, e se há quebra
+    entre as duas primeiras cores.
+    """
+    table = []
+    for code in range(3 ** length):
+        break_ids, draw_ids = [], []
+        for width in _NGRAM_WIDTHS:
+            if width <= length:
+                exact = _EXACT_NGRAMS[width][code // 3 ** (length - width)]
+                break_ids.extend(exact[0])
+                draw_ids.extend(exact[1])
+        is_break = length >= 2 and code // 3 ** (length - 1) != (code // 3 ** (length - 2)) % 3
+        table.append((tuple(break_ids), tuple(draw_ids), is_break))
+    return table
+
+# _PREFIX_NGRAMS[n] tem 3^n entradas; a de 6 cores (729) cobre quase toda a
+# janela e as menores só os últimos trechos, onde faltam resultados.
+_PREFIX_NGRAMS = {length: _build_prefix_table(length) for length in range(1, _MAX_NGRAM + 1)}
+
+WindowScan = collections.namedtuple('WindowScan', 'codes color_counts breaks break_patterns draw_patterns')
+
+def scan_window(results):
+    """
+    Percorre uma única vez os últimos N resultados. A janela é codificada em
+    base 3 e um inteiro de até 6 cores desliza do fim para o início; cada
+    posição soma os padrões da tabela pré-calculada para aquele código.
+    """
+    codes = _codes(results[:NUM_RECENT_RESULTS_FOR_ANALYSIS])
+    break_patterns = PatternCounts()
+    draw_patterns = PatternCounts()
+    breaks = 0
+    code = 0
+    length = 0
+    high = 1  # 3^(length - 1)
+    for color in reversed(codes):
+        if length == _MAX_NGRAM:
+            code //= 3
+        else:
+            length += 1
+            high = 3 ** (length - 1)
+        code += color * high
+        break_ids, draw_ids, is_break = _PREFIX_NGRAMS[length][code]
+        for pid in break_ids:
+            break_patterns.add(pid)
+        for pid in draw_ids:
+            draw_patterns.add(pid)
+        breaks += is_break
+    color_counts = (codes.count(RED), codes.count(BLUE), codes.count(YELLOW))
+    return WindowScan(codes, color_counts, breaks, break_patterns, draw_patterns)
+
+# --- Funções de Análise ---
+
+def analyze_surf(results):
+    """
+    Analisa os padrões de "surf" (sequências de Home/Away/Draw)
+    nos últimos N resultados para 'current' e no histórico completo para 'max'.
+    """
+    relevant_results = results[:NUM_RECENT_RESULTS_FOR_ANALYSIS]
+    
+    current_home_sequence = 0
+    current_away_sequence = 0
+    current_draw_sequence = 0
+    
+    if relevant_results:
+        first_result = relevant_results[0]
+        for r in relevant_results:
+            if r == first_result:
+                if first_result == 'home': 
+                    current_home_sequence += 1
+                elif first_result == 'away': 
+                    current_away_sequence += 1
+                else: # draw
+                    current_draw_sequence += 1
+            else:
+                break
+    
+    # Calcular sequências máximas em todo o histórico disponível para maior precisão
+    max_home_sequence = 0
+    max_away_sequence = 0
+    max_draw_sequence = 0
+    
+    temp_home_seq = 0
+    temp_away_seq = 0
+    temp_draw_seq = 0
+
+    for res in results: # Percorre todos os resultados para o máximo
+        if res == 'home':
+            temp_home_seq += 1
+            temp_away_seq = 0
+            temp_draw_seq = 0
+        elif res == 'away':
+            temp_away_seq += 1
+            temp_home_seq = 0
+            temp_draw_seq = 0
+        else: # draw
+            temp_draw_seq += 1
+            temp_home_seq = 0
+            temp_away_seq = 0
+        
+        max_home_sequence = max(max_home_sequence, temp_home_seq)
+        max_away_sequence = max(max_away_sequence, temp_away_seq)
+        max_draw_sequence = max(max_draw_sequence, temp_draw_seq)
+
+    return {
+        'home_sequence': current_home_sequence,
+        'away_sequence': current_away_sequence,
+        'draw_sequence': current_draw_sequence,
+        'max_home_sequence': max_home_sequence,
+        'max_away_sequence': max_away_sequence,
+        'max_draw_sequence': max_draw_sequence
+    }
+
+_COLOR_INITIALS = bytes.maketrans(b'\x00\x01\x02', b'RBY')
+
+def analyze_colors(results, scan=None):
+    """Analisa a contagem e as sequências de cores nos últimos N resultados."""
+    scan = scan or scan_window(results)
+    if not scan.codes:
+        return {'red': 0, 'blue': 0, 'yellow': 0, 'current_color': '', 'streak': 0, 'color_pattern_27': ''}
+
+    color_counts = dict(zip(COLORS, scan.color_counts))
+
+    current_color = get_color(results[0]) if results else ''
+    streak = 0
+    for result in results: # Streak é sempre do resultado mais recente
+        if get_color(result) == current_color:
+            streak += 1
+        else:
+            break
+            
+    color_pattern_27 = scan.codes.translate(_COLOR_INITIALS).decode()
+
+    return {
+        'red': color_counts['red'],
+        'blue': color_counts['blue'],
+        'yellow': color_counts['yellow'],
+        'current_color': current_color,
+        'streak': streak,
+        'color_pattern_27': color_pattern_27
+    }
+
+def _block_pattern_ids(colors):
+    """Padrões de Reversão / Alternância de Blocos no início da janela (Ex: RR BB RR BB)."""
+    block_pattern_ids = []
+    if len(colors) >= 4:
+        for block_size in [2, 3]: # Tamanhos de bloco comuns
+            if len(colors) >= 2 * block_size:
+                block1_colors = colors[:block_size]
+                block2_colors = colors[block_size : 2 * block_size]
+                
+                if all(c == block1_colors[0] for c in block1_colors) and \
+                   all(c == block2_colors[0] for c in block2_colors) and \
+                   block1_colors[0] != block2_colors[0]:
+                    
+                    if len(colors) >= 4 * block_size:
+                        block3_colors = colors[2 * block_size : 3 * block_size]
+                        block4_colors = colors[3 * block_size : 4 * block_size]
+                        if all(c == block3_colors[0] for c in block3_colors) and \
+                           all(c == block4_colors[0] for c in block4_colors) and \
+                           block1_colors[0] == block3_colors[0] and \
+                           block2_colors[0] == block4_colors[0]:
+                                kind = PatternKind.ALT_BLOCK_2 if block_size == 2 else PatternKind.ALT_BLOCK_3
+                                block_pattern_ids.append(pattern_id(kind, block1_colors[0], block2_colors[0]))
+                    else:
+                         kind = PatternKind.BLOCK_2 if block_size == 2 else PatternKind.BLOCK_3
+                         block_pattern_ids.append(pattern_id(kind, block1_colors[0], block2_colors[0]))
+    return block_pattern_ids
+
+def find_complex_patterns(results, scan=None):
+    """
+    Identifica padrões de quebra e padrões específicos (2x2, 3x3, 3x1, 2x1, etc.)
+    nos últimos N resultados, incluindo os novos padrões da imagem.
+    """
+    scan = scan or scan_window(results)
+    patterns = scan.break_patterns.copy()
+
+    # Padrão de Reversão / Alternância de Blocos (Ex: RR BB RR BB)
+    for pid in _block_pattern_ids(scan.codes[:12]):
+        patterns.add(pid)
+
+    return patterns
+
+def analyze_break_probability(results, scan=None):
+    """Analisa a probabilidade de quebra com base no histórico dos últimos N resultados."""
+    scan = scan or scan_window(results)
+    if len(scan.codes) < 2:
+        return {'break_chance': 0, 'last_break_type': ''}
+    
+    total_sequences_considered = len(scan.codes) - 1
+    break_chance = (scan.breaks / total_sequences_considered) * 100
+
+    last_break_type = ""
+    if len(results) >= 2 and get_color(results[0]) != get_color(results[1]):
+        last_break_type = f"Quebrou de {get_color(results[1]).capitalize()} {get_color_emoji(get_color(results[1]))} para {get_color(results[0]).capitalize()} {get_color_emoji(get_color(results[0]))}"
+    
+    return {
+        'break_chance': round(break_chance, 2),
+        'last_break_type': last_break_type
+    }
+
+def analyze_draw_specifics(results, scan=None):
+    """Análise específica para empates nos últimos N resultados e padrões de recorrência."""
+    scan = scan or scan_window(results)
+    if not scan.codes:
+        return {'draw_frequency_27': 0, 'time_since_last_draw': -1, 'draw_patterns': PatternCounts(), 'recurrent_draw': False}
+
+    draw_frequency_27 = (scan.color_counts[YELLOW] / len(scan.codes)) * 100
+
+    time_since_last_draw = -1
+    for i, result in enumerate(results): # Tempo desde o último empate no histórico COMPLETO
+        if result == 'draw':
+            time_since_last_draw = i
+            break
+
+    # Detecção de Empate Recorrente (intervalos curtos)
+    draw_indices = [i for i, color in enumerate(scan.codes) if color == YELLOW]
+    recurrent_draw = False
+    if len(draw_indices) >= 2:
+        for i in range(len(draw_indices) - 1):
+            interval = draw_indices[i] - draw_indices[i+1] -1
+            if 0 <= interval <= 3:
+                recurrent_draw = True
+                break
+
+    return {
+        'draw_frequency_27': round(draw_frequency_27, 2),
+        'time_since_last_draw': time_since_last_draw,
+        'draw_patterns': scan.draw_patterns,
+        'recurrent_draw': recurrent_draw
+    }
+
+_ZIG_ZAG_IDS = tuple(pattern_id(PatternKind.ZIG_ZAG, a, b, a) for a in range(3) for b in range(3) if a != b)
+
+# --- Janelas Múltiplas (Somas Acumuladas) ---
+
+# Janelas comparadas lado a lado; a última é o histórico armazenado inteiro
+MULTI_WINDOWS = (NUM_RECENT_RESULTS_FOR_ANALYSIS, 50, 100, 500, MAX_HISTORY_TO_STORE)
+
+WindowStats = collections.namedtuple('WindowStats', 'size home away draw breaks')
+
+def window_summary(stats):
+    """Percentuais de uma janela, no formato exibido na tela."""
+    if not stats.size:
+        return {'total': 0, 'home': 0, 'away': 0, 'draw': 0, 'draw_frequency': 0, 'break_chance': 0}
+    return {
+        'total': stats.size,
+        'home': stats.home,
+        'away': stats.away,
+        'draw': stats.draw,
+        'draw_frequency': round(stats.draw / stats.size * 100, 2),
+        'break_chance': round(stats.breaks / (stats.size - 1) * 100, 2) if stats.size > 1 else 0,
+    }
+
+class PrefixCounts:
+    """
+    Somas acumuladas de casa, visitante, empate e trocas de cor, uma entrada
+    por rodada num buffer circular de `capacity + 1` posições. Qualquer janela
+    dos últimos `capacity` resultados custa duas leituras por contador.
+    Os contadores são guardados módulo 2^16; como nenhuma janela passa de
+    `capacity` (< 2^16) resultados, as diferenças continuam exatas.
+    `codes` (do mais antigo ao mais recente) são registrados na criação.
+    """
+
+    __slots__ = ('capacity', 'rounds', 'size', 'last', '_sums')
+
+    _FIELDS = 4  # casa, visitante, empate, trocas
+    _MASK = 0xFFFF
+
+    def __init__(self, capacity=MAX_HISTORY_TO_STORE, codes=b''):
+        if capacity > self._MASK:
+            raise ValueError(f"capacity deve ser no máximo {self._MASK}")
+        self.capacity = capacity
+        self.rounds = 0  # Total de resultados recebidos
+        self.size = 0  # Resultados armazenados (até `capacity`)
+        self.last = -1  # Código do último resultado
+        self._sums = array.array('H', bytes(2 * self._FIELDS * (capacity + 1)))
+        for code in codes[-capacity:]:
+            self.push(code)
+
+    def push(self, code):
+        """Registra o próximo código (0/1/2)."""
+        sums = self._sums
+        fields = self._FIELDS
+        prev = (self.rounds % (self.capacity + 1)) * fields
+        self.rounds += 1
+        slot = (self.rounds % (self.capacity + 1)) * fields
+        for k in range(3):
+            sums[slot + k] = sums[prev + k]
+        sums[slot + code] = (sums[slot + code] + 1) & self._MASK
+        change = self.last >= 0 and code != self.last
+        sums[slot + 3] = (sums[prev + 3] + change) & self._MASK
+        self.last = code
+        if self.size < self.capacity:
+            self.size += 1
+
+    def pop(self, evicted=None):
+        """
+        Desfaz o último `push`. Se ele encontrou `capacity` resultados
+        armazenados, `evicted` é o que ele tirou da maior janela: a soma de antes desse
+        resultado ocupava a posição da rodada desfeita e é refeita a partir
+        da seguinte. As trocas dessa soma só são lidas depois de mais um
+        `pop`, que traz o resultado anterior e as acerta.
+        """
+        sums = self._sums
+        fields = self._FIELDS
+        mask = self._MASK
+        slots = self.capacity + 1
+        slot = (self.rounds % slots) * fields
+        self.rounds -= 1
+        if evicted is None:
+            self.size -= 1
+        else:
+            after = ((self.rounds - self.capacity + 1) % slots) * fields
+            for k in range(fields):
+                sums[slot + k] = sums[after + k]
+            sums[slot + evicted] = (sums[slot + evicted] - 1) & mask
+            # A soma seguinte foi refeita no `pop` anterior sem saber se `evicted` troca de cor
+            following = ((self.rounds - self.capacity + 2) % slots) * fields
+            code = next(k for k in range(3) if (sums[following + k] - sums[after + k]) & mask)
+            sums[after + 3] = (sums[following + 3] - (code != evicted)) & mask
+        if self.size:
+            end = (self.rounds % slots) * fields
+            prev = ((self.rounds - 1) % slots) * fields
+            self.last = next(k for k in range(3) if (sums[end + k] - sums[prev + k]) & mask)
+        else:
+            self.last = -1
+
+    def window(self, size):
+        """WindowStats dos últimos `size` resultados (limitado ao que está armazenado)."""
+        size = min(size, self.size)
+        if not size:
+            return WindowStats(0, 0, 0, 0, 0)
+        sums = self._sums
+        fields = self._FIELDS
+        mask = self._MASK
+        end = (self.rounds % (self.capacity + 1)) * fields
+        start = ((self.rounds - size) % (self.capacity + 1)) * fields
+        # Trocas entre resultados da janela: a do primeiro resultado com o anterior não conta
+        first = ((self.rounds - size + 1) % (self.capacity + 1)) * fields
+        return WindowStats(size,
+                           (sums[end] - sums[start]) & mask,
+                           (sums[end + 1] - sums[start + 1]) & mask,
+                           (sums[end + 2] - sums[start + 2]) & mask,
+                           (sums[end + 3] - sums[first + 3]) & mask)
+
+    def windows(self, sizes=MULTI_WINDOWS):
+        return {size: self.window(size) for size in sizes}
+
+# --- Índice de Transições (Markov) ---
+
+MARKOV_MAX_ORDER = 6
+# Amostras mínimas de um contexto e participação mínima do próximo resultado para pontuar
+MARKOV_MIN_SAMPLES = 20
+MARKOV_MIN_SHARE = 60
+
+MarkovSignal = collections.namedtuple('MarkovSignal', 'order context counts')
+
+class MarkovIndex:
+    """
+    Para cada contexto de 1 a `max_order` resultados do histórico armazenado,
+    quantas vezes veio casa, visitante e empate em seguida. As contagens ficam
+    num único array, na posição OFFSET[k] + 3 * código do contexto em base 3
+    (mais antigo primeiro) + próximo resultado. `push` custa O(k): soma as
+    transições que terminam no novo resultado e, com o histórico cheio,
+    subtrai as que começam no resultado que sai.
+
+    O índice lê o HistoryBuffer de quem o mantém, sem copiá-lo: `push` vem
+    antes de cada `append` no buffer e `pop` depois de cada `pop`. Na criação
+    ele conta as transições que o buffer já tem.
+    """
+
+    __slots__ = ('max_order', 'history', '_recent', '_offsets', '_counts')
+
+    def __init__(self, history, max_order=MARKOV_MAX_ORDER):
+        self.max_order = max_order
+        self.history = history
+        self._recent = 0  # Últimos `max_order` códigos em base 3, o mais recente no dígito menos significativo
+        self._offsets = [0] * (max_order + 1)
+        for k in range(1, max_order):
+            self._offsets[k + 1] = self._offsets[k] + 3 ** k * 3
+        self._counts = array.array('H', bytes(2 * (self._offsets[max_order] + 3 ** max_order * 3)))
+        counts = self._counts
+        offsets = self._offsets
+        for size, code in enumerate(history.codes()[::-1]):
+            power = 1
+            for k in range(1, min(max_order, size) + 1):
+                power *= 3
+                counts[offsets[k] + (self._recent % power) * 3 + code] += 1
+            self._recent = (self._recent * 3 + code) % 3 ** max_order
+
+    def push(self, code):
+        """Registra o próximo código (0/1/2), antes de ele entrar no histórico."""
+        history = self.history
+        size = len(history)
+        counts = self._counts
+        offsets = self._offsets
+        if size == history.capacity:
+            # Transições cujo contexto começa no resultado mais antigo
+            oldest = history[size - self.max_order - 1:].codes()[::-1]
+            context = 0
+            for k in range(1, min(self.max_order, size - 1) + 1):
+                context = context * 3 + oldest[k - 1]
+                counts[offsets[k] + context * 3 + oldest[k]] -= 1
+        power = 1
+        for k in range(1, min(self.max_order, size) + 1):
+            power *= 3
+            counts[offsets[k] + (self._recent % power) * 3 + code] += 1
+        self._recent = (self._recent * 3 + code) % 3 ** self.max_order
+
+    def pop(self, code, evicted=None):
+        """
+        Desfaz o `push` de `code` em O(k), depois de ele sair do histórico:
+        subtrai as transições que terminam nele e, se ele tinha tirado
+        `evicted` do histórico cheio, soma as que começam nesse resultado,
+        que voltou a ser o mais antigo.
+        """
+        history = self.history
+        size = len(history)
+        counts = self._counts
+        offsets = self._offsets
+        self._recent = 0
+        for previous in history[:self.max_order].codes()[::-1]:
+            self._recent = self._recent * 3 + previous
+        power = 1
+        for k in range(1, min(self.max_order, size) + 1):
+            power *= 3
+            counts[offsets[k] + (self._recent % power) * 3 + code] -= 1
+        if evicted is not None:
+            oldest = history[size - self.max_order - 1:].codes()[::-1]
+            context = 0
+            for k in range(1, min(self.max_order, size - 1) + 1):
+                context = context * 3 + oldest[k - 1]
+                counts[offsets[k] + context * 3 + oldest[k]] += 1
+
+    def following(self, sequence):
+        """
+        (casa, visitante, empate) que vieram depois de `sequence` (resultados
+        ou códigos, do mais antigo ao mais recente, 1 a `max_order` itens).
+        """
+        order = len(sequence)
+        if not 1 <= order <= self.max_order:
+            raise ValueError(f"O contexto deve ter de 1 a {self.max_order} resultados")
+        context = 0
+        for item in sequence:
+            context = context * 3 + RESULT_CODES.get(item, item)
+        base = self._offsets[order] + context * 3
+        return tuple(self._counts[base:base + 3])
+
+    def current(self, order):
+        """MarkovSignal do contexto formado pelos últimos `order` resultados."""
+        if order > len(self.history):
+            return MarkovSignal(order, '', (0, 0, 0))
+        base = self._offsets[order] + (self._recent % 3 ** order) * 3
+        return MarkovSignal(order, self.history[:order].codes()[::-1].translate(_COLOR_INITIALS).decode(),
+                            tuple(self._counts[base:base + 3]))
+
+    def signal(self, min_samples=MARKOV_MIN_SAMPLES):
+        """O contexto atual de maior ordem com pelo menos `min_samples` amostras, ou None."""
+        for order in range(min(self.max_order, len(self.history)), 0, -1):
+            current = self.current(order)
+            if sum(current.counts) >= min_samples:
+                return current
+        return None
+
+# --- Sequências do Histórico (Run-Length) ---
+
+class RunLengths:
+    """
+    Histórico armazenado como sequências (código, tamanho), com quantas
+    sequências de cada tamanho há por resultado. As sequências ficam em dois
+    arrays circulares de `capacity` posições (código e tamanho), então o
+    tamanho na memória é fixo. `push` é O(1): cresce a sequência atual ou abre
+    uma nova e, com o histórico cheio, encurta a mais antiga. Como o máximo só
+    cai quando a última sequência do maior tamanho encurta um resultado, ele
+    também é mantido em O(1), sem percorrer o histórico.
+    """
+
+    __slots__ = ('capacity', 'size', 'count', '_head', '_codes', '_sizes', '_lengths', '_max')
+
+    def __init__(self, capacity=MAX_HISTORY_TO_STORE):
+        self.capacity = capacity
+        self.size = 0  # Resultados no histórico armazenado
+        self.count = 0  # Sequências no histórico armazenado
+        self._head = capacity - 1  # Posição da sequência atual
+        self._codes = bytearray(capacity)
+        self._sizes = array.array('H', bytes(2 * capacity))
+        self._lengths = ({}, {}, {})  # Por código: {tamanho: sequências com esse tamanho}
+        self._max = [0, 0, 0]
+
+    def _move(self, code, old, new):
+        """Uma sequência de `code` passou de `old` para `new` resultados (0 = nenhuma)."""
+        lengths = self._lengths[code]
+        if old:
+            if lengths[old] == 1:
+                del lengths[old]
+            else:
+                lengths[old] -= 1
+        if new:
+            lengths[new] = lengths.get(new, 0) + 1
+        if new > self._max[code]:
+            self._max[code] = new
+        elif old == self._max[code] and old not in lengths:
+            # Só encurta de um em um: ou sobra a sequência de `new`, ou nenhuma maior
+            self._max[code] = new
+
+    def push(self, code):
+        """Registra o próximo código (0/1/2)."""
+        sizes = self._sizes
+        if self.size == self.capacity:
+            oldest = (self._head - self.count + 1) % self.capacity
+            sizes[oldest] -= 1
+            self._move(self._codes[oldest], sizes[oldest] + 1, sizes[oldest])
+            if not sizes[oldest]:
+                self.count -= 1
+            self.size -= 1
+        head = self._head
+        if self.count and self._codes[head] == code:
+            sizes[head] += 1
+            self._move(code, sizes[head] - 1, sizes[head])
+        else:
+            head = self._head = (head + 1) % self.capacity
+            self._codes[head] = code
+            sizes[head] = 1
+            self.count += 1
+            self._move(code, 0, 1)
+        self.size += 1
+
+    def pop(self, evicted=None):
+        """
+        Desfaz o último `push` em O(1): encurta a sequência atual e, se ele
+        tinha tirado `evicted` do histórico cheio, devolve esse resultado ao
+        início da sequência mais antiga (ou abre uma antes dela).
+        """
+        sizes = self._sizes
+        head = self._head
+        code = self._codes[head]
+        sizes[head] -= 1
+        self._move(code, sizes[head] + 1, sizes[head])
+        if not sizes[head]:
+            self.count -= 1
+            self._head = (head - 1) % self.capacity
+        self.size -= 1
+        if evicted is not None:
+            oldest = (self._head - self.count + 1) % self.capacity
+            if self.count and self._codes[oldest] == evicted:
+                sizes[oldest] += 1
+                self._move(evicted, sizes[oldest] - 1, sizes[oldest])
+            else:
+                oldest = (oldest - 1) % self.capacity
+                self._codes[oldest] = evicted
+                sizes[oldest] = 1
+                self.count += 1
+                self._move(evicted, 0, 1)
+            self.size += 1
+        return code
+
+    @property
+    def streak(self):
+        """Tamanho da sequência atual."""
+        return self._sizes[self._head] if self.count else 0
+
+    def max_length(self, code):
+        """Maior sequência de `code` no histórico armazenado."""
+        return self._max[code]
+
+    def distribution(self, code):
+        """{tamanho: quantidade} das sequências de `code`, em ordem de tamanho."""
+        return dict(sorted(self._lengths[code].items()))
+
+    def summary(self, code):
+        """Sequências de `code`: quantidade, tamanho médio e maior."""
+        lengths = self._lengths[code]
+        count = sum(lengths.values())
+        total = sum(length * n for length, n in lengths.items())
+        return {'runs': count, 'mean': round(total / count, 2) if count else 0, 'max': self._max[code]}
+
+# --- Desfazer Rodadas ---
+
+class RoundDeltas:
+    """
+    O que `IncrementalAnalyzer.undo` não deduz do estado atual, por rodada, num
+    buffer circular das últimas `capacity`: o resultado que a rodada tirou do
+    histórico cheio (NONE = nenhum) e as rodadas sem empate antes dela.
+    Três bytes por rodada; o resto é desfeito pelas operações inversas.
+    """
+
+    __slots__ = ('capacity', 'size', '_head', '_evicted', '_gaps')
+
+    NONE = 3
+
+    def __init__(self, capacity=UNDO_DEPTH):
+        self.capacity = capacity
+        self.size = 0
+        self._head = 0  # Próxima posição de escrita
+        self._evicted = bytearray(capacity)
+        self._gaps = array.array('h', bytes(2 * capacity))
+
+    def __len__(self):
+        return self.size
+
+    def push(self, evicted, gap):
+        self._evicted[self._head] = self.NONE if evicted is None else evicted
+        self._gaps[self._head] = gap
+        self._head = (self._head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def pop(self):
+        """(código que saiu do histórico ou None, rodadas sem empate antes) da última rodada."""
+        if not self.size:
+            raise IndexError('nenhuma rodada para desfazer')
+        self._head = (self._head - 1) % self.capacity
+        self.size -= 1
+        evicted = self._evicted[self._head]
+        return (None if evicted == self.NONE else evicted), self._gaps[self._head]
+
+
+# --- Motor de Regras da Sugestão ---
+
+# Regras padrão, no mesmo formato do JSON aceito por `load_rule_set`. Cada regra:
+#   colors       cores do último resultado em que vale (None = todas)
+#   previous     cor do penúltimo resultado exigida (opcional)
+#   min_streak / max_streak   faixa da sequência atual (opcional)
+#   pattern      tipo de padrão ("ZIG_ZAG") ou [tipo, cores...]; a regra é
+#                avaliada para cada id com contagem >= min_count na janela
+#   conditions   [métrica, operador, valor] sobre as métricas de RULE_METRICS
+#   bets         apostas que recebem `score` ('opposite' = contra a cor atual,
+#                'markov' = próximo resultado mais frequente do contexto)
+#   reason / guarantee   textos formatados com as métricas ({count} e
+#                {pattern} nas regras de padrão)
+DEFAULT_RULES = [
+    # Nível 1: quebra de sequência longa (Surf Max)
+    {'name': 'surf_max_red', 'colors': ['red'], 'min_streak': 3,
+     'conditions': [['surf_max', '>', 0], ['surf_gap', '>=', 0]], 'bets': ['away'], 'score': 120,
+     'reason': "Sequência atual de Vermelho ({streak}x) atingiu ou superou o máximo histórico de surf ({surf_max}x).",
+     'guarantee': "Surf Max Quebra: Red"},
+    {'name': 'surf_max_blue', 'colors': ['blue'], 'min_streak': 3,
+     'conditions': [['surf_max', '>', 0], ['surf_gap', '>=', 0]], 'bets': ['home'], 'score': 120,
+     'reason': "Sequência atual de Azul ({streak}x) atingiu ou superou o máximo histórico de surf ({surf_max}x).",
+     'guarantee': "Surf Max Quebra: Blue"},
+    {'name': 'surf_max_yellow', 'colors': ['yellow'], 'min_streak': 2,
+     'conditions': [['surf_max', '>', 0], ['surf_gap', '>=', 0]], 'bets': ['home', 'away'], 'score': 90,
+     'reason': "Sequência atual de Empate ({streak}x) atingiu ou superou o máximo histórico.",
+     'guarantee': "Surf Max Quebra: Yellow"},
+    # Nível 2: empate atrasado e Zig-Zag recorrente. O empate recorrente da
+    # cadeia original não entra: analyze_draw_specifics mede o intervalo com
+    # índices crescentes (sempre negativo), então ele nunca pontuou.
+    {'name': 'draw_delayed',
+     'conditions': [['time_since_last_draw', '>=', 7], ['draw_frequency', '<', 12]], 'bets': ['draw'], 'score': 80,
+     'reason': "Empate não ocorre há {time_since_last_draw} rodadas e frequência baixa ({draw_frequency}% nos últimos 27).",
+     'guarantee': "Empate Atrasado/Baixa Frequência"},
+    {'name': 'zig_zag_home', 'colors': ['blue'], 'previous': 'red', 'pattern': 'ZIG_ZAG', 'min_count': 3,
+     'bets': ['home'], 'score': 80,
+     'reason': "Padrão Zig-Zag (🔵🔴...) recorrente ({count}x).", 'guarantee': "{pattern}"},
+    {'name': 'zig_zag_away', 'colors': ['red'], 'previous': 'blue', 'pattern': 'ZIG_ZAG', 'min_count': 3,
+     'bets': ['away'], 'score': 80,
+     'reason': "Padrão Zig-Zag (🔴🔵...) recorrente ({count}x).", 'guarantee': "{pattern}"},
+    # Nível 3: alta probabilidade de quebra geral
+    {'name': 'high_break_red', 'colors': ['red'], 'max_streak': 3,
+     'conditions': [['break_chance', '>', 60]], 'bets': ['away'], 'score': 50,
+     'reason': "Alta chance de quebra geral ({break_chance}%). Previsão de quebra da sequência de {color_name}.",
+     'guarantee': "Alta Probabilidade de Quebra Geral"},
+    {'name': 'high_break_blue', 'colors': ['blue'], 'max_streak': 3,
+     'conditions': [['break_chance', '>', 60]], 'bets': ['home'], 'score': 50,
+     'reason': "Alta chance de quebra geral ({break_chance}%). Previsão de quebra da sequência de {color_name}.",
+     'guarantee': "Alta Probabilidade de Quebra Geral"},
+    # Sinais opcionais: só têm métricas com `long_window` / `markov`
+    {'name': 'window_divergence', 'colors': ['red', 'blue'], 'min_streak': 2,
+     'conditions': [['window_gap', '>=', 15]], 'bets': ['opposite'], 'score': 60,
+     'reason': "{color_name} em {short_pct}% nos últimos {short_total} contra {long_pct}% nos últimos {long_size}.",
+     'guarantee': "Divergência de Janelas ({short_total}/{long_size})"},
+    {'name': 'window_draw_divergence',
+     'conditions': [['time_since_last_draw', '>=', 7], ['long_draw_gap', '>=', 8]], 'bets': ['draw'], 'score': 40,
+     'reason': "Frequência de empate de {draw_frequency}% nos últimos {short_total} contra {long_draw_pct}% nos últimos {long_size}.",
+     'guarantee': "Divergência de Janelas ({short_total}/{long_size})"},
+    {'name': 'markov_transition',
+     'conditions': [['markov_samples', '>=', MARKOV_MIN_SAMPLES], ['markov_share', '>=', MARKOV_MIN_SHARE]],
+     'bets': ['markov'], 'score': 70,
+     'reason': "Após {markov_context} veio {markov_emoji} em {markov_count} de {markov_samples} vezes ({markov_share_pct}%).",
+     'guarantee': "Transição Markov Ordem {markov_order}"},
+]
+
+# Entradas de uma rodada para as métricas das regras
+_RuleInputs = collections.namedtuple(
+    '_RuleInputs',
+    'results color streak surf_analysis color_analysis break_probability draw_specifics long_window markov shared')
+
+_SURF_KEYS = tuple(f'max_{result}_sequence' for result in RESULT_TYPES)
+
+def _short_total(m):
+    return min(len(m.results), NUM_RECENT_RESULTS_FOR_ANALYSIS)
+
+def _long_window(m):
+    """A janela longa, só quando é maior que a curta (senão as métricas dela não existem)."""
+    long_window = m.long_window
+    return long_window if long_window is not None and long_window.size > _short_total(m) else None
+
+def _window_pcts(m):
+    """(% da cor atual na janela curta, % na longa), ou None (sem janela longa ou no empate)."""
+    long_window = _long_window(m)
+    if long_window is None or m.color == YELLOW:
+        return None
+    return (m.color_analysis[COLORS[m.color]] / _short_total(m) * 100,
+            long_window[1 + m.color] / long_window.size * 100)
+
+def _long_draw_pct(m):
+    long_window = _long_window(m)
+    return None if long_window is None else long_window.draw / long_window.size * 100
+
+def _markov_best(m):
+    """(resultado mais frequente depois do contexto atual, amostras), ou None sem amostras."""
+    markov = m.markov
+    if markov is None:
+        return None
+    samples = sum(markov.counts)
+    return (markov.counts.index(max(markov.counts)), samples) if samples else None
+
+def _optional(source, value):
+    """
+    Métrica derivada de um sinal opcional: None quando o sinal não existe
+    nesta análise. `source` roda uma vez por rodada (guardado em `m.shared`).
+    """
+    def metric(m):
+        found = m.shared.get(source, m)  # `m` marca que ainda não foi calculado
+        if found is m:
+            found = m.shared[source] = source(m)
+        return None if found is None else value(m, found)
+    return metric
+
+# Valores que as condições e os textos das regras podem usar, calculados só
+# quando uma condição ou o texto da aposta escolhida pede (None = indisponível)
+RULE_METRICS = {
+    'color_name': lambda m: COLORS[m.color].capitalize(),
+    'streak': lambda m: m.streak,
+    'surf_max': lambda m: m.surf_analysis[_SURF_KEYS[m.color]],
+    'surf_gap': lambda m: m.streak - m.surf_analysis[_SURF_KEYS[m.color]],
+    'time_since_last_draw': lambda m: m.draw_specifics['time_since_last_draw'],
+    'draw_frequency': lambda m: m.draw_specifics['draw_frequency_27'],
+    'recurrent_draw': lambda m: m.draw_specifics['recurrent_draw'],
+    'break_chance': lambda m: m.break_probability['break_chance'],
+    'short_total': _optional(_long_window, lambda m, _: _short_total(m)),
+    'long_size': _optional(_long_window, lambda m, long_window: long_window.size),
+    'long_draw_pct': _optional(_long_draw_pct, lambda m, pct: round(pct, 2)),
+    'long_draw_gap': _optional(_long_draw_pct, lambda m, pct: pct - m.draw_specifics['draw_frequency_27']),
+    'short_pct': _optional(_window_pcts, lambda m, pcts: round(pcts[0], 2)),
+    'long_pct': _optional(_window_pcts, lambda m, pcts: round(pcts[1], 2)),
+    'window_gap': _optional(_window_pcts, lambda m, pcts: pcts[0] - pcts[1]),
+    'markov_samples': _optional(_markov_best, lambda m, best: best[1]),
+    'markov_share': _optional(_markov_best, lambda m, best: m.markov.counts[best[0]] / best[1] * 100),
+    'markov_share_pct': _optional(_markov_best, lambda m, best: round(m.markov.counts[best[0]] / best[1] * 100, 2)),
+    'markov_count': _optional(_markov_best, lambda m, best: m.markov.counts[best[0]]),
+    'markov_context': _optional(_markov_best, lambda m, _: m.markov.context),
+    'markov_order': _optional(_markov_best, lambda m, _: m.markov.order),
+    'markov_bet': _optional(_markov_best, lambda m, best: RESULT_TYPES[best[0]]),
+    'markov_emoji': _optional(_markov_best, lambda m, best: get_result_emoji(RESULT_TYPES[best[0]])),
+}
+
+def _unknown_metric(m):
+    return None
+
+_OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le, '==': operator.eq, '!=': operator.ne}
+_BET_TARGETS = ('home', 'away', 'draw', 'opposite', 'markov')
+
+Rule = collections.namedtuple(
+    'Rule', 'name colors previous min_streak max_streak pattern_ids min_count conditions bets score reason guarantee '
+            'fields')
+
+# Ids que os detectores de quebra conseguem gerar: as regras de padrão só olham estes
+_DETECTABLE_BREAK_IDS = frozenset(
+    [pid for width in _NGRAM_WIDTHS for break_ids, _ in _EXACT_NGRAMS[width] for pid in break_ids]
+    + [pattern_id(kind, a, b)
+       for kind in (PatternKind.BLOCK_2, PatternKind.BLOCK_3, PatternKind.ALT_BLOCK_2, PatternKind.ALT_BLOCK_3)
+       for a in range(3) for b in range(3) if a != b]
+)
+
+def _pattern_ids(spec):
+    """Ids detectáveis de um padrão: "TIPO" (todas as cores) ou [TIPO, cor, ...]."""
+    if isinstance(spec, str):
+        kind = PatternKind[spec]
+        ids = range(kind * PATTERN_ID_STRIDE, kind * PATTERN_ID_STRIDE + 3 ** PATTERN_ARITY[kind])
+    else:
+        kind, *colors = spec
+        ids = (pattern_id(PatternKind[kind], *(COLORS.index(color) for color in colors)),)
+    return tuple(pid for pid in ids if pid in _DETECTABLE_BREAK_IDS)
+
+def _template_fields(*templates):
+    """Nomes usados nos textos de uma regra ({nome}, {nome.atributo} ou {nome[índice]})."""
+    fields = (field for template in templates for _, field, _, _ in string.Formatter().parse(template) if field)
+    return dict.fromkeys(re.match(r'[^.\[]*', field).group() for field in fields)
+
+def _parse_rule(spec):
+    """Valida uma regra (dict) e a converte em Rule."""
+    name = spec.get('name', '?')
+    bets = tuple(spec['bets'])
+    if not bets or any(bet not in _BET_TARGETS for bet in bets):
+        raise ValueError(f"Regra '{name}': apostas inválidas {bets}")
+    conditions = []
+    for metric, op, value in spec.get('conditions', ()):
+        if op not in _OPERATORS:
+            raise ValueError(f"Regra '{name}': operador desconhecido {op!r}")
+        conditions.append((RULE_METRICS.get(metric, _unknown_metric), _OPERATORS[op], value))
+    reason = spec.get('reason', '')
+    guarantee = spec.get('guarantee', name)
+    colors = spec.get('colors')
+    previous = spec.get('previous')
+    for color in (colors or []) + ([previous] if previous else []):
+        if color not in COLORS:
+            raise ValueError(f"Regra '{name}': cor desconhecida {color!r}")
+    return Rule(
+        name=name,
+        colors=frozenset(COLORS.index(c) for c in colors) if colors else frozenset(range(3)),
+        previous=COLORS.index(previous) if previous else None,
+        min_streak=spec.get('min_streak', 0),
+        max_streak=spec.get('max_streak'),
+        pattern_ids=_pattern_ids(spec['pattern']) if spec.get('pattern') else None,
+        min_count=spec.get('min_count', 1),
+        conditions=tuple(conditions),
+        bets=bets,
+        score=spec['score'],
+        reason=reason,
+        guarantee=guarantee,
+        fields=tuple(field for field in _template_fields(reason, guarantee) if field in RULE_METRICS),
+    )
+
+class RuleEngine:
+    """
+    Regras compiladas num índice por (cor do último resultado, cor do
+    penúltimo, faixa da sequência atual): cada entrada guarda só as regras
+    que podem valer ali, as de padrão agrupadas pelo id do padrão. As faixas
+    vêm dos limites min_streak/max_streak de todas as regras.
+    """
+
+    def __init__(self, rules):
+        self.specs = copy.deepcopy(list(rules))  # As regras como foram dadas, para comparar com DEFAULT_RULES
+        self.rules = [_parse_rule(rule) for rule in self.specs]
+        bounds = {rule.min_streak for rule in self.rules}
+        bounds |= {rule.max_streak + 1 for rule in self.rules if rule.max_streak is not None}
+        self._bounds = sorted(bounds)
+        self._index = {}
+        for color, previous in itertools.product(range(3), repeat=2):
+            for bucket in range(len(self._bounds) + 1):
+                streak = self._bounds[bucket - 1] if bucket else -1  # Menor sequência da faixa
+                plain, by_pattern = [], collections.defaultdict(list)
+                for rule in self.rules:
+                    if color not in rule.colors or streak < rule.min_streak:
+                        continue
+                    if rule.previous is not None and rule.previous != previous:
+                        continue
+                    if rule.max_streak is not None and streak > rule.max_streak:
+                        continue
+                    if rule.pattern_ids is None:
+                        plain.append(rule)
+                    else:
+                        for pid in rule.pattern_ids:
+                            by_pattern[pid].append(rule)
+                self._index[color, previous, bucket] = (tuple(plain), tuple((pid, pattern_label(pid), tuple(rules))
+                                                                  for pid, rules in by_pattern.items()))
+
+    def candidates(self, color, previous, streak):
+        """(regras simples, ((id do padrão, texto, regras), ...)) que podem valer nesta rodada."""
+        return self._index[color, previous, bisect.bisect_right(self._bounds, streak)]
+
+def load_rule_set(path):
+    """Lê um conjunto de regras em JSON (lista no formato de DEFAULT_RULES)."""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+# Conjunto de regras em JSON no lugar de DEFAULT_RULES (pode ser trocado pela variável de ambiente)
+RULES_PATH = os.environ.get('FOOTBALL_STUDIO_RULES')
+RULE_ENGINE = RuleEngine(load_rule_set(RULES_PATH) if RULES_PATH else DEFAULT_RULES)
+
+def uses_default_rules(engine=None):
+    """Se as regras ativas (ou as de `engine`) são as de DEFAULT_RULES."""
+    return (engine or RULE_ENGINE).specs == DEFAULT_RULES
+
+def set_rule_set(rules):
+    """Troca as regras ativas (lista de dicts) e descarta as análises em cache."""
+    global RULE_ENGINE
+    RULE_ENGINE = RuleEngine(rules)
+    ANALYSIS_CACHE.clear()
+
+def _rule_texts(rule, inputs, extra):
+    """(motivo, garantia) da regra com as métricas desta rodada; as indisponíveis ficam de fora, como antes."""
+    values = []
+    for field in rule.fields:
+        value = RULE_METRICS[field](inputs)
+        if value is not None:
+            values.append((field, type(value), value))
+    if extra:
+        values.extend((field, type(value), value) for field, value in extra.items())
+    return _format_rule_texts(rule.reason, rule.guarantee, tuple(values))
+
+# Os valores das métricas se repetem muito entre rodadas: os textos prontos
+# são reaproveitados (o tipo entra na chave porque 1, 1.0 e True se confundem)
+@functools.lru_cache(maxsize=4096)
+def _format_rule_texts(reason, guarantee, values):
+    text = {field: value for field, _, value in values}
+    return reason.format_map(text), guarantee.format_map(text)
+
+def _rule_matches(rule, inputs):
+    for metric, op, value in rule.conditions:
+        current = metric(inputs)
+        if current is None or not op(current, value):
+            return False
+    return True
+
+def generate_advanced_suggestion(results, surf_analysis, color_analysis, break_patterns, break_probability, draw_specifics,
+                                 long_window=None, markov=None, engine=None):
+    """
+    Gera uma sugestão de aposta baseada em múltiplas análises usando um sistema de pontuação,
+    com foco em segurança e incorporando os novos padrões. As regras e pontuações
+    vêm de `engine` ou, por padrão, de RULE_ENGINE (DEFAULT_RULES ou o conjunto de `set_rule_set`).
+    `long_window` (WindowStats de uma janela maior) ativa a comparação entre janelas e
+    `markov` (MarkovSignal do contexto atual) o sinal de transições do histórico.
+    """
+    if not results or len(results) < MIN_RESULTS_FOR_SUGGESTION: 
+        return {'suggestion': WAITING_SUGGESTION, 'confidence': 0, 'reason': '', 'guarantee_pattern': 'N/A', 'bet_type': 'none'}
+
+    color = RESULT_CODES[results[0]]
+    previous = RESULT_CODES[results[1]]
+    current_streak = color_analysis['streak']
+    inputs = _RuleInputs(results, color, current_streak, surf_analysis, color_analysis, break_probability,
+                         draw_specifics, long_window, markov, {})
+
+    plain, by_pattern = (engine or RULE_ENGINE).candidates(color, previous, current_streak)
+    matched = []
+    for rule in plain:
+        for metric, op, value in rule.conditions:
+            current = metric(inputs)
+            if current is None or not op(current, value):
+                break
+        else:
+            matched.append((rule, None))
+    for pid, label, rules in by_pattern:
+        count = break_patterns[pid]
+        if not count:
+            continue
+        for rule in rules:
+            if count >= rule.min_count and _rule_matches(rule, inputs):
+                matched.append((rule, {'count': count, 'pattern': label}))
+
+    bet_scores = {'home': 0, 'away': 0, 'draw': 0}
+    fired = []  # (aposta, regra, métricas do padrão): os textos só são montados para a aposta escolhida
+    for rule, extra in matched:
+        for bet in rule.bets:
+            if bet == 'opposite':
+                bet = 'away' if color == RED else 'home'
+            elif bet == 'markov':
+                bet = RULE_METRICS['markov_bet'](inputs)
+            bet_scores[bet] += rule.score
+            fired.append((bet, rule, extra))
+
+    # --- Determinar a Melhor Sugestão ---
+    max_score = 0
+    best_bet_type = 'none'
+
+    for bet_type, score in bet_scores.items():
+        if score > max_score:
+            max_score = score
+            best_bet_type = bet_type
+        elif score == max_score and best_bet_type == 'draw' and bet_type != 'draw':
+            best_bet_type = bet_type
+
+    final_suggestion = NO_BET_SUGGESTION
+    final_confidence = 50
+    final_reason = "Nenhum padrão de 'garantia' forte detectado nos últimos 27 resultados para uma aposta segura no momento."
+    final_guarantee = "Nenhum Padrão Forte"
+    
+    if best_bet_type != 'none' and max_score > 0:
+        final_confidence = min(100, max_score)
+        final_suggestion = BET_SUGGESTIONS[best_bet_type]
+
+        reasons, guarantees = set(), set()
+        for bet, rule, extra in fired:
+            if bet == best_bet_type:
+                reason, guarantee = _rule_texts(rule, inputs, extra)
+                reasons.add(reason)
+                guarantees.add(guarantee)
+        final_reason = ". ".join(sorted(reasons))
+        final_guarantee = " | ".join(sorted(guarantees))
+        if not final_reason:
+            final_reason = "Padrões identificados indicam alta probabilidade."
+        if not final_guarantee:
+            final_guarantee = "Padrão de pontuação geral."
+
+
+    return {
+        'suggestion': final_suggestion, 
+        'confidence': round(final_confidence), 
+        'reason': final_reason,
+        'guarantee_pattern': final_guarantee,
+        'bet_type': best_bet_type
+    }
+
+
+def update_analysis(results):
+    """Coordena todas as análises e retorna os resultados consolidados."""
+    
+    scan = scan_window(results) # Uma única passada pelos últimos N resultados
+    stats = {'home': scan.color_counts[RED], 
+             'away': scan.color_counts[BLUE], 
+             'draw': scan.color_counts[YELLOW], 
+             'total': len(scan.codes)}
+    
+    surf_analysis = analyze_surf(results) 
+    color_analysis = analyze_colors(results, scan)
+    break_patterns = find_complex_patterns(results, scan)
+    break_probability = analyze_break_probability(results, scan)
+    draw_specifics = analyze_draw_specifics(results, scan) 
+
+    suggestion_data = generate_advanced_suggestion(results, surf_analysis, color_analysis, break_patterns, break_probability, draw_specifics)
+    
+    return {
+        'stats': stats,
+        'surf_analysis': surf_analysis,
+        'color_analysis': color_analysis,
+        'break_patterns': break_patterns,
+        'break_probability': break_probability,
+        'draw_specifics': draw_specifics, 
+        'suggestion': suggestion_data
+    }
+
+# --- Cache de Análises ---
+
+# Módulo da impressão digital da janela: 27 dígitos em base 3
+_WINDOW_MODULUS = 3 ** NUM_RECENT_RESULTS_FOR_ANALYSIS
+
+class AnalysisCache:
+    """
+    Cache LRU de análises consolidadas, com contadores de acertos e falhas.
+    É seguro entre threads, então uma única instância (ANALYSIS_CACHE) atende
+    todas as sessões do mesmo processo. Os valores guardados são compartilhados
+    e não devem ser modificados por quem os recebe.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+        }
+
+ANALYSIS_CACHE = AnalysisCache()
+
+# --- Análise Incremental ---
+
+class IncrementalAnalyzer:
+    """
+    Mantém o estado da análise e o atualiza a cada novo resultado, sem
+    recalcular todo o histórico. Cada rodada custa O(1): só os trechos de até
+    6 cores que entram pelo topo ou saem pelo fim dos últimos N resultados são
+    contabilizados. `analysis()` retorna o mesmo formato de `update_analysis`.
+    `undo()` desfaz as últimas UNDO_DEPTH rodadas, também em O(1) cada.
+
+    As somas acumuladas (`prefix`) e o índice de transições (`markov`), usados
+    só pelas opções de `analysis()` e pelos painéis, são montados do histórico
+    no primeiro uso; até lá a sessão não guarda nenhum dos dois.
+    """
+
+    __slots__ = ('rounds', 'size', 'window', 'fingerprint', 'counts', 'breaks', 'break_patterns',
+                 'draw_patterns', 'time_since_last_draw', 'history', 'runs', '_prefix', '_markov', 'deltas')
+
+    def __init__(self):
+        self.rounds = 0  # Total de resultados já recebidos
+        self.size = 0    # Resultados no histórico armazenado (até MAX_HISTORY_TO_STORE)
+        self.window = bytearray()  # Códigos dos últimos N resultados, mais recente primeiro
+        self.fingerprint = 0  # Janela em base 3, resultado mais recente no dígito menos significativo
+        self.counts = [0, 0, 0]  # Casa, visitante e empate na janela
+        self.breaks = 0  # Pares adjacentes de cores diferentes na janela
+        self.break_patterns = PatternCounts()
+        self.draw_patterns = PatternCounts()
+        self.time_since_last_draw = -1
+        self.history = HistoryBuffer()  # Histórico armazenado
+        self.runs = RunLengths()  # Sequências do histórico armazenado, com os máximos por resultado
+        self._prefix = None  # PrefixCounts, montado por `prefix`
+        self._markov = None  # MarkovIndex, montado por `markov`
+        self.deltas = RoundDeltas()  # Para desfazer as últimas rodadas
+
+    @classmethod
+    def from_results(cls, results):
+        """Constrói o analisador a partir de um histórico (mais recente primeiro)."""
+        analyzer = cls()
+        for result in reversed(results[:MAX_HISTORY_TO_STORE]):
+            analyzer.push(result)
+        return analyzer
+
+    @classmethod
+    def from_codes(cls, codes):
+        """
+        Constrói o analisador a partir de códigos (bytes, do mais antigo ao
+        mais recente). Até UNDO_DEPTH códigos além do histórico armazenado
+        também passam pelo analisador, para que desfazer as últimas rodadas
+        devolva ao histórico os que elas tiraram.
+        """
+        analyzer = cls()
+        for code in codes[-(MAX_HISTORY_TO_STORE + UNDO_DEPTH):]:
+            analyzer.push(RESULT_TYPES[code])
+        return analyzer
+
+    @property
+    def prefix(self):
+        """PrefixCounts do histórico: contagens de qualquer janela em O(1)."""
+        if self._prefix is None:
+            self._prefix = PrefixCounts(codes=self.history.codes()[::-1])
+        return self._prefix
+
+    @property
+    def markov(self):
+        """MarkovIndex do histórico: o que veio depois de cada contexto."""
+        if self._markov is None:
+            self._markov = MarkovIndex(self.history)
+        return self._markov
+
+    @property
+    def undo_depth(self):
+        """Quantas das últimas rodadas `undo` ainda pode desfazer."""
+        return len(self.deltas)
+
+    def _window_code(self, start, width):
+        """Código em base 3 do trecho da janela [start, start + width)."""
+        code = 0
+        for j in range(start, start + width):
+            code = code * 3 + self.window[j]
+        return code
+
+    def _evict_from_window(self):
+        """Remove o resultado mais antigo da janela e os padrões que terminam nele."""
+        last = len(self.window) - 1
+        for width in _NGRAM_WIDTHS:
+            if last - width + 1 >= 0:
+                break_ids, draw_ids = _EXACT_NGRAMS[width][self._window_code(last - width + 1, width)]
+                for pid in break_ids:
+                    self.break_patterns.add(pid, -1)
+                for pid in draw_ids:
+                    self.draw_patterns.add(pid, -1)
+        if last >= 1 and self.window[last] != self.window[last - 1]:
+            self.breaks -= 1
+        self.counts[self.window.pop()] -= 1
+
+    def _restore_to_window(self, code):
+        """Devolve `code` ao fim da janela com os padrões que terminam nele (inverso de `_evict_from_window`)."""
+        self.window.append(code)
+        self.counts[code] += 1
+        last = len(self.window) - 1
+        self.fingerprint += code * 3 ** last
+        for width in _NGRAM_WIDTHS:
+            if last - width + 1 >= 0:
+                break_ids, draw_ids = _EXACT_NGRAMS[width][self._window_code(last - width + 1, width)]
+                for pid in break_ids:
+                    self.break_patterns.add(pid)
+                for pid in draw_ids:
+                    self.draw_patterns.add(pid)
+        if last >= 1 and self.window[last] != self.window[last - 1]:
+            self.breaks += 1
+
+    def push(self, result):
+        """Registra um novo resultado ('home', 'away' ou 'draw')."""
+        self.deltas.push(self.history.code_at(-1) if self.size == MAX_HISTORY_TO_STORE else None,
+                         self.time_since_last_draw)
+        if len(self.window) == NUM_RECENT_RESULTS_FOR_ANALYSIS:
+            self._evict_from_window()
+        if self.size == MAX_HISTORY_TO_STORE:
+            self.size -= 1
+
+        code = RESULT_CODES[result]
+        if self._prefix is not None:
+            self._prefix.push(code)
+        if self._markov is not None:
+            self._markov.push(code)
+        self.history.append(result)
+        self.runs.push(code)
+        self.window.insert(0, code)
+        self.counts[code] += 1
+        # O módulo descarta o dígito do resultado que acabou de sair da janela
+        self.fingerprint = (self.fingerprint * 3 + code) % _WINDOW_MODULUS
+        # Padrões que começam no novo resultado, pela mesma tabela de scan_window
+        length = min(len(self.window), _MAX_NGRAM)
+        break_ids, draw_ids, is_break = _PREFIX_NGRAMS[length][self._window_code(0, length)]
+        for pid in break_ids:
+            self.break_patterns.add(pid)
+        for pid in draw_ids:
+            self.draw_patterns.add(pid)
+        self.breaks += is_break
+
+        self.rounds += 1
+        self.size += 1
+
+        if result == 'draw':
+            self.time_since_last_draw = 0
+        elif self.time_since_last_draw >= 0:
+            self.time_since_last_draw += 1
+            if self.time_since_last_draw >= self.size:
+                self.time_since_last_draw = -1  # O último empate saiu do histórico
+
+    def undo(self):
+        """
+        Desfaz o último `push` e retorna o resultado removido. Cada contador
+        faz a operação inversa (os padrões que começavam no resultado saem, o
+        que tinha saído da janela e do histórico volta ao fim), então custa o
+        mesmo que um `push`, qualquer que seja o tamanho do histórico.
+        """
+        evicted, gap = self.deltas.pop()
+        length = min(len(self.window), _MAX_NGRAM)
+        break_ids, draw_ids, is_break = _PREFIX_NGRAMS[length][self._window_code(0, length)]
+        for pid in break_ids:
+            self.break_patterns.add(pid, -1)
+        for pid in draw_ids:
+            self.draw_patterns.add(pid, -1)
+        self.breaks -= is_break
+        code = self.window.pop(0)
+        self.counts[code] -= 1
+        self.fingerprint //= 3
+        if len(self.history) > NUM_RECENT_RESULTS_FOR_ANALYSIS:
+            self._restore_to_window(self.history.code_at(NUM_RECENT_RESULTS_FOR_ANALYSIS))
+
+        self.history.pop(evicted)
+        if self._prefix is not None:
+            self._prefix.pop(evicted)
+        if self._markov is not None:
+            self._markov.pop(code, evicted)
+        self.runs.pop(evicted)
+        self.rounds -= 1
+        if evicted is None:
+            self.size -= 1
+        self.time_since_last_draw = gap
+        return RESULT_TYPES[code]
+
+    def cache_key(self):
+        """
+        Tudo de que `analysis()` depende: a janela (tamanho e impressão digital)
+        e os poucos valores do histórico completo (sequência atual, máximos e
+        rodadas sem empate).
+        """
+        runs = self.runs
+        return (len(self.window), self.fingerprint, runs.streak,
+                runs.max_length(RED), runs.max_length(BLUE), runs.max_length(YELLOW),
+                self.time_since_last_draw)
+
+    def window_stats(self, sizes=MULTI_WINDOWS):
+        """{tamanho: WindowStats} das janelas pedidas, cada uma em O(1)."""
+        return self.prefix.windows(sizes)
+
+    def analysis(self, cache=ANALYSIS_CACHE, long_window=None, markov=False):
+        """
+        Retorna a análise consolidada no mesmo formato de `update_analysis`.
+        Janelas já vistas (em qualquer sessão) custam uma consulta ao cache;
+        passe `cache=None` para sempre recalcular. Com `long_window` (tamanho de
+        uma janela maior) a sugestão também compara a janela curta com ela, e
+        com `markov=True` pontua o que veio depois do contexto atual.
+        """
+        stats = self.prefix.window(long_window) if long_window else None
+        signal = self.markov.signal() if markov else None
+        if cache is None:
+            return self._compute_analysis(stats, signal)
+        key = self.cache_key()
+        if stats is not None:
+            key += ('window',) + tuple(stats)
+        if signal is not None:
+            key += ('markov', signal.order, signal.context) + signal.counts
+        analysis = cache.get(key)
+        if analysis is None:
+            analysis = self._compute_analysis(stats, signal)
+            cache.put(key, analysis)
+        return analysis
+
+    def _compute_analysis(self, long_window=None, markov=None):
+        codes = bytes(self.window)
+        window = [RESULT_TYPES[code] for code in codes]
+        total = len(window)
+        streak = self.runs.streak
+        current = window[0] if window else ''
+
+        surf_analysis = {
+            'home_sequence': min(streak, total) if current == 'home' else 0,
+            'away_sequence': min(streak, total) if current == 'away' else 0,
+            'draw_sequence': min(streak, total) if current == 'draw' else 0,
+            'max_home_sequence': self.runs.max_length(RED),
+            'max_away_sequence': self.runs.max_length(BLUE),
+            'max_draw_sequence': self.runs.max_length(YELLOW)
+        }
+
+        if window:
+            color_analysis = {
+                'red': self.counts[RED],
+                'blue': self.counts[BLUE],
+                'yellow': self.counts[YELLOW],
+                'current_color': get_color(current),
+                'streak': streak,
+                'color_pattern_27': codes.translate(_COLOR_INITIALS).decode()
+            }
+        else:
+            color_analysis = {'red': 0, 'blue': 0, 'yellow': 0, 'current_color': '', 'streak': 0, 'color_pattern_27': ''}
+
+        break_patterns = self.break_patterns.copy()
+        for pid in _block_pattern_ids(codes[:12]):
+            break_patterns.add(pid)
+
+        if total < 2:
+            break_probability = {'break_chance': 0, 'last_break_type': ''}
+        else:
+            last_break_type = ""
+            if get_color(window[0]) != get_color(window[1]):
+                last_break_type = f"Quebrou de {get_color(window[1]).capitalize()} {get_color_emoji(get_color(window[1]))} para {get_color(window[0]).capitalize()} {get_color_emoji(get_color(window[0]))}"
+            break_probability = {
+                'break_chance': round((self.breaks / (total - 1)) * 100, 2),
+                'last_break_type': last_break_type
+            }
+
+        if window:
+            draw_specifics = {
+                'draw_frequency_27': round((self.counts[YELLOW] / total) * 100, 2),
+                'time_since_last_draw': self.time_since_last_draw,
+                'draw_patterns': self.draw_patterns.copy(),
+                # analyze_draw_specifics mede o intervalo com índices crescentes
+                # (sempre negativo), então nunca marca empate recorrente.
+                'recurrent_draw': False
+            }
+        else:
+            draw_specifics = {'draw_frequency_27': 0, 'time_since_last_draw': -1, 'draw_patterns': PatternCounts(), 'recurrent_draw': False}
+
+        suggestion_data = generate_advanced_suggestion(window, surf_analysis, color_analysis, break_patterns, break_probability, draw_specifics,
+                                                       long_window, markov)
+
+        return {
+            'stats': {'home': self.counts[RED], 'away': self.counts[BLUE], 'draw': self.counts[YELLOW], 'total': total},
+            'surf_analysis': surf_analysis,
+            'color_analysis': color_analysis,
+            'break_patterns': break_patterns,
+            'break_probability': break_probability,
+            'draw_specifics': draw_specifics,
+            'suggestion': suggestion_data
+        }
+
+# --- Função de Verificação de Garantia ---
+def check_guarantee_status(suggested_bet_type, actual_result, guarantee_pattern):
+    """
+    Verifica se a aposta sugerida anteriormente (com base no padrão de garantia)
+    foi bem-sucedida ou falhou.
+    """
+    if suggested_bet_type == 'none':
+        return True
+
+    if suggested_bet_type == 'draw' and actual_result != 'draw':
+        return False
+    elif suggested_bet_type in ['home', 'away'] and actual_result != suggested_bet_type:
+        return False
+    
+    return True
+
+# --- Linha de Comando ---
+
+def read_results(path):
+    """Lê um resultado por linha ('home', 'away' ou 'draw'), mais antigo primeiro."""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+def _printable(analysis):
+    """Análise com os contadores de padrões convertidos para texto."""
+    printable = dict(analysis)
+    printable['break_patterns'] = analysis['break_patterns'].labels()
+    printable['draw_specifics'] = dict(analysis['draw_specifics'])
+    printable['draw_specifics']['draw_patterns'] = analysis['draw_specifics']['draw_patterns'].labels()
+    return printable
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analisa um arquivo de resultados sem abrir o navegador.")
+    parser.add_argument('path', help="Arquivo com um resultado por linha, mais antigo primeiro")
+    parser.add_argument('--json', action='store_true', help="Imprime a análise completa em JSON")
+    args = parser.parse_args(argv)
+
+    results = HistoryBuffer()
+    for result in read_results(args.path):
+        results.append(result)
+    analysis = _printable(update_analysis(results))
+
+    if args.json:
+        print(json.dumps(analysis, ensure_ascii=False, indent=2))
+        return 0
+
+    suggestion = analysis['suggestion']
+    stats = analysis['stats']
+    print(f"Resultados armazenados: {len(results)}")
+    print(f"Últimos {stats['total']}: Casa {stats['home']} | Visitante {stats['away']} | Empate {stats['draw']}")
+    print(f"Sugestão: {suggestion['suggestion'].replace('**', '')} (confiança {suggestion['confidence']}%)")
+    print(f"Motivo: {suggestion['reason']}")
+    print(f"Padrão de Garantia: {suggestion['guarantee_pattern']}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
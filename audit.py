@@ -0,0 +1,278 @@
+"""
+Registro das sugestões de alta confiança e de como cada uma terminou.
+
+Cada sugestão acompanhada (aposta diferente de 'none' e confiança >= 70,
+a mesma regra de `add_result`) entra num log circular de tamanho fixo com
+o resultado seguinte e o veredito de `check_guarantee_status`. Contadores
+de acertos e erros por padrão de garantia, tipo de aposta e faixa de
+confiança são atualizados a cada registro em O(1), em janelas móveis das
+últimas 50 e 200 sugestões e no total: quando uma sugestão sai de uma janela,
+só as chaves dela são descontadas. A tela lê os contadores, sem percorrer o log.
+
+As garantias compostas ("A | B") contam para cada padrão que as formou.
+Cada registro guarda a rodada a que respondeu, então desfazer uma rodada
+(`undo_rounds`) também desfaz o registro dela, e corrigir um resultado
+(`replace_round`) registra de novo as sugestões das rodadas seguintes.
+`record_round` é o registro de um resultado usado pela página e pelas mesas.
+
+Uso: python audit.py resultados.txt [--window 200]
+"""
+import argparse
+import array
+import sys
+
+from analysis_core import (
+    RESULT_CODES,
+    RESULT_TYPES,
+    UNDO_DEPTH,
+    IncrementalAnalyzer,
+    check_guarantee_status,
+    read_results,
+)
+
+AUDIT_CAPACITY = 1000  # Sugestões guardadas no log (>= a maior janela)
+AUDIT_WINDOWS = (50, 200)  # Janelas móveis; None = todas as sugestões registradas
+TRACKED_CONFIDENCE = 70
+CONFIDENCE_BANDS = ((100, '100'), (90, '90-99'), (80, '80-89'), (TRACKED_CONFIDENCE, '70-79'))
+KINDS = ('pattern', 'bet', 'band')
+
+def confidence_band(confidence):
+    """Faixa de confiança exibida (ex.: '80-89')."""
+    for lower, label in CONFIDENCE_BANDS:
+        if confidence >= lower:
+            return label
+    return f'<{TRACKED_CONFIDENCE}'
+
+def is_tracked(bet_type, confidence):
+    return bet_type != 'none' and confidence >= TRACKED_CONFIDENCE
+
+class AuditTrail:
+    """
+    Log circular das últimas `capacity` sugestões acompanhadas (arrays de um
+    byte por campo e um código por garantia) e os contadores por janela.
+    Um único escritor; as leituras copiam os itens antes de percorrê-los,
+    então podem vir de outra thread (ex.: a página lendo a ingestão).
+    """
+
+    __slots__ = ('capacity', 'windows', 'recorded', '_bets', '_results', '_confidences', '_hits',
+                 '_guarantees', '_rounds', '_guarantee_ids', '_guarantee_texts', '_keys', '_counts')
+
+    def __init__(self, capacity=AUDIT_CAPACITY, windows=AUDIT_WINDOWS):
+        # Ao desfazer, as entradas que voltam às janelas ainda precisam estar no log
+        if any(window + UNDO_DEPTH > capacity for window in windows):
+            raise ValueError("As janelas mais as rodadas que podem ser desfeitas não cabem no log")
+        self.capacity = capacity
+        self.windows = tuple(windows)
+        self.recorded = 0  # Sugestões registradas desde o início
+        self._bets = bytearray(capacity)
+        self._results = bytearray(capacity)
+        self._confidences = bytearray(capacity)
+        self._hits = bytearray(capacity)
+        self._guarantees = array.array('H', bytes(2 * capacity))
+        self._rounds = array.array('I', bytes(4 * capacity))  # Rodada a que cada sugestão respondeu
+        self._guarantee_ids = {}  # Texto da garantia -> código
+        self._guarantee_texts = []
+        self._keys = []  # Por código de garantia: as chaves (tipo, valor) sem a aposta e a faixa
+        # Por janela (None = total): {(tipo, valor): [acertos, erros]}
+        self._counts = {window: {} for window in self.windows + (None,)}
+
+    def __len__(self):
+        return min(self.recorded, self.capacity)
+
+    def _guarantee_code(self, guarantee_pattern):
+        code = self._guarantee_ids.get(guarantee_pattern)
+        if code is None:
+            code = self._guarantee_ids[guarantee_pattern] = len(self._guarantee_texts)
+            self._guarantee_texts.append(guarantee_pattern)
+            self._keys.append(tuple(('pattern', part) for part in dict.fromkeys(guarantee_pattern.split(' | '))))
+        return code
+
+    def _entry_keys(self, slot):
+        return self._keys[self._guarantees[slot]] + (
+            ('bet', RESULT_TYPES[self._bets[slot]]), ('band', confidence_band(self._confidences[slot])))
+
+    def _count(self, window, keys, hit, delta):
+        counts = self._counts[window]
+        column = 0 if hit else 1
+        for key in keys:
+            pair = counts.get(key)
+            if pair is None:
+                pair = counts[key] = [0, 0]
+            pair[column] += delta
+            if pair == [0, 0]:
+                del counts[key]
+
+    def record(self, bet_type, guarantee_pattern, confidence, result, round_number=0):
+        """
+        Registra uma sugestão acompanhada e o resultado que veio (a rodada
+        `round_number` do analisador); retorna se acertou.
+        """
+        hit = check_guarantee_status(bet_type, result, guarantee_pattern)
+        # Sugestões que saem de cada janela com esta entrada
+        for window in self.windows:
+            if self.recorded >= window:
+                old = (self.recorded - window) % self.capacity
+                self._count(window, self._entry_keys(old), self._hits[old], -1)
+        slot = self.recorded % self.capacity
+        self._bets[slot] = RESULT_CODES[bet_type]
+        self._results[slot] = RESULT_CODES[result]
+        self._confidences[slot] = confidence
+        self._hits[slot] = hit
+        self._guarantees[slot] = self._guarantee_code(guarantee_pattern)
+        self._rounds[slot] = round_number
+        self.recorded += 1
+        keys = self._entry_keys(slot)
+        for window in self._counts:
+            self._count(window, keys, hit, 1)
+        return hit
+
+    def observe(self, bet_type, guarantee_pattern, confidence, result, round_number=0):
+        """Como `record`, mas só para sugestões acompanhadas; retorna se acertou (ou None)."""
+        if not is_tracked(bet_type, confidence):
+            return None
+        return self.record(bet_type, guarantee_pattern, confidence, result, round_number)
+
+    def _last_slot(self, round_number):
+        """Posição do último registro, se ele for da rodada `round_number`; senão None."""
+        if not self.recorded:
+            return None
+        slot = (self.recorded - 1) % self.capacity
+        return slot if self._rounds[slot] == round_number else None
+
+    def undo(self, round_number):
+        """
+        Desfaz o registro da rodada `round_number`, se for o último; é o
+        inverso de `record`, também O(1): as entradas que tinham saído das
+        janelas voltam. Retorna se havia registro.
+        """
+        slot = self._last_slot(round_number)
+        if slot is None:
+            return False
+        self.recorded -= 1
+        keys = self._entry_keys(slot)
+        for window in self._counts:
+            self._count(window, keys, self._hits[slot], -1)
+        for window in self.windows:
+            if self.recorded >= window:
+                old = (self.recorded - window) % self.capacity
+                self._count(window, self._entry_keys(old), self._hits[old], 1)
+        return True
+
+    def hit_at(self, round_number):
+        """Se a sugestão da rodada `round_number` acertou, quando ela é o último registro; senão None."""
+        slot = self._last_slot(round_number)
+        return None if slot is None else bool(self._hits[slot])
+
+    def stats(self, kind, window=None):
+        """
+        [{kind, acertos, erros, total, taxa}] das chaves de `kind` ('pattern',
+        'bet' ou 'band') na janela (None = todas), mais sugeridas primeiro.
+        """
+        rows = [{kind: value, 'acertos': hits, 'erros': misses, 'total': hits + misses,
+                 'taxa': round(hits / (hits + misses) * 100, 1)}
+                for (key_kind, value), (hits, misses) in list(self._counts[window].items()) if key_kind == kind]
+        rows.sort(key=lambda row: (-row['total'], -row['taxa']))
+        return rows
+
+    def summary(self, window=None):
+        """(acertos, total) de todas as sugestões da janela."""
+        hits = misses = 0
+        for (kind, _), (h, m) in list(self._counts[window].items()):
+            if kind == 'bet':
+                hits += h
+                misses += m
+        return hits, hits + misses
+
+    def recent(self, count=10):
+        """Últimas sugestões registradas, a mais recente primeiro."""
+        rows = []
+        for n in range(self.recorded - 1, max(self.recorded - count, self.recorded - self.capacity, 0) - 1, -1):
+            slot = n % self.capacity
+            rows.append({'sugestão': n + 1, 'aposta': RESULT_TYPES[self._bets[slot]],
+                         'confiança': self._confidences[slot],
+                         'garantia': self._guarantee_texts[self._guarantees[slot]],
+                         'resultado': RESULT_TYPES[self._results[slot]], 'acertou': bool(self._hits[slot])})
+        return rows
+
+# --- Correções ---
+
+def undo_rounds(analyzer, audit, count=1):
+    """
+    Desfaz os `count` últimos resultados do analisador e os registros das
+    sugestões que eles responderam, cada um em O(1). Retorna os resultados
+    removidos, do mais recente ao mais antigo.
+    """
+    removed = []
+    for _ in range(count):
+        audit.undo(analyzer.rounds)
+        removed.append(analyzer.undo())
+    return removed
+
+def record_round(analyzer, audit, suggestion, result, **options):
+    """
+    Registra um resultado como a entrada manual (`add_result` do adm.py, as
+    mesas de tables.py): a sugestão exibida antes dele vai para o registro, se
+    acompanhada, e o resultado entra no analisador. Retorna se acertou (ou
+    None) e a análise nova (`options` vão para `IncrementalAnalyzer.analysis`).
+    """
+    hit = audit.observe(suggestion['bet_type'], suggestion['guarantee_pattern'], suggestion['confidence'],
+                        result, analyzer.rounds + 1)
+    analyzer.push(result)
+    return hit, analyzer.analysis(**options)
+
+def replay_rounds(analyzer, audit, results, **options):
+    """
+    Registra `results` (mais antigo primeiro) com `record_round`: cada um
+    responde à sugestão da análise anterior. Retorna se o último acertou a
+    sugestão acompanhada (ou None).
+    """
+    hit = None
+    suggestion = analyzer.analysis(**options)['suggestion']
+    for result in results:
+        hit, analysis = record_round(analyzer, audit, suggestion, result, **options)
+        suggestion = analysis['suggestion']
+    return hit
+
+def replace_round(analyzer, audit, index, result, **options):
+    """
+    Troca o resultado da posição `index` (0 = mais recente): desfaz até ele e
+    registra de novo o corrigido e os seguintes, O(index). Retorna o
+    resultado antigo e o acerto da última rodada, como `replay_rounds`.
+    """
+    removed = undo_rounds(analyzer, audit, index + 1)
+    return removed[-1], replay_rounds(analyzer, audit, [result] + removed[-2::-1], **options)
+
+def corrected_tail(analyzer, index, result):
+    """
+    Os `index + 1` códigos mais recentes (mais antigo primeiro) com o da
+    posição `index` trocado por `result`: o trecho que o log regrava ao
+    corrigir aquele resultado com `replace_round`.
+    """
+    codes = bytearray(analyzer.history[:index + 1].codes()[::-1])
+    codes[0] = RESULT_CODES[result]
+    return bytes(codes)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Acerto das sugestões acompanhadas por padrão, aposta e confiança.")
+    parser.add_argument('path', help="Arquivo com um resultado por linha, mais antigo primeiro")
+    parser.add_argument('--window', type=int, choices=AUDIT_WINDOWS, help="Só as últimas N sugestões (padrão: todas)")
+    args = parser.parse_args(argv)
+
+    trail = AuditTrail()
+    analyzer = IncrementalAnalyzer()
+    suggestion = analyzer.analysis()['suggestion']
+    for result in read_results(args.path):
+        trail.observe(suggestion['bet_type'], suggestion['guarantee_pattern'], suggestion['confidence'], result)
+        analyzer.push(result)
+        suggestion = analyzer.analysis()['suggestion']
+
+    hits, total = trail.summary(args.window)
+    print(f"{total} sugestões acompanhadas, {hits} acertos ({hits / total * 100 if total else 0:.1f}%)")
+    for kind, title in zip(KINDS, ("Padrão de garantia", "Aposta", "Confiança")):
+        print(f"\n{title}:")
+        for row in trail.stats(kind, args.window):
+            print(f"  {row['taxa']:5.1f}%  {row['acertos']:5}/{row['total']:<5}  {row[kind]}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,359 @@
+"""
+Backtest vetorizado das sugestões de `generate_advanced_suggestion`.
+
+Para cada rodada de uma sequência longa (ordem cronológica, mais antigo
+primeiro) calcula com NumPy a sugestão que `update_analysis` daria com o
+histórico até ali (com DEFAULT_RULES) e a confere com `check_guarantee_status`
+contra o resultado seguinte. Contagens da janela vêm de somas acumuladas,
+sequências de vetores de tamanho de sequência e os máximos de surf de uma
+tabela esparsa de máximos.
+
+As pontuações e os limites vêm de DEFAULT_RULES; o resto de cada regra
+(cores, métricas, operadores, apostas) tem de ser o que `suggest` vetoriza,
+senão ele levanta ValueError, como também quando as regras ativas não são
+DEFAULT_RULES (FOOTBALL_STUDIO_RULES ou `set_rule_set`).
+
+Uso: python backtest.py resultados.txt [--check N]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import analysis_core as core
+
+BET_NONE = 3  # Código de 'none'; 0/1/2 são casa/visitante/empate
+BET_TYPES = core.RESULT_TYPES + ('none',)
+
+# Faixas de confiança do relatório: (rótulo, mínimo, máximo)
+CONFIDENCE_BANDS = (('<70', 0, 69), ('70-79', 70, 79), ('80-89', 80, 89), ('90-99', 90, 99), ('100', 100, 100))
+
+# O que `suggest` vetoriza de cada regra de DEFAULT_RULES: tudo menos os
+# números (pontuação, limites das condições, min_streak, max_streak,
+# min_count), que são lidos da regra
+_RULE_SHAPES = {
+    'surf_max_red': {'colors': ['red'], 'conditions': [('surf_max', '>'), ('surf_gap', '>=')], 'bets': ['away']},
+    'surf_max_blue': {'colors': ['blue'], 'conditions': [('surf_max', '>'), ('surf_gap', '>=')], 'bets': ['home']},
+    'surf_max_yellow': {'colors': ['yellow'], 'conditions': [('surf_max', '>'), ('surf_gap', '>=')],
+                        'bets': ['home', 'away']},
+    'draw_delayed': {'conditions': [('time_since_last_draw', '>='), ('draw_frequency', '<')], 'bets': ['draw']},
+    'zig_zag_home': {'colors': ['blue'], 'previous': 'red', 'pattern': 'ZIG_ZAG', 'bets': ['home'],
+                     'guarantee': "{pattern}"},
+    'zig_zag_away': {'colors': ['red'], 'previous': 'blue', 'pattern': 'ZIG_ZAG', 'bets': ['away'],
+                     'guarantee': "{pattern}"},
+    'high_break_red': {'colors': ['red'], 'conditions': [('break_chance', '>')], 'bets': ['away']},
+    'high_break_blue': {'colors': ['blue'], 'conditions': [('break_chance', '>')], 'bets': ['home']},
+}
+_NUMBER_KEYS = ('score', 'min_streak', 'max_streak', 'min_count')
+# Regras que só valem com os sinais opcionais (janela longa, transições), que `suggest` não calcula
+_OPTIONAL_METRICS = frozenset(('window_gap', 'long_draw_gap', 'markov_samples', 'markov_share'))
+
+_MASK_WAITING = -1  # Menos de MIN_RESULTS_FOR_SUGGESTION resultados
+
+def _pct_table(offset):
+    """round(n / (janela - offset) * 100, 2) para cada janela até N e n, como nas métricas da análise."""
+    size = core.NUM_RECENT_RESULTS_FOR_ANALYSIS + 1
+    table = np.zeros((size, size))
+    for window in range(offset + 1, size):
+        for n in range(window + 1):
+            table[window, n] = round(n / (window - offset) * 100, 2)
+    return table
+
+_DRAW_FREQUENCY = _pct_table(0)  # draw_frequency por (janela, empates)
+_BREAK_CHANCE = _pct_table(1)  # break_chance por (janela, quebras)
+
+def _rule_params():
+    """
+    {nome: parâmetros} das regras de DEFAULT_RULES que `suggest` vetoriza.
+    ValueError se as regras ativas não são DEFAULT_RULES ou se uma regra
+    mudou de um jeito que `suggest` não reproduz.
+    """
+    if not core.uses_default_rules():
+        raise ValueError("backtest.suggest só reproduz DEFAULT_RULES, e as regras ativas são outras "
+                         "(FOOTBALL_STUDIO_RULES ou set_rule_set)")
+    rules = {rule['name']: rule for rule in core.DEFAULT_RULES}
+    params = {}
+    for name, rule in rules.items():
+        conditions = rule.get('conditions', ())
+        if name not in _RULE_SHAPES:
+            if not any(metric in _OPTIONAL_METRICS for metric, _, _ in conditions):
+                raise ValueError(f"backtest.suggest não reproduz a regra '{name}' de DEFAULT_RULES")
+            continue
+        shape = dict(_RULE_SHAPES[name], conditions=_RULE_SHAPES[name].get('conditions', []))
+        found = {key: value for key, value in rule.items()
+                 if key not in _NUMBER_KEYS + ('name', 'reason') and (key != 'guarantee' or 'guarantee' in shape)}
+        found['conditions'] = [(metric, op) for metric, op, _ in conditions]
+        if found != shape:
+            raise ValueError(f"A regra '{name}' de DEFAULT_RULES mudou e backtest.suggest não a reproduz: "
+                             f"{found} em vez de {shape}")
+        params[name] = {
+            'score': rule['score'],
+            'min_streak': rule.get('min_streak', 0),
+            'max_streak': rule.get('max_streak'),
+            'min_count': rule.get('min_count', 1),
+            'conditions': [(core._OPERATORS[op], value) for _, op, value in conditions],
+            'guarantee': rule.get('guarantee', name),
+        }
+    missing = set(_RULE_SHAPES) - set(params)
+    if missing:
+        raise ValueError(f"Regras que backtest.suggest reproduz e que saíram de DEFAULT_RULES: {sorted(missing)}")
+    if params['high_break_red']['guarantee'] != params['high_break_blue']['guarantee']:
+        raise ValueError("backtest.suggest espera o mesmo padrão de garantia nas regras high_break_*")
+    return params
+
+def _guarantee_atoms(params):
+    """Padrões de garantia que as regras podem gerar, um bit cada (surf, Zig-Zag, quebra geral, empate atrasado)."""
+    return ([params[f'surf_max_{color}']['guarantee'] for color in core.COLORS]
+            + [core.pattern_label(pid) for pid in core._ZIG_ZAG_IDS]
+            + [params['high_break_red']['guarantee'], params['draw_delayed']['guarantee']])
+
+_BIT_SURF = 0
+_BIT_ZIG_ZAG = 3
+_BIT_BREAK = _BIT_ZIG_ZAG + len(core._ZIG_ZAG_IDS)
+_BIT_DRAW_DELAYED = _BIT_BREAK + 1
+
+def _streak_allows(rule, streak):
+    """Rodadas em que a sequência atual está nos limites min_streak/max_streak da regra."""
+    allowed = streak >= rule['min_streak']
+    if rule['max_streak'] is not None:
+        allowed &= streak <= rule['max_streak']
+    return allowed
+
+def encode(results):
+    """Converte resultados ('home'/'away'/'draw' ou códigos 0/1/2) em um array uint8."""
+    if isinstance(results, np.ndarray):
+        return results.astype(np.uint8, copy=False)
+    if isinstance(results, (bytes, bytearray)):
+        return np.frombuffer(results, dtype=np.uint8)
+    return np.fromiter((core.RESULT_CODES.get(r, r) for r in results), dtype=np.uint8)
+
+def _window_sum(values, length):
+    """Soma de `values[t - length[t] + 1 .. t]` para cada t."""
+    csum = np.concatenate(([0], np.cumsum(values, dtype=np.int64)))
+    end = np.arange(1, len(values) + 1)
+    return csum[end] - csum[end - length]
+
+def _sparse_table(values, max_length):
+    """Níveis k com o máximo de `values[j .. j + 2^k - 1]`, até 2^k <= max_length."""
+    levels = [values]
+    span = 1
+    while span * 2 <= max_length:
+        prev = levels[-1]
+        level = prev.copy()
+        np.maximum(prev[:-span], prev[span:], out=level[:-span])
+        levels.append(level)
+        span *= 2
+    return np.stack(levels)
+
+def _range_max(table, lo, hi):
+    """Máximo de cada intervalo [lo, hi]; intervalos vazios (lo > hi) valem 0."""
+    empty = lo > hi
+    length = np.where(empty, 1, hi - lo + 1)
+    k = np.floor(np.log2(length)).astype(np.int64)
+    lo = np.where(empty, 0, lo)
+    hi = np.where(empty, 0, hi)
+    result = np.maximum(table[k, lo], table[k, hi - (1 << k) + 1])
+    return np.where(empty, 0, result)
+
+def suggest(codes, sequence_length=None):
+    """
+    Sugestão de cada rodada, como a daria `update_analysis` com o histórico até
+    ela (limitado a MAX_HISTORY_TO_STORE). Retorna arrays `bet` (0-3),
+    `confidence` e `guarantee` (índice em `guarantee_labels`).
+
+    Com `sequence_length`, `codes` são várias sequências independentes desse
+    tamanho, uma após a outra: cada uma começa com o histórico vazio.
+    """
+    params = _rule_params()
+    codes = encode(codes)
+    size = len(codes)
+    idx = np.arange(size)
+    # Posição na sequência: as janelas e o histórico nunca passam do início dela
+    position = idx if sequence_length is None else idx % sequence_length
+    history = np.minimum(position + 1, core.MAX_HISTORY_TO_STORE)
+    window = np.minimum(position + 1, core.NUM_RECENT_RESULTS_FOR_ANALYSIS)
+    color = codes.astype(np.int64)
+    previous = np.where(position == 0, BET_NONE, np.concatenate(([BET_NONE], color[:-1])))
+
+    # Sequências: início e fim da sequência de cada posição e tamanho até ela
+    is_start = color != previous
+    run_start = np.maximum.accumulate(np.where(is_start, idx, 0))
+    run_length = idx - run_start + 1
+    is_last = np.concatenate((position[1:] == 0, [True]))  # Última rodada de cada sequência
+    is_end = np.concatenate((color[1:] != color[:-1], [False])) | is_last
+    run_end = np.minimum.accumulate(np.where(is_end, idx, size - 1)[::-1])[::-1]
+    streak = np.minimum(run_length, history)
+
+    # Máximo de surf por cor no histórico armazenado: sequência atual, a
+    # primeira sequência (cortada no início do histórico) e as completas entre elas
+    first = idx - history + 1
+    first_is_current = run_start <= first
+    first_end = run_end[first]
+    first_clip = first_end - first + 1
+    ended = np.where(is_end, run_length, 0)
+    ended[is_last] = 0  # O fim da última rodada ainda não é conhecido
+    lo = first_end + 1
+    hi = np.where(first_is_current, -1, idx - 1)
+    max_sequence = []
+    for c in range(3):
+        table = _sparse_table(np.where(color == c, ended, 0).astype(np.int16), core.MAX_HISTORY_TO_STORE)
+        best = _range_max(table, lo, hi)
+        best = np.maximum(best, np.where(color == c, streak, 0))
+        best = np.maximum(best, np.where(~first_is_current & (color[first] == c), first_clip, 0))
+        max_sequence.append(best)
+
+    # Contagens da janela dos últimos N resultados
+    draws = _window_sum(color == core.YELLOW, window)
+    breaks = _window_sum((color != previous) & (previous != BET_NONE), np.maximum(window - 1, 0))
+    last_draw = np.maximum.accumulate(np.where(color == core.YELLOW, idx, -1))
+    since_draw = idx - last_draw
+    time_since_last_draw = np.where((last_draw < 0) | (since_draw >= history), -1, since_draw)
+
+    # Regra 1: quebra de surf máximo
+    surf = []
+    for c, rule_color in enumerate(core.COLORS):
+        rule = params[f'surf_max_{rule_color}']
+        (max_op, max_limit), (gap_op, gap_limit) = rule['conditions']
+        surf.append((color == c) & _streak_allows(rule, streak)
+                    & max_op(max_sequence[c], max_limit) & gap_op(streak - max_sequence[c], gap_limit))
+    # Regra 3: empate atrasado e pouco frequente
+    rule = params['draw_delayed']
+    (since_op, since_limit), (frequency_op, frequency_limit) = rule['conditions']
+    draw_delayed = (_streak_allows(rule, streak) & since_op(time_since_last_draw, since_limit)
+                    & frequency_op(_DRAW_FREQUENCY[window, draws], frequency_limit))
+    # Regra 5: Zig-Zag recorrente na janela após azul-vermelho ou vermelho-azul
+    older = np.where(position < 2, BET_NONE, np.concatenate(([BET_NONE, BET_NONE], color[:-2])))
+    zig_zag_counts = []
+    for pid in core._ZIG_ZAG_IDS:
+        _, (a, b, _) = core.pattern_colors(pid)
+        found = (color == a) & (previous == b) & (older == a)
+        zig_zag_counts.append(_window_sum(found, np.maximum(window - 2, 0)))
+    # Regra 6: chance de quebra alta com sequência curta
+    break_chance = _BREAK_CHANCE[window, breaks]
+
+    scores = np.zeros((3, size), dtype=np.int64)
+    masks = np.zeros((3, size), dtype=np.int64)
+    for c, rule_color in enumerate(core.COLORS):
+        for bet in _RULE_SHAPES[f'surf_max_{rule_color}']['bets']:
+            bet = core.RESULT_CODES[bet]
+            scores[bet] += params[f'surf_max_{rule_color}']['score'] * surf[c]
+            masks[bet] |= surf[c].astype(np.int64) << (_BIT_SURF + c)
+    for name, last_color, previous_color in (('zig_zag_home', core.BLUE, core.RED), ('zig_zag_away', core.RED, core.BLUE)):
+        rule = params[name]
+        bet = core.RESULT_CODES[_RULE_SHAPES[name]['bets'][0]]
+        zig_zag = (color == last_color) & (previous == previous_color) & _streak_allows(rule, streak)
+        for k, count in enumerate(zig_zag_counts):
+            hit = zig_zag & (count >= rule['min_count'])
+            scores[bet] += rule['score'] * hit
+            masks[bet] |= hit.astype(np.int64) << (_BIT_ZIG_ZAG + k)
+    for name, break_color in (('high_break_red', core.RED), ('high_break_blue', core.BLUE)):
+        rule = params[name]
+        bet = core.RESULT_CODES[_RULE_SHAPES[name]['bets'][0]]
+        (chance_op, chance_limit), = rule['conditions']
+        breaking = (color == break_color) & _streak_allows(rule, streak) & chance_op(break_chance, chance_limit)
+        scores[bet] += rule['score'] * breaking
+        masks[bet] |= breaking.astype(np.int64) << _BIT_BREAK
+    scores[core.YELLOW] += params['draw_delayed']['score'] * draw_delayed
+    masks[core.YELLOW] |= draw_delayed.astype(np.int64) << _BIT_DRAW_DELAYED
+
+    best = np.argmax(scores, axis=0)  # Empates ficam com casa, depois visitante
+    best_score = scores[best, idx]
+    ready = window >= core.MIN_RESULTS_FOR_SUGGESTION
+    suggested = ready & (best_score > 0)
+    bet = np.where(suggested, best, BET_NONE).astype(np.uint8)
+    confidence = np.where(suggested, np.minimum(100, best_score), np.where(ready, 50, 0)).astype(np.int16)
+    mask = np.where(suggested, masks[best, idx], np.where(ready, 0, _MASK_WAITING))
+
+    unique_masks, guarantee = np.unique(mask, return_inverse=True)
+    atoms = _guarantee_atoms(params)
+    guarantee_labels = [_guarantee_label(int(m), atoms) for m in unique_masks]
+    return {'bet': bet, 'confidence': confidence, 'guarantee': guarantee.astype(np.int32),
+            'guarantee_labels': guarantee_labels}
+
+def _guarantee_label(mask, atoms):
+    if mask == _MASK_WAITING:
+        return 'N/A'
+    if mask == 0:
+        return "Nenhum Padrão Forte"
+    return " | ".join(sorted({atom for bit, atom in enumerate(atoms) if mask >> bit & 1}))
+
+def replay(codes):
+    """
+    Referência lenta: aplica `IncrementalAnalyzer` rodada a rodada e retorna
+    (bet_type, confidence, guarantee_pattern) de cada rodada.
+    """
+    analyzer = core.IncrementalAnalyzer()
+    suggestions = []
+    for code in encode(codes):
+        analyzer.push(core.RESULT_TYPES[code])
+        s = analyzer.analysis()['suggestion']
+        suggestions.append((s['bet_type'], s['confidence'], s['guarantee_pattern']))
+    return suggestions
+
+def _hit_table(keys, hits, labels):
+    """{rótulo: (apostas, acertos, taxa)} agregando `hits` por `keys`."""
+    total = np.bincount(keys, minlength=len(labels))
+    good = np.bincount(keys, weights=hits, minlength=len(labels)).astype(np.int64)
+    return {labels[k]: (int(total[k]), int(good[k]), good[k] / total[k]) for k in np.flatnonzero(total)}
+
+def backtest(codes):
+    """
+    Confere cada sugestão com o resultado seguinte (check_guarantee_status) e
+    agrega acertos por padrão de garantia e por faixa de confiança. Só entram
+    rodadas com aposta sugerida; a última rodada não tem resultado seguinte.
+    """
+    codes = encode(codes)
+    s = suggest(codes)
+    bet = s['bet'][:-1]
+    placed = bet != BET_NONE
+    hits = (bet == codes[1:])[placed]
+    confidence = s['confidence'][:-1][placed]
+    band = np.zeros(len(confidence), dtype=np.int64)
+    for k, (_, low, high) in enumerate(CONFIDENCE_BANDS):
+        band[(confidence >= low) & (confidence <= high)] = k
+    tracked = confidence >= 70  # Limite usado por add_result para a garantia
+    return {
+        'rounds': len(codes),
+        'bets': int(placed.sum()),
+        'hit_rate': float(hits.mean()) if len(hits) else 0.0,
+        'tracked_bets': int(tracked.sum()),
+        'tracked_hit_rate': float(hits[tracked].mean()) if tracked.any() else 0.0,
+        'by_guarantee': _hit_table(s['guarantee'][:-1][placed], hits, s['guarantee_labels']),
+        'by_confidence': _hit_table(band, hits, [label for label, _, _ in CONFIDENCE_BANDS]),
+    }
+
+def _print_table(title, table):
+    print(f"\n{title}")
+    for label, (total, good, rate) in sorted(table.items(), key=lambda item: -item[1][0]):
+        print(f"  {rate:7.2%}  {good:>9}/{total:<9}  {label}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest vetorizado das sugestões.")
+    parser.add_argument('path', help="Arquivo com um resultado por linha, mais antigo primeiro")
+    parser.add_argument('--check', type=int, default=0, metavar='N',
+                        help="Confere as primeiras N rodadas contra a análise rodada a rodada")
+    args = parser.parse_args(argv)
+
+    codes = encode(core.read_results(args.path))
+    start = time.perf_counter()
+    report = backtest(codes)
+    elapsed = time.perf_counter() - start
+
+    print(f"{report['rounds']} rodadas em {elapsed:.2f}s ({report['rounds'] / max(elapsed, 1e-9):,.0f} rodadas/s)")
+    print(f"Apostas sugeridas: {report['bets']} (acerto {report['hit_rate']:.2%})")
+    print(f"Com confiança >= 70: {report['tracked_bets']} (acerto {report['tracked_hit_rate']:.2%})")
+    _print_table("Por padrão de garantia:", report['by_guarantee'])
+    _print_table("Por faixa de confiança:", report['by_confidence'])
+
+    if args.check:
+        sample = codes[:args.check]
+        s = suggest(sample)
+        fast = [(BET_TYPES[b], int(c), s['guarantee_labels'][g]) for b, c, g in zip(s['bet'], s['confidence'], s['guarantee'])]
+        mismatches = [i for i, (a, b) in enumerate(zip(fast, replay(sample))) if a != b]
+        print(f"\nConferência com a análise rodada a rodada: {len(mismatches)} divergências em {len(sample)} rodadas")
+        return 1 if mismatches else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
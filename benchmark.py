@@ -0,0 +1,177 @@
+"""
+Benchmark de cada etapa da análise em históricos sintéticos de vários tamanhos.
+
+Mede operações/s, latência p50/p99 e pico de memória (tracemalloc) de cada
+função de análise, salva tudo em JSON e, com --baseline, falha quando alguma
+etapa fica mais lenta que a referência além do limite (--threshold).
+
+Uso:
+    python benchmark.py --save bench.json
+    python benchmark.py --baseline bench.json --threshold 0.25
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import analysis_core as core
+
+DEFAULT_SIZES = (27, 100, 1000, 100_000, 1_000_000)
+DEFAULT_SEED = 27
+# Tempo mínimo de medição por etapa/tamanho e limites de repetições
+MIN_TIME = 0.2
+MIN_OPS = 5
+MAX_OPS = 100_000
+
+def make_history(size, seed=DEFAULT_SEED):
+    """Histórico sintético reprodutível com `size` resultados (mais recente primeiro)."""
+    rnd = random.Random(seed)
+    history = core.HistoryBuffer(capacity=size)
+    history.extend_codes(bytes(rnd.choices(range(3), weights=(45, 45, 10), k=size)))
+    return history
+
+def _incremental_step(results):
+    """Uma rodada ao vivo: push de um resultado e análise sem cache."""
+    analyzer = core.IncrementalAnalyzer.from_results(results[:core.MAX_HISTORY_TO_STORE])
+    next_results = iter(random.Random(DEFAULT_SEED).choices(core.RESULT_TYPES, k=MAX_OPS + MIN_OPS + 1))
+
+    def step():
+        analyzer.push(next(next_results))
+        return analyzer.analysis(cache=None)
+    return step
+
+def _undo_step(results):
+    """Correção de uma rodada: push de um resultado e `undo` dele."""
+    analyzer = core.IncrementalAnalyzer.from_results(results[:core.MAX_HISTORY_TO_STORE])
+
+    def step():
+        analyzer.push('draw')
+        return analyzer.undo()
+    return step
+
+def stages(results):
+    """Etapas medidas: nome -> função sem argumentos."""
+    surf = core.analyze_surf(results)
+    colors = core.analyze_colors(results)
+    patterns = core.find_complex_patterns(results)
+    break_probability = core.analyze_break_probability(results)
+    draw_specifics = core.analyze_draw_specifics(results)
+    return {
+        'scan_window': lambda: core.scan_window(results),
+        'analyze_surf': lambda: core.analyze_surf(results),
+        'analyze_colors': lambda: core.analyze_colors(results),
+        'find_complex_patterns': lambda: core.find_complex_patterns(results),
+        'analyze_break_probability': lambda: core.analyze_break_probability(results),
+        'analyze_draw_specifics': lambda: core.analyze_draw_specifics(results),
+        'generate_advanced_suggestion': lambda: core.generate_advanced_suggestion(
+            results, surf, colors, patterns, break_probability, draw_specifics),
+        'update_analysis': lambda: core.update_analysis(results),
+        'incremental_push': _incremental_step(results),
+        'incremental_undo': _undo_step(results),
+    }
+
+def _percentile(sorted_samples, fraction):
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * fraction))]
+
+def measure(func, min_time=MIN_TIME):
+    """Executa `func` repetidamente e retorna as estatísticas de tempo e memória."""
+    func()  # Aquecimento
+    samples = []
+    clock = time.perf_counter_ns
+    deadline = clock() + int(min_time * 1e9)
+    while len(samples) < MIN_OPS or (clock() < deadline and len(samples) < MAX_OPS):
+        start = clock()
+        func()
+        samples.append(clock() - start)
+
+    # Pico de memória numa execução separada (tracemalloc deixa tudo mais lento)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    samples.sort()
+    total = sum(samples)
+    return {
+        'ops': len(samples),
+        'ops_per_sec': round(len(samples) / (total / 1e9), 1) if total else 0,
+        'p50_us': round(_percentile(samples, 0.50) / 1000, 3),
+        'p99_us': round(_percentile(samples, 0.99) / 1000, 3),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+def run(sizes=DEFAULT_SIZES, only=None, min_time=MIN_TIME, seed=DEFAULT_SEED, out=sys.stdout):
+    """Roda o benchmark e retorna o relatório (dict serializável em JSON)."""
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seed': seed,
+            'min_time': min_time,
+        },
+        'results': {},
+    }
+    for size in sizes:
+        results = make_history(size, seed)
+        for name, func in stages(results).items():
+            if only and name not in only:
+                continue
+            stats = measure(func, min_time)
+            report['results'].setdefault(name, {})[str(size)] = stats
+            if out is not None:
+                print(f"{name:<30} {size:>9}  {stats['ops_per_sec']:>12,.1f} ops/s  "
+                      f"p50 {stats['p50_us']:>11,.2f}us  p99 {stats['p99_us']:>11,.2f}us  "
+                      f"pico {stats['peak_kib']:>9,.1f} KiB", file=out)
+    return report
+
+def compare(report, baseline, threshold):
+    """Lista de regressões: p50 acima de (1 + threshold) vezes o da referência."""
+    regressions = []
+    for name, by_size in report['results'].items():
+        for size, stats in by_size.items():
+            reference = baseline.get('results', {}).get(name, {}).get(size)
+            if not reference or not reference['p50_us']:
+                continue
+            ratio = stats['p50_us'] / reference['p50_us']
+            if ratio > 1 + threshold:
+                regressions.append({'stage': name, 'size': int(size), 'p50_us': stats['p50_us'],
+                                    'baseline_p50_us': reference['p50_us'], 'ratio': round(ratio, 2)})
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das etapas de análise.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="Tamanhos de histórico (padrão: 27 100 1000 100000 1000000)")
+    parser.add_argument('--stages', nargs='+', help="Mede só estas etapas")
+    parser.add_argument('--min-time', type=float, default=MIN_TIME,
+                        help="Segundos mínimos de medição por etapa e tamanho")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--save', help="Salva o relatório em JSON neste arquivo")
+    parser.add_argument('--baseline', help="Relatório JSON de referência para comparar")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Regressão tolerada no p50 (0.25 = 25%% mais lento)")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.stages, args.min_time, args.seed)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSÃO {r['stage']} ({r['size']}): p50 {r['p50_us']}us vs {r['baseline_p50_us']}us "
+                  f"({r['ratio']}x)", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"Nenhuma regressão acima de {args.threshold:.0%}.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Painel com várias mesas acompanhadas no mesmo processo.
+
+Todas as abas/sessões compartilham o mesmo TableRegistry, então cada mesa
+existe uma única vez no servidor. Uso: streamlit run dashboard.py
+"""
+import streamlit as st
+
+from analysis_core import get_color_emoji, get_result_emoji
+from tables import TableRegistry
+
+TABLES_PER_ROW = 3
+
+@st.cache_resource
+def get_registry():
+    # Um único registro por processo, compartilhado por todas as sessões
+    return TableRegistry()
+
+registry = get_registry()
+
+st.set_page_config(layout="wide", page_title="Football Studio - Mesas")
+st.title("⚽ Football Studio - Mesas")
+
+with st.sidebar:
+    st.header("Mesas")
+    new_table = st.text_input("Nome da nova mesa")
+    if st.button("Adicionar Mesa", width="stretch") and new_table.strip():
+        registry.add_table(new_table.strip())
+    stats = registry.latency_stats()
+    st.caption(f"{len(registry.tables)} mesas | {stats['rounds']} rodadas | "
+               f"análise p50 {stats['p50_ms']} ms, p99 {stats['p99_ms']} ms")
+
+_BUTTONS = (('home', 'red'), ('away', 'blue'), ('draw', 'yellow'))
+
+def render_table(table):
+    st.subheader(table.name)
+    buttons = st.columns(3)
+    for column, (result, color) in zip(buttons, _BUTTONS):
+        if column.button(f"{get_color_emoji(color)} {get_result_emoji(result)}",
+                         key=f"{table.name}-{result}", width="stretch"):
+            # Espera só este resultado: a mesa é redesenhada com ele, sem esperar as outras
+            registry.submit(table.name, result).result()
+    if table.guarantee_failed:
+        st.error(f"🚨 Garantia falhou: '{table.last_guarantee_pattern}'")
+    suggestion = table.analysis_data['suggestion']
+    st.info(f"{suggestion['suggestion']} ({suggestion['confidence']}%)")
+    colors = table.analysis_data['color_analysis']
+    st.write(f"**Resultados:** {len(table.results)} | **Sequência:** {colors['streak']}x "
+             f"{get_color_emoji(colors['current_color'])}")
+    st.write(f"`{colors['color_pattern_27']}`")
+
+names = sorted(registry.tables)
+if not names:
+    st.write("Nenhuma mesa cadastrada. Adicione mesas na barra lateral.")
+for row_start in range(0, len(names), TABLES_PER_ROW):
+    for column, name in zip(st.columns(TABLES_PER_ROW), names[row_start:row_start + TABLES_PER_ROW]):
+        with column, st.container(border=True):
+            render_table(registry.get(name))
@@ -0,0 +1,249 @@
+"""
+Instrumentação opcional do tempo gasto em cada etapa da análise e da interface.
+
+Desligada por padrão. `enable()` envolve as funções de `analysis_core` com
+cronômetros (trocando os atributos do módulo) e `disable()` devolve as
+originais, então desligada não custa nada nas funções de análise. As seções
+da interface são marcadas com `lap(nome)`, que só testa uma flag quando a
+instrumentação está desligada, e os painéis que rodam sozinhos (fragmentos)
+com `section(nome)`.
+
+Cada etapa guarda contagem, tempo total, um histograma cumulativo (para o
+Prometheus) e as últimas ROLLING_SAMPLES medições (para p50/p99).
+Ligue também com a variável de ambiente FOOTBALL_STUDIO_DIAGNOSTICS=1.
+"""
+import bisect
+import collections
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import types
+
+import analysis_core
+
+ROLLING_SAMPLES = 512
+# Limites superiores dos baldes do histograma, em segundos
+HISTOGRAM_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+# Funções de analysis_core e métodos do IncrementalAnalyzer instrumentados
+INSTRUMENTED_FUNCTIONS = (
+    'scan_window', 'analyze_surf', 'analyze_colors', 'find_complex_patterns',
+    'analyze_break_probability', 'analyze_draw_specifics',
+    'generate_advanced_suggestion', 'update_analysis',
+)
+INSTRUMENTED_METHODS = ('push', 'undo', 'analysis', '_compute_analysis')
+
+class StageStats:
+    """Medições acumuladas de uma etapa."""
+    __slots__ = ('calls', 'total', 'buckets', 'samples')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)  # O último é +Inf
+        self.samples = collections.deque(maxlen=ROLLING_SAMPLES)
+
+    def record(self, seconds):
+        self.calls += 1
+        self.total += seconds
+        self.buckets[bisect.bisect_left(HISTOGRAM_BUCKETS, seconds)] += 1
+        self.samples.append(seconds)
+
+    def percentile(self, fraction):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+_enabled = False
+_stats = {}
+_lock = threading.Lock()
+_local = threading.local()  # Medições da execução (rerun) atual de cada sessão
+_originals = {}
+
+def is_enabled():
+    return _enabled
+
+def record(stage, seconds):
+    """Registra uma medição de `stage`."""
+    with _lock:
+        stats = _stats.get(stage)
+        if stats is None:
+            stats = _stats[stage] = StageStats()
+        stats.record(seconds)
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is not None:
+        calls, total = rerun.get(stage, (0, 0.0))
+        rerun[stage] = (calls + 1, total + seconds)
+
+def _timed(stage, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(stage, time.perf_counter() - start)
+    return wrapper
+
+def enable():
+    """Liga a instrumentação para todo o processo."""
+    global _enabled
+    with _lock:
+        if _enabled:
+            return
+        for name in INSTRUMENTED_FUNCTIONS:
+            _originals[name] = getattr(analysis_core, name)
+            setattr(analysis_core, name, _timed(name, _originals[name]))
+        for name in INSTRUMENTED_METHODS:
+            key = f'IncrementalAnalyzer.{name}'
+            _originals[key] = analysis_core.IncrementalAnalyzer.__dict__[name]
+            setattr(analysis_core.IncrementalAnalyzer, name, _timed(key, _originals[key]))
+        _enabled = True
+
+def disable():
+    """Desliga a instrumentação e restaura as funções originais."""
+    global _enabled
+    with _lock:
+        if not _enabled:
+            return
+        for name in INSTRUMENTED_FUNCTIONS:
+            setattr(analysis_core, name, _originals.pop(name))
+        for name in INSTRUMENTED_METHODS:
+            setattr(analysis_core.IncrementalAnalyzer, name, _originals.pop(f'IncrementalAnalyzer.{name}'))
+        _enabled = False
+
+def reset():
+    """Descarta todas as medições."""
+    with _lock:
+        _stats.clear()
+
+# --- Execuções da interface ---
+
+def begin_rerun():
+    """Marca o início de uma execução do script; `lap` mede a partir daqui."""
+    if not _enabled:
+        _local.rerun = None
+        return
+    _local.rerun = {}
+    _local.started = _local.lap = time.perf_counter()
+
+def lap(section):
+    """Registra o tempo desde a marca anterior como a seção `section` da interface."""
+    if not _enabled or getattr(_local, 'rerun', None) is None:
+        return
+    now = time.perf_counter()
+    record(f'ui.{section}', now - _local.lap)
+    _local.lap = now
+
+@contextlib.contextmanager
+def section(name):
+    """
+    Mede o bloco como a seção `name` da interface. Ao contrário de `lap`, não
+    depende da marca anterior, então também vale quando só um fragmento roda.
+    """
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(f'ui.{name}', time.perf_counter() - start)
+
+def end_rerun():
+    """Registra o tempo total da execução e retorna {etapa: (chamadas, segundos)} dela."""
+    rerun = getattr(_local, 'rerun', None)
+    if not _enabled or rerun is None:
+        return {}
+    record('ui.rerun', time.perf_counter() - _local.started)
+    return dict(rerun)
+
+# --- Relatórios e exportação ---
+
+def snapshot():
+    """Lista de dicts por etapa: chamadas, total, média, p50 e p99 (em ms)."""
+    with _lock:
+        items = sorted(_stats.items())
+        return [{
+            'stage': stage,
+            'calls': stats.calls,
+            'total_ms': round(stats.total * 1000, 3),
+            'mean_ms': round(stats.total / stats.calls * 1000, 4) if stats.calls else 0,
+            'p50_ms': round(stats.percentile(0.50) * 1000, 4),
+            'p99_ms': round(stats.percentile(0.99) * 1000, 4),
+        } for stage, stats in items]
+
+def prometheus_text(prefix='football_studio'):
+    """Medições no formato de texto do Prometheus (histograma por etapa + cache)."""
+    name = f'{prefix}_stage_seconds'
+    lines = [f'# HELP {name} Tempo gasto por etapa da análise e da interface.',
+             f'# TYPE {name} histogram']
+    with _lock:
+        for stage, stats in sorted(_stats.items()):
+            cumulative = 0
+            for bound, count in zip(HISTOGRAM_BUCKETS + ('+Inf',), stats.buckets):
+                cumulative += count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {stats.total:.9f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {stats.calls}')
+
+    cache = analysis_core.ANALYSIS_CACHE.stats()
+    for key, kind in (('hits', 'counter'), ('misses', 'counter'), ('size', 'gauge')):
+        metric = f'{prefix}_analysis_cache_{key}'
+        lines += [f'# TYPE {metric} {kind}', f'{metric} {cache[key]}']
+    return '\n'.join(lines) + '\n'
+
+def export_prometheus(path):
+    """Grava o arquivo de texto para o textfile collector do node_exporter (troca atômica)."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+def export_jsonl(path):
+    """Acrescenta uma linha JSON por etapa com as medições atuais."""
+    timestamp = time.time()
+    with open(path, 'a', encoding='utf-8') as f:
+        for row in snapshot():
+            f.write(json.dumps({'ts': timestamp, **row}) + '\n')
+
+# --- Memória ---
+
+_ATOMIC_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+def deep_sizeof(obj, shared=()):
+    """
+    Bytes ocupados por `obj` e tudo o que ele alcança (dicionários, sequências,
+    atributos e __slots__), contando cada objeto uma vez. Objetos em `shared`
+    (ex.: análises do ANALYSIS_CACHE, usadas por todas as sessões) e o que só
+    é alcançável por eles não entram na conta.
+    """
+    seen = {id(item) for item in shared}
+    pending = [obj]
+    total = 0
+    while pending:
+        item = pending.pop()
+        if id(item) in seen or isinstance(item, _ATOMIC_TYPES):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            pending.extend(item.keys())
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, collections.deque)):
+            pending.extend(item)
+        if hasattr(item, '__dict__'):
+            pending.append(vars(item))
+        for cls in type(item).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if hasattr(item, name) and name not in ('__dict__', '__weakref__'):
+                    pending.append(getattr(item, name))
+    return total
+
+if os.environ.get('FOOTBALL_STUDIO_DIAGNOSTICS') == '1':
+    enable()
@@ -0,0 +1,291 @@
+"""
+Exportação do histórico gravado e da sugestão de cada rodada (CSV e Parquet).
+
+Lê o log de resultados (`results.log`, ou um arquivo arquivado) em blocos de
+CHUNK_ROWS rodadas e grava cada bloco assim que ele fica pronto, então a
+memória não depende do tamanho do arquivo. Com as sugestões, cada linha traz
+a sugestão que estava na tela antes do resultado, com as regras ativas e os
+sinais opcionais escolhidos (janela longa, transições), e se ela acertou.
+
+Com DEFAULT_RULES e sem sinais opcionais, as sugestões são calculadas por
+bloco com `backtest.suggest`, sobre os MAX_HISTORY_TO_STORE resultados
+anteriores ao bloco e o próprio bloco: o mesmo histórico que o analisador
+teria em cada rodada. Com outras regras (FOOTBALL_STUDIO_RULES ou
+`set_rule_set`) ou com os sinais opcionais, que `backtest.suggest` não
+reproduz, o log é reproduzido rodada a rodada por um IncrementalAnalyzer,
+bem mais devagar.
+
+Colunas (inteiros pequenos, não textos repetidos):
+    round        número da rodada no log, a partir de 0
+    result       0 = casa, 1 = visitante, 2 = empate
+    bet_type     0/1/2 como `result`, 3 = sem aposta
+    confidence   0 a 100
+    outcome      0 = sem aposta, 1 = acerto, 2 = erro
+    tracked      1 se a aposta contava para a garantia (confiança >= 70)
+    suggestion, guarantee_pattern
+                 códigos de dicionário, um dicionário por arquivo: no
+                 Parquet os textos ficam nos metadados do arquivo (chave
+                 `labels`, JSON {coluna: [textos]}), no CSV vão para
+                 `<arquivo>.labels.csv` (coluna, código, texto); `read_labels`
+                 lê os dois
+
+O CSV é comprimido com gzip e o Parquet com zstd (requer `pyarrow`).
+
+Uso: python exporter.py data/results.log historico.parquet [--no-suggestions] [--long-window N] [--markov]
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from analysis_core import (
+    BET_SUGGESTIONS,
+    MAX_HISTORY_TO_STORE,
+    NO_BET_SUGGESTION,
+    RESULT_TYPES,
+    WAITING_SUGGESTION,
+    IncrementalAnalyzer,
+    uses_default_rules,
+)
+from backtest import BET_NONE, suggest
+from result_log import iter_log_chunks
+
+CHUNK_ROWS = 64 * 1024
+FORMATS = ('csv', 'parquet')
+BET_TYPES = RESULT_TYPES + ('none',)
+# Texto da coluna `suggestion` por aposta (0-3) e, no fim, o de quem ainda aguarda resultados
+_SUGGESTION_TEXTS = tuple(BET_SUGGESTIONS[bet] for bet in RESULT_TYPES) + (NO_BET_SUGGESTION, WAITING_SUGGESTION)
+_WAITING = len(_SUGGESTION_TEXTS) - 1
+OUTCOMES = ('sem aposta', 'acerto', 'erro')
+HISTORY_COLUMNS = ('round', 'result')
+SUGGESTION_COLUMNS = ('bet_type', 'confidence', 'outcome', 'tracked', 'suggestion', 'guarantee_pattern')
+LABEL_COLUMNS = ('suggestion', 'guarantee_pattern')
+
+def detect_format(name):
+    """Formato pelo nome do arquivo (padrão: csv)."""
+    return 'parquet' if name.lower().endswith('.parquet') else 'csv'
+
+class _Labels:
+    """Códigos de dicionário de uma coluna de texto, na ordem em que aparecem."""
+
+    def __init__(self):
+        self.codes = {}
+        self.texts = []
+
+    def code(self, text):
+        code = self.codes.get(text)
+        if code is None:
+            code = self.codes[text] = len(self.texts)
+            self.texts.append(text)
+        return code
+
+    def codes_of(self, texts, keys):
+        """Códigos de `texts[k]` para cada k de `keys` (array), registrando os novos na ordem em que aparecem."""
+        present, first = np.unique(keys, return_index=True)
+        lookup = np.zeros(len(texts), dtype=np.uint16)
+        for key in present[np.argsort(first)]:
+            lookup[key] = self.code(texts[key])
+        return lookup[keys]
+
+def _suggestion_columns(history, codes, labels):
+    """
+    Colunas das sugestões de um bloco. `history` são os resultados anteriores
+    ao bloco (até MAX_HISTORY_TO_STORE); a sugestão de cada linha é a da
+    rodada anterior, e a da primeira rodada do log é a de quem aguarda.
+    """
+    s = suggest(history + codes)
+    guarantee_labels = s['guarantee_labels'] + ['N/A']
+    if history:
+        rows = slice(len(history) - 1, len(history) + len(codes) - 1)
+        bet, confidence, guarantee = s['bet'][rows], s['confidence'][rows], s['guarantee'][rows]
+    else:
+        rows = slice(0, len(codes) - 1)
+        bet = np.concatenate(([BET_NONE], s['bet'][rows]))
+        confidence = np.concatenate(([0], s['confidence'][rows]))
+        guarantee = np.concatenate(([len(guarantee_labels) - 1], s['guarantee'][rows]))
+    bet = bet.astype(np.uint8)
+    confidence = confidence.astype(np.uint8)
+
+    placed = bet != BET_NONE
+    result = np.frombuffer(codes, dtype=np.uint8)
+    text = np.where(placed, bet, np.where(confidence == 0, _WAITING, BET_NONE))
+    return {
+        'bet_type': bet,
+        'confidence': confidence,
+        'outcome': np.where(placed, np.where(bet == result, 1, 2), 0).astype(np.uint8),
+        'tracked': (placed & (confidence >= 70)).astype(np.uint8),
+        'suggestion': labels['suggestion'].codes_of(_SUGGESTION_TEXTS, text),
+        'guarantee_pattern': labels['guarantee_pattern'].codes_of(guarantee_labels, guarantee),
+    }
+
+def _replayed_columns(analyzer, codes, labels, options):
+    """
+    Colunas das sugestões de um bloco pela análise rodada a rodada, com as
+    regras ativas e os sinais de `options`. `analyzer` continua do bloco
+    anterior; sem o ANALYSIS_CACHE, pois as janelas de um arquivo longo só
+    tirariam as das sessões.
+    """
+    suggestion = analyzer.analysis(cache=None, **options)['suggestion']
+    bet_types, confidences, texts, guarantees = [], [], [], []
+    for code in codes:
+        bet_types.append(BET_TYPES.index(suggestion['bet_type']))
+        confidences.append(suggestion['confidence'])
+        texts.append(labels['suggestion'].code(suggestion['suggestion']))
+        guarantees.append(labels['guarantee_pattern'].code(suggestion['guarantee_pattern']))
+        analyzer.push(RESULT_TYPES[code])
+        suggestion = analyzer.analysis(cache=None, **options)['suggestion']
+    bet = np.array(bet_types, dtype=np.uint8)
+    confidence = np.array(confidences, dtype=np.uint8)
+    placed = bet != BET_NONE
+    return {
+        'bet_type': bet,
+        'confidence': confidence,
+        'outcome': np.where(placed, np.where(bet == np.frombuffer(codes, dtype=np.uint8), 1, 2), 0).astype(np.uint8),
+        'tracked': (placed & (confidence >= 70)).astype(np.uint8),
+        'suggestion': np.array(texts, dtype=np.uint16),
+        'guarantee_pattern': np.array(guarantees, dtype=np.uint16),
+    }
+
+def iter_chunks(log_path, chunk_rows=CHUNK_ROWS, suggestions=True, labels=None, long_window=None, markov=False):
+    """
+    Blocos de até `chunk_rows` rodadas como {coluna: array}; `result` são os
+    bytes do log. Com `suggestions`, `labels` ({coluna: _Labels}) recebe os
+    textos das colunas de dicionário; `long_window` e `markov` são os sinais
+    opcionais de `IncrementalAnalyzer.analysis`.
+    """
+    # `backtest.suggest` só reproduz DEFAULT_RULES sem os sinais opcionais
+    vectorized = uses_default_rules() and not long_window and not markov
+    analyzer = None if vectorized else IncrementalAnalyzer()
+    options = {'long_window': long_window, 'markov': markov}
+    history = b''  # Os últimos MAX_HISTORY_TO_STORE resultados antes do bloco
+    first_round = 0
+    for codes in iter_log_chunks(log_path, chunk_rows):
+        chunk = {'round': np.arange(first_round, first_round + len(codes), dtype=np.uint64), 'result': codes}
+        first_round += len(codes)
+        if suggestions and vectorized:
+            chunk.update(_suggestion_columns(history, codes, labels))
+            history = (history + codes)[-MAX_HISTORY_TO_STORE:]
+        elif suggestions:
+            chunk.update(_replayed_columns(analyzer, codes, labels, options))
+        yield chunk
+
+# --- Escritores ---
+
+def _write_csv(chunks, out, columns, labels):
+    with gzip.open(out, 'wt', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for chunk in chunks:
+            # Listas de `int`: o csv formata escalares NumPy bem mais devagar
+            writer.writerows(zip(*(chunk[name].tolist() if isinstance(chunk[name], np.ndarray) else chunk[name]
+                                   for name in columns)))
+    if labels:
+        with open(out + '.labels.csv', 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(('column', 'code', 'label'))
+            for name, column_labels in labels.items():
+                writer.writerows((name, code, text) for code, text in enumerate(column_labels.texts))
+
+def _write_parquet(chunks, out, columns, labels):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("A exportação em Parquet requer o pacote 'pyarrow'.") from e
+    types = {
+        'round': pa.uint64(), 'result': pa.uint8(), 'bet_type': pa.uint8(), 'confidence': pa.uint8(),
+        'outcome': pa.uint8(), 'tracked': pa.bool_(), 'suggestion': pa.uint16(), 'guarantee_pattern': pa.uint16(),
+    }
+    schema = pa.schema([(name, types[name]) for name in columns])
+    with pq.ParquetWriter(out, schema, compression='zstd') as writer:
+        for chunk in chunks:
+            arrays = []
+            for name in columns:
+                if name == 'result':
+                    # Os códigos do log já são uint8: o buffer vira a coluna sem cópia
+                    arrays.append(pa.Array.from_buffers(pa.uint8(), len(chunk[name]), [None, pa.py_buffer(chunk[name])]))
+                else:
+                    arrays.append(pa.array(chunk[name], types[name]))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        if labels:
+            # Um dicionário por arquivo, gravado quando todos os textos já apareceram
+            writer.add_key_value_metadata({'labels': json.dumps(
+                {name: column_labels.texts for name, column_labels in labels.items()}, ensure_ascii=False)})
+
+# --- API ---
+
+def read_labels(path):
+    """{coluna: [textos]} das colunas de dicionário de um arquivo exportado (vazio sem as sugestões)."""
+    if detect_format(path) == 'parquet':
+        import pyarrow.parquet as pq
+        metadata = pq.read_metadata(path).metadata or {}
+        return json.loads(metadata[b'labels']) if b'labels' in metadata else {}
+    labels = {}
+    if os.path.exists(path + '.labels.csv'):
+        with open(path + '.labels.csv', newline='', encoding='utf-8') as f:
+            for name, _, text in list(csv.reader(f))[1:]:
+                labels.setdefault(name, []).append(text)
+    return labels
+
+def export_log(log_path, out, fmt=None, suggestions=True, chunk_rows=CHUNK_ROWS, long_window=None, markov=False):
+    """
+    Exporta o log `log_path` para `out` (CSV com gzip ou Parquet), com as
+    sugestões que `analysis(long_window=..., markov=...)` daria. Retorna um
+    dict com 'path', 'rows', 'bytes', 'seconds' e 'rows_per_second'.
+    """
+    fmt = fmt or detect_format(out)
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato desconhecido: {fmt}. Use um de {FORMATS}.")
+    columns = HISTORY_COLUMNS + (SUGGESTION_COLUMNS if suggestions else ())
+    labels = {name: _Labels() for name in LABEL_COLUMNS} if suggestions else None
+    rows = 0
+
+    def counted(chunks):
+        nonlocal rows
+        for chunk in chunks:
+            rows += len(chunk['result'])
+            yield chunk
+
+    start = time.perf_counter()
+    chunks = counted(iter_chunks(log_path, chunk_rows, suggestions, labels, long_window, markov))
+    if fmt == 'csv':
+        _write_csv(chunks, out, columns, labels)
+    else:
+        _write_parquet(chunks, out, columns, labels)
+    seconds = time.perf_counter() - start
+    return {
+        'path': out,
+        'rows': rows,
+        'bytes': os.path.getsize(out),
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds > 0 else float(rows),
+    }
+
+def format_report(report):
+    """Resumo da exportação em texto."""
+    return (f"{report['rows']} rodadas exportadas para {report['path']} em {report['seconds']:.2f}s "
+            f"({report['rows_per_second']:,.0f} linhas/s, {report['bytes'] / 1024:,.1f} KiB)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta o histórico gravado e as sugestões por rodada.")
+    parser.add_argument('log', help="Arquivo de log (ex.: data/results.log ou um results-*.log arquivado)")
+    parser.add_argument('out', help="Arquivo de saída (.csv.gz ou .parquet)")
+    parser.add_argument('--format', choices=FORMATS, help="Formato (padrão: pela extensão)")
+    parser.add_argument('--no-suggestions', action='store_true', help="Só o histórico, sem reproduzir as sugestões")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--long-window', type=int, help="Tamanho da janela longa das sugestões (sinal opcional)")
+    parser.add_argument('--markov', action='store_true', help="Sugestões com o sinal de transições")
+    args = parser.parse_args(argv)
+
+    report = export_log(args.log, args.out, args.format, not args.no_suggestions, args.chunk_rows,
+                        args.long_window, args.markov)
+    print(format_report(report))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,405 @@
+"""
+Ingestão assíncrona de resultados vindos de fontes locais.
+
+Fontes (uma por especificação):
+    file:CAMINHO       arquivo acompanhado como `tail -f` (só linhas novas)
+    stdin              entrada padrão
+    unix:CAMINHO       socket Unix; cada conexão envia uma linha por resultado
+    tcp:HOST:PORTA     servidor TCP local de linhas (substituto do websocket)
+
+Cada linha é um resultado em qualquer forma aceita pelo importer (home, h,
+red, casa...). As fontes colocam os códigos numa fila limitada: quando a
+análise fica para trás, `put` espera (back-pressure) e a fonte para de ler.
+O consumidor junta tudo o que já está na fila (rajada), aplica ao histórico e
+ao IncrementalAnalyzer e só então faz uma única análise e sugestão. O estado
+publicado (`Ingestor.state`) é trocado por inteiro a cada rajada, então a
+página do Streamlit o lê sem esperar nem travar o laço. As correções
+(`undo`, `replace`) rodam no mesmo laço, entre duas rajadas, e só se o log e
+o estado que quem pede conhece ainda forem os atuais (senão StaleLogError).
+
+Uso: python ingest.py file:feed.txt unix:/tmp/football.sock [--log-dir data]
+"""
+import argparse
+import asyncio
+import collections
+import os
+import sys
+import threading
+import time
+
+import diagnostics
+from analysis_core import MAX_HISTORY_TO_STORE, RESULT_CODES, RESULT_TYPES, UNDO_DEPTH, IncrementalAnalyzer
+from audit import AuditTrail, corrected_tail, replace_round, undo_rounds
+from importer import encode_value
+from result_log import ResultLog, StaleLogError
+
+QUEUE_SIZE = 1024
+MAX_BURST = 4096
+TAIL_POLL_INTERVAL = 0.1
+
+FeedState = collections.namedtuple(
+    'FeedState',
+    'rounds codes analysis last_suggested_bet_type last_guarantee_pattern last_suggestion_confidence guarantee_failed')
+
+def _read_appended(f, path, size=64 * 1024):
+    """O que foi acrescentado a `f` desde a última leitura (bloqueante, roda numa thread)."""
+    data = f.read(size)
+    if not data and os.path.getsize(path) < f.tell():
+        f.seek(0)  # Truncado: o conteúdo novo começa do início
+    return data
+
+class IngestMetrics:
+    """Contadores da ingestão; lidos pela interface sem trava (valores inteiros/float)."""
+
+    __slots__ = ('received', 'rejected', 'applied', 'bursts', 'max_burst', 'queue_depth',
+                 'max_queue_depth', 'blocked_puts', 'blocked_seconds', 'last_lag')
+
+    def __init__(self):
+        self.received = 0  # Códigos aceitos das fontes
+        self.rejected = 0  # Linhas que não são resultados
+        self.applied = 0  # Códigos já refletidos em `state`
+        self.bursts = 0  # Passadas de análise
+        self.max_burst = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.blocked_puts = 0  # Vezes em que uma fonte esperou a fila esvaziar
+        self.blocked_seconds = 0.0
+        self.last_lag = 0.0  # Da chegada do mais antigo da rajada até a análise
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class Ingestor:
+    """
+    Fila limitada, fontes e o consumidor que aplica as rajadas. Roda num laço
+    asyncio próprio em uma thread (`start`) ou dentro de um laço existente (`run`).
+    """
+
+    def __init__(self, results=None, result_log=None, queue_size=QUEUE_SIZE, max_burst=MAX_BURST):
+        self.analyzer = IncrementalAnalyzer.from_results(results if results is not None else ())
+        self.result_log = result_log
+        self.log_version = result_log.version if result_log is not None else None  # Última escrita da ingestão
+        self.max_burst = max_burst
+        self.metrics = IngestMetrics()
+        self.audit = AuditTrail()  # Sugestões acompanhadas; só o laço da ingestão escreve
+        self._queue_size = queue_size
+        self._queue = None
+        self._loop = None
+        self._servers = []
+        self._published = threading.Condition()
+        analysis = self.analyzer.analysis()
+        suggestion = analysis['suggestion']
+        self.state = FeedState(0, self.results.codes(), analysis, suggestion['bet_type'],
+                               suggestion['guarantee_pattern'], suggestion['confidence'], False)
+
+    @property
+    def results(self):
+        """Histórico armazenado (o HistoryBuffer do analisador)."""
+        return self.analyzer.history
+
+    # --- Fila ---
+
+    async def put(self, codes):
+        """Enfileira códigos (bytes, do mais antigo ao mais recente); espera se a fila estiver cheia."""
+        item = (bytes(codes), time.perf_counter())
+        if self._queue.full():
+            self.metrics.blocked_puts += 1
+            start = time.perf_counter()
+            await self._queue.put(item)
+            self.metrics.blocked_seconds += time.perf_counter() - start
+        else:
+            self._queue.put_nowait(item)
+        self.metrics.received += len(item[0])
+        depth = self._queue.qsize()
+        self.metrics.queue_depth = depth
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, depth)
+        return self.metrics.received
+
+    async def put_line(self, line):
+        code = encode_value(line)
+        if code is None:
+            if line.strip():
+                self.metrics.rejected += 1
+            return
+        await self.put(bytes((code,)))
+
+    # --- Consumidor ---
+
+    async def _consume(self):
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            size = len(batch[0][0])
+            while size < self.max_burst and not queue.empty():
+                item = queue.get_nowait()
+                batch.append(item)
+                size += len(item[0])
+            self._apply(b''.join(codes for codes, _ in batch), batch[0][1])
+            for _ in batch:
+                queue.task_done()
+
+    def _apply(self, codes, oldest):
+        """Aplica uma rajada ao histórico e faz uma única análise."""
+        if self.result_log is not None:
+            self._write_log(codes)
+        previous = self.state
+        # Só o primeiro resultado da rajada responde à sugestão exibida; os
+        # demais chegaram antes de haver sugestão para eles.
+        first = RESULT_TYPES[codes[0]]
+        hit = self.audit.observe(previous.last_suggested_bet_type, previous.last_guarantee_pattern,
+                                 previous.last_suggestion_confidence, first, self.analyzer.rounds + 1)
+        guarantee_failed = hit is False
+
+        for code in codes:
+            self.analyzer.push(RESULT_TYPES[code])
+        analysis = self.analyzer.analysis()
+
+        metrics = self.metrics
+        metrics.applied += len(codes)
+        metrics.bursts += 1
+        metrics.max_burst = max(metrics.max_burst, len(codes))
+        metrics.queue_depth = self._queue.qsize()
+        metrics.last_lag = time.perf_counter() - oldest
+        if diagnostics.is_enabled():
+            diagnostics.record('ingest.lag', metrics.last_lag)
+
+        suggestion = analysis['suggestion']
+        self._publish(FeedState(previous.rounds + len(codes), self.results.codes(), analysis, suggestion['bet_type'],
+                                suggestion['guarantee_pattern'], suggestion['confidence'], guarantee_failed))
+
+    def _write_log(self, codes):
+        """Acrescenta a rajada ao log; se outra sessão o mudou, recomeça do final dele antes."""
+        while True:
+            try:
+                self.log_version = self.result_log.extend(codes, expected=self.log_version)
+                return
+            except StaleLogError:
+                self.log_version, recent = self.result_log.snapshot(MAX_HISTORY_TO_STORE + UNDO_DEPTH)
+                self.analyzer = IncrementalAnalyzer.from_codes(recent)
+                self.audit = AuditTrail()
+
+    def _check(self, expected):
+        """Com `expected` (o FeedState que quem chama leu), rejeita se já houve outra publicação."""
+        if expected is not None and expected is not self.state:
+            raise StaleLogError("O histórico da ingestão mudou desde a última leitura")
+
+    def _publish(self, state):
+        with self._published:
+            self.state = state
+            self._published.notify_all()
+
+    def _publish_analysis(self, rounds, guarantee_failed):
+        """Publica a análise do histórico atual (depois de uma correção)."""
+        analysis = self.analyzer.analysis()
+        suggestion = analysis['suggestion']
+        self._publish(FeedState(rounds, self.results.codes(), analysis, suggestion['bet_type'],
+                                suggestion['guarantee_pattern'], suggestion['confidence'], guarantee_failed))
+
+    # --- Fontes ---
+
+    async def tail_file(self, path, from_start=False):
+        """
+        Acompanha `path` como `tail -f`; recomeça do início se o arquivo for
+        truncado. O disco é lido numa thread (`asyncio.to_thread`), em blocos,
+        então um disco lento não atrasa o consumidor nem as outras fontes.
+        """
+        while not await asyncio.to_thread(os.path.exists, path):
+            await asyncio.sleep(TAIL_POLL_INTERVAL)
+        f = await asyncio.to_thread(open, path, 'rb')
+        try:
+            if not from_start:
+                await asyncio.to_thread(f.seek, 0, os.SEEK_END)
+            partial = b''
+            while True:
+                data = await asyncio.to_thread(_read_appended, f, path)
+                if not data:
+                    await asyncio.sleep(TAIL_POLL_INTERVAL)
+                    continue
+                *lines, partial = (partial + data).split(b'\n')
+                for line in lines:
+                    await self.put_line(line)
+        finally:
+            f.close()
+
+    async def read_stream(self, reader):
+        while line := await reader.readline():
+            await self.put_line(line)
+
+    async def read_stdin(self):
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        await self.read_stream(reader)
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            await self.read_stream(reader)
+        finally:
+            writer.close()
+
+    async def serve_unix(self, path):
+        if os.path.exists(path):
+            os.unlink(path)
+        server = await asyncio.start_unix_server(self._handle_connection, path)
+        self._servers.append(server)
+        await server.serve_forever()
+
+    async def serve_tcp(self, host, port):
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        self._servers.append(server)
+        await server.serve_forever()
+
+    def source(self, spec):
+        """Corrotina da fonte descrita por `spec` (veja o docstring do módulo)."""
+        kind, _, target = spec.partition(':')
+        if kind == 'file':
+            return self.tail_file(target)
+        if kind == 'stdin':
+            return self.read_stdin()
+        if kind == 'unix':
+            return self.serve_unix(target)
+        if kind == 'tcp':
+            host, _, port = target.rpartition(':')
+            if host not in ('127.0.0.1', 'localhost', '::1'):
+                raise ValueError(f"Só fontes TCP locais são aceitas: {spec}")
+            return self.serve_tcp(host, int(port))
+        raise ValueError(f"Fonte desconhecida: {spec}")
+
+    # --- Execução ---
+
+    async def run(self, specs=()):
+        """Roda o consumidor e as fontes no laço atual até ser cancelado."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(self._queue_size)
+        sources = [self.source(spec) for spec in specs]
+        try:
+            await asyncio.gather(self._consume(), *sources)
+        finally:
+            for server in self._servers:
+                server.close()
+
+    def start(self, specs=()):
+        """Roda `run` num laço próprio em uma thread daemon; retorna o próprio Ingestor."""
+        ready = threading.Event()
+
+        def target():
+            async def main():
+                task = asyncio.ensure_future(self.run(specs))
+                await asyncio.sleep(0)
+                ready.set()
+                await task
+            asyncio.run(main())
+
+        threading.Thread(target=target, name='ingest', daemon=True).start()
+        ready.wait()
+        return self
+
+    def submit(self, result, timeout=1.0):
+        """
+        Enfileira um resultado de outra thread (ex.: botão do Streamlit) e espera
+        até `timeout` segundos que ele esteja em `state`.
+        """
+        return self.submit_codes(bytes((RESULT_CODES[result],)), timeout)
+
+    def submit_codes(self, codes, timeout=1.0):
+        """Como `submit`, para vários códigos (bytes, do mais antigo ao mais recente)."""
+        target = asyncio.run_coroutine_threadsafe(self.put(codes), self._loop).result()
+        with self._published:
+            return self._published.wait_for(lambda: self.metrics.applied >= target, timeout)
+
+    def _call(self, func):
+        """
+        Roda `func` no laço da ingestão, entre duas rajadas, e espera terminar
+        (de outra thread). Retorna o resultado de `func`; uma exceção dela é
+        levantada aqui, em quem chamou.
+        """
+        async def call():
+            return func()
+
+        return asyncio.run_coroutine_threadsafe(call(), self._loop).result()
+
+    def reset(self):
+        """Recomeça com histórico vazio (de outra thread)."""
+        def clear():
+            if self.result_log is not None:
+                self.log_version = self.result_log.clear()
+            self.analyzer = IncrementalAnalyzer()
+            self.audit = AuditTrail()
+            analysis = self.analyzer.analysis()
+            self._publish(FeedState(self.state.rounds, b'', analysis, 'none', "N/A", 0, False))
+
+        self._call(clear)
+
+    def undo(self, count=1, expected=None):
+        """
+        Desfaz os `count` últimos resultados (de outra thread); retorna quantos
+        foram desfeitos. StaleLogError, sem desfazer nada, se o estado não for
+        mais `expected` ou se o log mudou fora da ingestão.
+        """
+        def undo():
+            self._check(expected)
+            undone = min(count, self.analyzer.undo_depth)
+            if self.result_log is not None:
+                self.log_version = self.result_log.undo(undone, expected=self.log_version)
+            undo_rounds(self.analyzer, self.audit, undone)
+            self._publish_analysis(self.state.rounds - undone, self.audit.hit_at(self.analyzer.rounds) is False)
+            return undone
+
+        return self._call(undo)
+
+    def replace(self, index, result, expected=None):
+        """
+        Troca o resultado da posição `index` (0 = mais recente) e refaz as
+        rodadas seguintes (de outra thread). StaleLogError como em `undo`.
+        """
+        def replace():
+            self._check(expected)
+            if not 0 <= index < self.analyzer.undo_depth:
+                raise IndexError(f"Só as últimas {self.analyzer.undo_depth} rodadas podem ser corrigidas")
+            if self.result_log is not None:
+                self.log_version = self.result_log.replace_tail(index + 1, corrected_tail(self.analyzer, index, result),
+                                                                expected=self.log_version)
+            _, hit = replace_round(self.analyzer, self.audit, index, result)
+            self._publish_analysis(self.state.rounds, hit is False)
+
+        self._call(replace)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingere resultados de fontes locais e imprime a sugestão.")
+    parser.add_argument('sources', nargs='+', help="file:CAMINHO, stdin, unix:CAMINHO ou tcp:127.0.0.1:PORTA")
+    parser.add_argument('--log-dir', help="Grava os resultados no log do app nesta pasta")
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE)
+    parser.add_argument('--report-every', type=float, default=5.0, help="Segundos entre relatórios")
+    args = parser.parse_args(argv)
+
+    result_log = None
+    results = None
+    if args.log_dir:
+        result_log = ResultLog(args.log_dir)
+        results = result_log.restore()
+    ingestor = Ingestor(results, result_log, args.queue_size)
+
+    async def report():
+        while True:
+            await asyncio.sleep(args.report_every)
+            state, m = ingestor.state, ingestor.metrics
+            suggestion = state.analysis['suggestion']
+            print(f"{m.applied} aplicados em {m.bursts} passadas (maior rajada {m.max_burst}) | "
+                  f"fila {m.queue_depth}/{args.queue_size} (máx {m.max_queue_depth}) | "
+                  f"esperas {m.blocked_puts} ({m.blocked_seconds:.2f}s) | atraso {m.last_lag * 1000:.1f} ms | "
+                  f"{suggestion['suggestion'].replace('**', '')} ({suggestion['confidence']}%)", flush=True)
+
+    async def run():
+        await asyncio.gather(ingestor.run(args.sources), report())
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if result_log is not None:
+            result_log.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,373 @@
+"""
+Registro durável dos resultados em disco, só com acréscimos.
+
+Cada resultado ocupa um byte (0/1/2) em `results.log`. Uma thread grava em
+lotes e chama fsync a cada `sync_interval` segundos, sem bloquear quem chama
+`append`. A cada `checkpoint_every` resultados é gravado `checkpoint.bin` com
+o histórico armazenado (até MAX_HISTORY_TO_STORE) e a posição no log, então a
+restauração lê o checkpoint e só o trecho final do log, com tempo constante
+por maior que o log fique. Desfazer resultados (`undo`) trunca o final do log
+e regrava o checkpoint a partir dos últimos bytes, também em tempo constante.
+
+O log é a fonte única do histórico de todas as sessões do processo. Cada
+escrita devolve a nova versão (LogVersion: `epoch` muda quando o log é
+reescrito, ao desfazer ou limpar, e `length` conta os resultados). Uma sessão
+guarda a versão que conhece, lê com `changes_since` o que as outras
+acrescentaram e, passando `expected` na escrita (acrescentar, desfazer ou
+`replace_tail`), recebe StaleLogError em vez de gravar sobre um log que mudou
+desde então. O final do log (RECENT_CODES)
+fica também em memória, então essas leituras não esperam o disco.
+"""
+import atexit
+import collections
+import os
+import queue
+import re
+import struct
+import threading
+import time
+import zlib
+
+from analysis_core import MAX_HISTORY_TO_STORE, RESULT_CODES, RESULT_TYPES, UNDO_DEPTH, HistoryBuffer
+
+LOG_MAGIC = b'FSRLOG1\n'
+CHECKPOINT_MAGIC = b'FSCKPT1\n'
+_CHECKPOINT_HEADER = struct.Struct('<8sQI')  # magic, posição no log, quantidade
+_INVALID_CODE = re.compile(rb'[^\x00-\x02]')
+_CLEAR = object()
+_STOP = object()
+_UNDO = object()
+
+RECENT_CODES = MAX_HISTORY_TO_STORE + UNDO_DEPTH  # Final do log mantido em memória para as sessões
+LogVersion = collections.namedtuple('LogVersion', 'epoch length')
+
+class StaleLogError(RuntimeError):
+    """O log mudou (outra sessão ou a ingestão) desde a versão que quem escreve conhecia."""
+
+def iter_log_chunks(path, chunk_size=1024 * 1024):
+    """
+    Códigos válidos de um arquivo de log (atual ou arquivado) em blocos de até
+    `chunk_size` bytes, do mais antigo ao mais recente; para no primeiro byte
+    inválido. A memória usada não depende do tamanho do log.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(LOG_MAGIC)) != LOG_MAGIC:
+            raise ValueError(f"{path} não é um log de resultados")
+        while chunk := f.read(chunk_size):
+            invalid = _INVALID_CODE.search(chunk)
+            if invalid:
+                if invalid.start():
+                    yield chunk[:invalid.start()]
+                return
+            yield chunk
+
+def read_log_codes(path):
+    """Todos os códigos válidos de um arquivo de log, do mais antigo ao mais recente."""
+    return b''.join(iter_log_chunks(path))
+
+class ResultLog:
+    """Log de resultados com checkpoint, compartilhado por todas as sessões do processo."""
+
+    def __init__(self, directory, checkpoint_every=256, sync_interval=0.2):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.log_path = os.path.join(directory, 'results.log')
+        self.checkpoint_path = os.path.join(directory, 'checkpoint.bin')
+        self.checkpoint_every = checkpoint_every
+        self.sync_interval = sync_interval
+
+        # Estado da thread de escrita: espelho do histórico já gravado
+        self._history, offset, self._since_checkpoint = self._load()
+        if not self._has_header():
+            with open(self.log_path, 'wb') as f:
+                f.write(LOG_MAGIC)
+            offset = len(LOG_MAGIC)
+        self._file = open(self.log_path, 'ab')
+        if self._file.tell() > offset:
+            self._file.truncate(offset)  # Descarta um final corrompido
+        if self._since_checkpoint >= self.checkpoint_every or self._file.tell() < offset:
+            self._write_checkpoint()
+
+        # Estado de quem chama: versão e final do log, já contando o que está na fila
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self._length = self._file.tell() - len(LOG_MAGIC)
+        self._recent = bytearray(self._tail(RECENT_CODES))
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='result-log', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)  # Não perde o último lote ao encerrar o servidor
+
+    # --- API usada pela interface ---
+
+    @property
+    def version(self):
+        return LogVersion(self._epoch, self._length)
+
+    def append(self, result, expected=None):
+        """
+        Enfileira um resultado para gravação, sem esperar o disco, e retorna a
+        nova versão. Com `expected`, só grava se o log ainda estiver nessa
+        versão; senão levanta StaleLogError.
+        """
+        return self.extend(bytes((RESULT_CODES[result],)), expected)
+
+    def extend(self, codes, expected=None):
+        """Como `append`, para vários códigos (bytes, do mais antigo ao mais recente)."""
+        codes = bytes(codes)
+        with self._lock:
+            self._check(expected)
+            if codes:
+                self._queue.put(codes if len(codes) > 1 else codes[0])
+                self._appended(codes)
+            return self.version
+
+    def clear(self):
+        """Arquiva o log atual e recomeça vazio; retorna a nova versão."""
+        with self._lock:
+            self._queue.put(_CLEAR)
+            self._epoch += 1
+            self._length = 0
+            self._recent.clear()
+            return self.version
+
+    def undo(self, count=1, expected=None):
+        """
+        Remove os `count` resultados mais recentes do log (em segundo plano);
+        retorna a nova versão. Com `expected`, como em `append`.
+        """
+        with self._lock:
+            self._check(expected)
+            self._undone(count)
+            return self.version
+
+    def replace_tail(self, count, codes, expected=None):
+        """Troca os `count` resultados mais recentes por `codes` de uma vez (corrigir um resultado)."""
+        codes = bytes(codes)
+        with self._lock:
+            self._check(expected)
+            self._undone(count)
+            if codes:
+                self._queue.put(codes if len(codes) > 1 else codes[0])
+                self._appended(codes)
+            return self.version
+
+    def flush(self):
+        """Espera até que tudo o que foi enfileirado esteja gravado."""
+        self._queue.join()
+
+    def restore(self):
+        """Histórico (HistoryBuffer) com tudo o que já foi registrado."""
+        self.flush()
+        history, _, _ = self._load()
+        return history
+
+    def recent_codes(self, count):
+        """Os últimos `count` códigos registrados (bytes, do mais antigo ao mais recente)."""
+        return self.snapshot(count)[1]
+
+    def snapshot(self, count):
+        """(versão, últimos `count` códigos), lidos juntos; da memória quando cabem nela."""
+        with self._lock:
+            if count <= len(self._recent) or len(self._recent) == self._length:
+                return self.version, bytes(self._recent[-count:]) if count > 0 else b''
+            # Depois de desfazer muitos resultados, o trecho anterior só está no disco
+            self.flush()
+            return self.version, self._tail(count)
+
+    def changes_since(self, version):
+        """
+        (códigos acrescentados depois de `version`, versão atual). Os códigos
+        são None se o log foi reescrito desde então (desfazer, limpar) ou se o
+        trecho já saiu da memória: quem chama relê com `snapshot`.
+        """
+        with self._lock:
+            added = self._length - version.length
+            if version.epoch != self._epoch or not 0 <= added <= len(self._recent):
+                return None, self.version
+            return (bytes(self._recent[-added:]) if added else b''), self.version
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._file.close()
+        atexit.unregister(self.close)
+
+    # --- Versão (com o lock) ---
+
+    def _check(self, expected):
+        if expected is not None and expected != self.version:
+            raise StaleLogError("O histórico mudou em outra sessão desde a última leitura")
+
+    def _undone(self, count):
+        count = min(count, self._length)
+        if count > 0:
+            self._queue.put((_UNDO, count))
+            del self._recent[-count:]
+            self._length -= count
+            self._epoch += 1
+
+    def _appended(self, codes):
+        self._recent += codes
+        del self._recent[:-RECENT_CODES]
+        self._length += len(codes)
+
+    # --- Leitura ---
+
+    def _read_checkpoint(self):
+        """(posição no log, códigos do mais antigo ao mais recente) ou None."""
+        try:
+            with open(self.checkpoint_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < _CHECKPOINT_HEADER.size + 4:
+            return None
+        magic, offset, count = _CHECKPOINT_HEADER.unpack_from(data)
+        body = data[:-4]
+        (crc,) = struct.unpack('<I', data[-4:])
+        if magic != CHECKPOINT_MAGIC or zlib.crc32(body) != crc or len(body) != _CHECKPOINT_HEADER.size + count:
+            return None
+        return offset, body[_CHECKPOINT_HEADER.size:]
+
+    def _has_header(self):
+        try:
+            with open(self.log_path, 'rb') as f:
+                return f.read(len(LOG_MAGIC)) == LOG_MAGIC
+        except FileNotFoundError:
+            return False
+
+    def _tail(self, count):
+        """Lê só o final do log: os últimos `count` códigos válidos."""
+        try:
+            with open(self.log_path, 'rb') as f:
+                end = f.seek(0, os.SEEK_END)
+                f.seek(max(len(LOG_MAGIC), end - count))
+                tail = f.read()
+        except FileNotFoundError:
+            return b''
+        invalid = _INVALID_CODE.search(tail)
+        return tail[:invalid.start()] if invalid else tail
+
+    def _load(self):
+        """
+        Reconstrói o histórico a partir do checkpoint e do trecho final do log.
+        Retorna (histórico, posição válida no fim do log, resultados após o checkpoint).
+        """
+        history = HistoryBuffer()
+        checkpoint = self._read_checkpoint()
+        if checkpoint is None:
+            offset = len(LOG_MAGIC)
+        else:
+            offset, codes = checkpoint
+            history.extend_codes(codes)
+
+        tail = b''
+        try:
+            with open(self.log_path, 'rb') as f:
+                if f.read(len(LOG_MAGIC)) == LOG_MAGIC:
+                    f.seek(offset)
+                    tail = f.read()
+                else:
+                    offset = len(LOG_MAGIC)
+        except FileNotFoundError:
+            offset = len(LOG_MAGIC)
+
+        # Gravação interrompida: o que vem depois do primeiro byte inválido é descartado
+        invalid = _INVALID_CODE.search(tail)
+        valid = invalid.start() if invalid else len(tail)
+        history.extend_codes(tail[:valid])
+        return history, offset + valid, valid
+
+    # --- Escrita (thread de gravação) ---
+
+    def _write_checkpoint(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        codes = self._history.codes()[::-1]
+        body = _CHECKPOINT_HEADER.pack(CHECKPOINT_MAGIC, self._file.tell(), len(codes)) + codes
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(body + struct.pack('<I', zlib.crc32(body)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+        self._since_checkpoint = 0
+
+    def _rotate(self):
+        self._file.close()
+        archive = os.path.join(self.directory, time.strftime('results-%Y%m%d-%H%M%S.log'))
+        os.replace(self.log_path, archive)
+        self._file = open(self.log_path, 'wb')
+        self._file.write(LOG_MAGIC)
+        self._history.clear()
+        self._write_checkpoint()
+
+    def _truncate(self, count):
+        """Descarta os últimos `count` resultados gravados e refaz o espelho e o checkpoint."""
+        self._file.flush()
+        end = self._file.tell()
+        self._file.truncate(max(len(LOG_MAGIC), end - count))
+        self._file.seek(0, os.SEEK_END)  # Em modo de acréscimo, `tell` seguiria no fim antigo
+        self._history.clear()
+        self._history.extend_codes(self._tail(self._history.capacity))
+        self._write_checkpoint()
+
+    def _run(self):
+        pending = bytearray()
+        unacked = 0  # Itens retirados da fila que ainda não chegaram ao disco
+        last_sync = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.sync_interval if pending else None)
+            except queue.Empty:
+                item = None
+            idle = item is None
+            batch = [] if idle else [item]
+            while True:  # Junta tudo o que já está na fila
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            unacked += len(batch)
+
+            stop = False
+            for item in batch:
+                if item is _STOP:
+                    stop = True
+                elif item is _CLEAR:
+                    self._file.write(pending)
+                    pending.clear()
+                    self._rotate()
+                elif isinstance(item, tuple):  # (_UNDO, quantidade)
+                    self._file.write(pending)
+                    pending.clear()
+                    self._truncate(item[1])
+                elif isinstance(item, bytes):
+                    pending += item
+                    self._history.extend_codes(item)
+                    self._since_checkpoint += len(item)
+                else:
+                    pending.append(item)
+                    self._history.append(RESULT_TYPES[item])
+                    self._since_checkpoint += 1
+
+            now = time.monotonic()
+            if pending and (idle or stop or now - last_sync >= self.sync_interval):
+                self._file.write(pending)
+                pending.clear()
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                last_sync = now
+                if self._since_checkpoint >= self.checkpoint_every:
+                    self._write_checkpoint()
+
+            if not pending:
+                for _ in range(unacked):
+                    self._queue.task_done()
+                unacked = 0
+            if stop:
+                return
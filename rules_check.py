@@ -0,0 +1,254 @@
+"""
+Conferência do motor de regras com a implementação original da sugestão.
+
+`reference_suggestion` é a cadeia de if/elif que `generate_advanced_suggestion`
+tinha antes das regras virarem dados. A conferência roda históricos
+aleatórios (independentes e com dependência de Markov, para os padrões
+aparecerem) e compara as sugestões rodada a rodada, com e sem os sinais
+opcionais (janela longa e transições). Só vale para DEFAULT_RULES.
+A mesma conferência roda com o pytest em test_rules.py.
+
+Uso:
+    python rules_check.py --rounds 20000
+    python rules_check.py --dump regras.json   # ponto de partida para um conjunto novo
+"""
+import argparse
+import collections
+import json
+import random
+import sys
+
+import analysis_core as core
+from analysis_core import (
+    MARKOV_MIN_SAMPLES,
+    MARKOV_MIN_SHARE,
+    MIN_RESULTS_FOR_SUGGESTION,
+    NUM_RECENT_RESULTS_FOR_ANALYSIS,
+    RESULT_TYPES,
+    _ZIG_ZAG_IDS,
+    get_color,
+    get_color_emoji,
+    get_result_emoji,
+    pattern_label,
+)
+
+def reference_suggestion(results, surf_analysis, color_analysis, break_patterns, break_probability, draw_specifics,
+                         long_window=None, markov=None):
+    """
+    Implementação original de `generate_advanced_suggestion`, regra por regra
+    em if/elif, com as pontuações de DEFAULT_RULES escritas no código.
+    """
+    if not results or len(results) < MIN_RESULTS_FOR_SUGGESTION: 
+        return {'suggestion': f'Aguardando no mínimo {MIN_RESULTS_FOR_SUGGESTION} resultados para análise detalhada.', 'confidence': 0, 'reason': '', 'guarantee_pattern': 'N/A', 'bet_type': 'none'}
+
+    last_result = results[0]
+    last_result_color = get_color(last_result)
+    current_streak = color_analysis['streak']
+    
+    bet_scores = {'home': 0, 'away': 0, 'draw': 0}
+    reasons = collections.defaultdict(list)
+    guarantees = collections.defaultdict(list)
+
+    # --- Nível 1: Sugestões de Alta Confiança (Pontuação 100+) ---
+
+    # 1. Quebra de Sequência Longa (Surf Max)
+    if last_result_color == 'red' and current_streak >= surf_analysis['max_home_sequence'] and surf_analysis['max_home_sequence'] > 0 and current_streak >= 3:
+        bet_scores['away'] += 120
+        reasons['away'].append(f"Sequência atual de Vermelho ({current_streak}x) atingiu ou superou o máximo histórico de surf ({surf_analysis['max_home_sequence']}x).")
+        guarantees['away'].append(f"Surf Max Quebra: {last_result_color.capitalize()}")
+    elif last_result_color == 'blue' and current_streak >= surf_analysis['max_away_sequence'] and surf_analysis['max_away_sequence'] > 0 and current_streak >= 3:
+        bet_scores['home'] += 120
+        reasons['home'].append(f"Sequência atual de Azul ({current_streak}x) atingiu ou superou o máximo histórico de surf ({surf_analysis['max_away_sequence']}x).")
+        guarantees['home'].append(f"Surf Max Quebra: {last_result_color.capitalize()}")
+    elif last_result_color == 'yellow' and current_streak >= surf_analysis['max_draw_sequence'] and surf_analysis['max_draw_sequence'] > 0 and current_streak >= 2:
+        bet_scores['home'] += 90 
+        bet_scores['away'] += 90
+        reasons['home'].append(f"Sequência atual de Empate ({current_streak}x) atingiu ou superou o máximo histórico.")
+        reasons['away'].append(f"Sequência atual de Empate ({current_streak}x) atingiu ou superou o máximo histórico.")
+        guarantees['home'].append(f"Surf Max Quebra: {last_result_color.capitalize()}")
+        guarantees['away'].append(f"Surf Max Quebra: {last_result_color.capitalize()}")
+
+    # --- Nível 2: Padrões Recorrentes e Fortes (Pontuação 70-110) ---
+
+    # Os padrões 2x1, 3x1, 2x2, Reversão de Blocos, Espelho e Red-Blue-Draw
+    # eram comparados por texto com rótulos que os detectores nunca geravam
+    # (espaçamento dos emojis, cor comparada com 'home'/'away'), então nunca
+    # pontuaram. Não entram aqui para manter as sugestões inalteradas.
+
+    # 3. Sugestão de Empate (se atrasado OU recorrente)
+    if draw_specifics['time_since_last_draw'] >= 7 and draw_specifics['draw_frequency_27'] < 12:
+        bet_scores['draw'] += 80
+        reasons['draw'].append(f"Empate não ocorre há {draw_specifics['time_since_last_draw']} rodadas e frequência baixa ({draw_specifics['draw_frequency_27']}% nos últimos 27).")
+        guarantees['draw'].append("Empate Atrasado/Baixa Frequência")
+
+    # 4. Empate Recorrente (intervalos curtos)
+    if draw_specifics['recurrent_draw'] and draw_specifics['time_since_last_draw'] <= 3: 
+        bet_scores['draw'] += 75
+        reasons['draw'].append(f"Empate é recorrente, ocorrendo em intervalos curtos.")
+        guarantees['draw'].append("Empate Recorrente")
+
+    # 5. Zig-Zag / Padrões Alternados
+    if len(results) >= 2:
+        previous_color = get_color(results[1])
+        if last_result_color == 'blue' and previous_color == 'red':
+            zig_zag_bet, zig_zag_reason = 'home', "Padrão Zig-Zag (🔵🔴...) recorrente ({}x)."
+        elif last_result_color == 'red' and previous_color == 'blue':
+            zig_zag_bet, zig_zag_reason = 'away', "Padrão Zig-Zag (🔴🔵...) recorrente ({}x)."
+        else:
+            zig_zag_bet = None
+        if zig_zag_bet:
+            for pid in _ZIG_ZAG_IDS:
+                count = break_patterns[pid]
+                if count >= 3:
+                    bet_scores[zig_zag_bet] += 80
+                    reasons[zig_zag_bet].append(zig_zag_reason.format(count))
+                    guarantees[zig_zag_bet].append(pattern_label(pid))
+
+
+    # --- Nível 3: Sugestões de Confiança Média (Pontuação 40-70) ---
+
+    # 6. Alta Probabilidade de Quebra Geral (mas sem um padrão específico forte)
+    if break_probability['break_chance'] > 60 and current_streak < 4:
+        if len(results) >= 1:
+            if last_result_color == 'red':
+                bet_scores['away'] += 50
+                reasons['away'].append(f"Alta chance de quebra geral ({break_probability['break_chance']}%). Previsão de quebra da sequência de {last_result_color.capitalize()}.")
+                guarantees['away'].append("Alta Probabilidade de Quebra Geral")
+            elif last_result_color == 'blue':
+                bet_scores['home'] += 50
+                reasons['home'].append(f"Alta chance de quebra geral ({break_probability['break_chance']}%). Previsão de quebra da sequência de {last_result_color.capitalize()}.")
+                guarantees['home'].append("Alta Probabilidade de Quebra Geral")
+
+    # 7. Divergência entre a janela curta e a longa (só com `long_window`)
+    short_total = len(results[:NUM_RECENT_RESULTS_FOR_ANALYSIS])
+    if long_window is not None and long_window.size > short_total:
+        long_share = {'red': long_window.home, 'blue': long_window.away, 'yellow': long_window.draw}
+        if last_result_color in ('red', 'blue') and current_streak >= 2:
+            short_pct = color_analysis[last_result_color] / short_total * 100
+            long_pct = long_share[last_result_color] / long_window.size * 100
+            if short_pct - long_pct >= 15:
+                opposite = 'away' if last_result_color == 'red' else 'home'
+                bet_scores[opposite] += 60
+                reasons[opposite].append(f"{last_result_color.capitalize()} em {round(short_pct, 2)}% nos últimos {short_total} contra {round(long_pct, 2)}% nos últimos {long_window.size}.")
+                guarantees[opposite].append(f"Divergência de Janelas ({short_total}/{long_window.size})")
+        long_draw_pct = long_window.draw / long_window.size * 100
+        if draw_specifics['time_since_last_draw'] >= 7 and long_draw_pct - draw_specifics['draw_frequency_27'] >= 8:
+            bet_scores['draw'] += 40
+            reasons['draw'].append(f"Frequência de empate de {draw_specifics['draw_frequency_27']}% nos últimos {short_total} contra {round(long_draw_pct, 2)}% nos últimos {long_window.size}.")
+            guarantees['draw'].append(f"Divergência de Janelas ({short_total}/{long_window.size})")
+
+    # 8. Transições do histórico: o que veio depois do contexto atual (só com `markov`)
+    if markov is not None:
+        samples = sum(markov.counts)
+        if samples >= MARKOV_MIN_SAMPLES:
+            best = max(range(3), key=lambda code: markov.counts[code])
+            share = markov.counts[best] / samples * 100
+            if share >= MARKOV_MIN_SHARE:
+                bet_type = RESULT_TYPES[best]
+                bet_scores[bet_type] += 70
+                reasons[bet_type].append(f"Após {markov.context} veio {get_result_emoji(bet_type)} em {markov.counts[best]} de {samples} vezes ({round(share, 2)}%).")
+                guarantees[bet_type].append(f"Transição Markov Ordem {markov.order}")
+
+    # --- Determinar a Melhor Sugestão ---
+    max_score = 0
+    best_bet_type = 'none'
+
+    for bet_type, score in bet_scores.items():
+        if score > max_score:
+            max_score = score
+            best_bet_type = bet_type
+        elif score == max_score and best_bet_type == 'draw' and bet_type != 'draw':
+            best_bet_type = bet_type
+
+    final_suggestion = "Manter observação."
+    final_confidence = 50
+    final_reason = "Nenhum padrão de 'garantia' forte detectado nos últimos 27 resultados para uma aposta segura no momento."
+    final_guarantee = "Nenhum Padrão Forte"
+    
+    if best_bet_type != 'none' and max_score > 0:
+        final_confidence = min(100, max_score)
+        
+        if best_bet_type == 'home':
+            final_suggestion = f"APOSTAR em **CASA** {get_color_emoji('red')} {get_result_emoji('home')}"
+        elif best_bet_type == 'away':
+            final_suggestion = f"APOSTAR em **VISITANTE** {get_color_emoji('blue')} {get_result_emoji('away')}"
+        elif best_bet_type == 'draw':
+            final_suggestion = f"APOSTAR em **EMPATE** {get_color_emoji('yellow')} {get_result_emoji('draw')}"
+        
+        final_reason = ". ".join(sorted(list(set(reasons[best_bet_type]))))
+        final_guarantee = " | ".join(sorted(list(set(guarantees[best_bet_type]))))
+        if not final_reason:
+            final_reason = "Padrões identificados indicam alta probabilidade."
+        if not final_guarantee:
+            final_guarantee = "Padrão de pontuação geral."
+
+
+    return {
+        'suggestion': final_suggestion, 
+        'confidence': round(final_confidence), 
+        'reason': final_reason,
+        'guarantee_pattern': final_guarantee,
+        'bet_type': best_bet_type
+    }
+
+# Probabilidades de casa/visitante/empate dos históricos gerados: independentes
+# ou dependentes do resultado anterior (alternância e sequências longas)
+_GENERATORS = {
+    'independente': {None: (45, 45, 10)},
+    'empates': {None: (35, 35, 30)},
+    'alternado': {0: (15, 80, 5), 1: (80, 15, 5), 2: (45, 45, 10)},
+    'sequências': {0: (85, 10, 5), 1: (10, 85, 5), 2: (30, 30, 40)},
+}
+
+def _generate(rnd, kind, rounds):
+    weights = _GENERATORS[kind]
+    previous = None
+    for _ in range(rounds):
+        previous = rnd.choices(range(3), weights=weights.get(previous, weights.get(None, (45, 45, 10))))[0]
+        yield previous
+
+def check(rounds, seed, long_window=None, markov=False):
+    """Rodadas comparadas e lista de divergências (gerador, rodada, motor, referência)."""
+    rnd = random.Random(seed)
+    mismatches = []
+    compared = 0
+    for kind in _GENERATORS:
+        analyzer = core.IncrementalAnalyzer()
+        for index, code in enumerate(_generate(rnd, kind, rounds)):
+            analyzer.push(RESULT_TYPES[code])
+            analysis = analyzer.analysis(cache=None, long_window=long_window, markov=markov)
+            window = [RESULT_TYPES[c] for c in analyzer.window]
+            expected = reference_suggestion(
+                window, analysis['surf_analysis'], analysis['color_analysis'], analysis['break_patterns'],
+                analysis['break_probability'], analysis['draw_specifics'],
+                analyzer.prefix.window(long_window) if long_window else None,
+                analyzer.markov.signal() if markov else None)
+            compared += 1
+            if analysis['suggestion'] != expected:
+                mismatches.append((kind, index, analysis['suggestion'], expected))
+    return compared, mismatches
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Confere o motor de regras com a implementação original.")
+    parser.add_argument('--rounds', type=int, default=5000, help="Rodadas por tipo de histórico")
+    parser.add_argument('--seed', type=int, default=27)
+    parser.add_argument('--dump', metavar='ARQUIVO', help="Grava DEFAULT_RULES em JSON e sai")
+    args = parser.parse_args(argv)
+
+    if args.dump:
+        with open(args.dump, 'w', encoding='utf-8') as f:
+            json.dump(core.DEFAULT_RULES, f, ensure_ascii=False, indent=2)
+        return 0
+
+    failed = False
+    for long_window, markov in ((None, False), (500, False), (None, True), (100, True)):
+        compared, mismatches = check(args.rounds, args.seed, long_window, markov)
+        print(f"janela longa {long_window or '-'}, markov {'sim' if markov else 'não'}: "
+              f"{len(mismatches)} divergências em {compared} rodadas")
+        for kind, index, got, expected in mismatches[:5]:
+            print(f"  {kind} #{index}: motor {got} | referência {expected}")
+        failed = failed or bool(mismatches)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Teste de carga da memória por sessão do adm.py.
+
+Simula centenas de sessões com o histórico cheio em dois formatos de
+`st.session_state`:
+
+    lista    o formato original: `results` como lista de strings e a análise
+             completa de `update_analysis` em cada sessão, com os textos dos
+             padrões já formatados
+    compacto o formato atual (adm.SESSION_KEYS): só o IncrementalAnalyzer, de
+             tamanho fixo, e os campos da sugestão pendente; a análise é lida
+             do ANALYSIS_CACHE, compartilhado, só quando um painel é exibido
+
+Para cada formato mostra os bytes por sessão (objetos alcançáveis pelo estado
+da sessão, sem o que é compartilhado), a memória total alocada pelo processo
+por sessão (tracemalloc, incluindo o cache) e o tempo de uma rodada.
+
+O estado compacto tem tamanho fixo (~11 KiB, veja tables.py) e não cresce
+com o conteúdo do histórico; antes dos arrays circulares ele passava de
+90 KiB, e com as somas acumuladas e o índice de transições sempre
+montados, 27 KiB. Ele ocupa menos que a lista de strings
+(ponteiros para strings compartilhadas e a análise da sessão, ~19 KiB),
+que ainda exige refazer a análise inteira a cada rodada.
+
+Uso: python sessions.py --sessions 500 [--rounds 20] [--history 1000]
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+
+import analysis_core as core
+from diagnostics import deep_sizeof
+
+WEIGHTS = (45, 45, 10)
+
+def _remember(state, suggestion):
+    state['last_suggested_bet_type'] = suggestion['bet_type']
+    state['last_guarantee_pattern'] = suggestion['guarantee_pattern']
+    state['last_suggestion_confidence'] = suggestion['confidence']
+
+def _check_guarantee(state, result):
+    if state['last_suggested_bet_type'] != 'none' and state['last_suggestion_confidence'] >= 70:
+        state['guarantee_failed'] = not core.check_guarantee_status(
+            state['last_suggested_bet_type'], result, state['last_guarantee_pattern'])
+    else:
+        state['guarantee_failed'] = False
+
+# --- Formato original: lista de strings e análise por sessão ---
+
+def _list_analysis(results):
+    analysis = core.update_analysis(results)
+    analysis['break_patterns'] = analysis['break_patterns'].labels()
+    analysis['draw_specifics'] = dict(analysis['draw_specifics'],
+                                      draw_patterns=analysis['draw_specifics']['draw_patterns'].labels())
+    return analysis
+
+def new_list_session(results):
+    """`results` é uma lista de strings, mais recente primeiro."""
+    state = {'results': results, 'analysis_data': _list_analysis(results), 'guarantee_failed': False}
+    _remember(state, state['analysis_data']['suggestion'])
+    return state
+
+def list_add_result(state, result):
+    _check_guarantee(state, result)
+    state['results'].insert(0, result)
+    del state['results'][core.MAX_HISTORY_TO_STORE:]
+    state['analysis_data'] = _list_analysis(state['results'])
+    _remember(state, state['analysis_data']['suggestion'])
+
+# --- Formato compacto: o do adm.py ---
+
+def new_compact_session(codes):
+    """`codes` são bytes, do mais antigo ao mais recente."""
+    state = {'analyzer': core.IncrementalAnalyzer.from_codes(codes), 'guarantee_failed': False}
+    _remember(state, state['analyzer'].analysis()['suggestion'])
+    return state
+
+def compact_add_result(state, result):
+    _check_guarantee(state, result)
+    state['analyzer'].push(result)
+    _remember(state, state['analyzer'].analysis()['suggestion'])
+
+FORMATS = {
+    'lista': (lambda codes: new_list_session([core.RESULT_TYPES[c] for c in reversed(codes)]), list_add_result),
+    'compacto': (new_compact_session, compact_add_result),
+}
+
+def measure(name, histories, rounds, seed):
+    """Memória por sessão e tempo por rodada de um formato."""
+    create, add_result = FORMATS[name]
+    core.ANALYSIS_CACHE.clear()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [create(codes) for codes in histories]
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    per_session = sum(deep_sizeof(state) for state in sessions) / len(sessions)
+
+    rnd = random.Random(seed)
+    timings = []
+    for _ in range(rounds):
+        for state in sessions:
+            result = rnd.choices(core.RESULT_TYPES, weights=WEIGHTS)[0]
+            start = time.perf_counter()
+            add_result(state, result)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        'session_bytes': per_session,
+        'process_bytes': allocated / len(sessions),
+        'p50_ms': timings[len(timings) // 2] * 1000 if timings else 0,
+        'p99_ms': timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000 if timings else 0,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memória por sessão e tempo por rodada com muitas sessões.")
+    parser.add_argument('--sessions', type=int, default=500)
+    parser.add_argument('--history', type=int, default=core.MAX_HISTORY_TO_STORE, help="Resultados já registrados por sessão")
+    parser.add_argument('--rounds', type=int, default=20, help="Rodadas por sessão no teste de tempo")
+    parser.add_argument('--seed', type=int, default=27)
+    args = parser.parse_args(argv)
+
+    rnd = random.Random(args.seed)
+    histories = [bytes(rnd.choices(range(3), weights=WEIGHTS, k=args.history)) for _ in range(args.sessions)]
+    print(f"{args.sessions} sessões com {args.history} resultados cada")
+
+    reports = {name: measure(name, histories, args.rounds, args.seed) for name in FORMATS}
+    for name, report in reports.items():
+        print(f"  {name:9} estado {report['session_bytes'] / 1024:7.1f} KiB/sessão | "
+              f"processo {report['process_bytes'] / 1024:7.1f} KiB/sessão | "
+              f"rodada p50 {report['p50_ms']:.3f} ms, p99 {report['p99_ms']:.3f} ms")
+    compact, listed = reports['compacto'], reports['lista']
+    print(f"Compacto: estado {compact['session_bytes'] / max(1, listed['session_bytes']):.2f}x o da lista, "
+          f"rodada {listed['p50_ms'] / max(compact['p50_ms'], 1e-9):.1f}x mais rápida")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
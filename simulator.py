@@ -0,0 +1,269 @@
+"""
+Simulação de Monte Carlo das sugestões contra apostadores ao acaso.
+
+Gera com NumPy muitas sequências sintéticas independentes de uma vez, com
+probabilidades de casa/visitante/empate configuráveis (--probs) e, se
+pedido, dependência de Markov de ordem 1 (--markov: uma linha de
+probabilidades por resultado anterior). As sugestões de cada rodada vêm de
+`backtest.suggest`, a versão vetorizada de `generate_advanced_suggestion` com
+DEFAULT_RULES, em blocos de sequências (cada uma com o histórico vazio no
+início), e cada aposta é conferida com o resultado seguinte da mesma sequência.
+Como ela só reproduz DEFAULT_RULES, a simulação recusa (ValueError) regras
+ativas diferentes, em vez de pontuar outras regras sem avisar.
+
+A taxa de acerto das sugestões aparece ao lado de duas referências, todas com
+intervalo de confiança de 95% (Wilson) e a diferença com intervalo normal:
+
+    aleatório    aposta em casa, visitante ou empate com a mesma chance, nas
+                 mesmas rodadas em que houve sugestão
+    embaralhado  as mesmas apostas das sugestões, trocadas de rodada ao acaso:
+                 mesma proporção de cada tipo de aposta, sem informação da rodada
+
+Se as garantias não superam o embaralhado, os padrões não passam de acaso
+(com resultados independentes, nenhuma aposta pode superá-lo).
+
+Também serve de gerador de carga: mostra rodadas/s da geração e da sugestão
+vetorizada e passa as N primeiras sequências (--analyzer N, 1 por padrão, 0
+desliga) pelo caminho da página (IncrementalAnalyzer, push e análise sem
+cache), mede as rodadas/s e confere as sugestões com as vetorizadas; com
+alguma divergência o comando sai com código 1.
+
+Uso: python simulator.py [--rounds 1000000] [--length 10000] [--probs 0.45 0.45 0.10]
+                         [--markov H H H A A A D D D] [--analyzer 1] [--json simulacao.json]
+"""
+import argparse
+import json
+import math
+import sys
+import time
+
+import numpy as np
+
+import analysis_core as core
+from audit import TRACKED_CONFIDENCE
+from backtest import BET_NONE, BET_TYPES, suggest
+
+DEFAULT_PROBS = (0.45, 0.45, 0.10)
+DEFAULT_SEED = 27
+BATCH_ROUNDS = 1 << 20  # Rodadas sugeridas por vez (limita a memória dos arrays de trabalho)
+Z_95 = 1.959963984540054
+BASELINES = ('aleatório', 'embaralhado')
+ANALYZER_SEQUENCES = 1  # Sequências conferidas com o IncrementalAnalyzer por padrão
+
+def _normalize(probs):
+    probs = np.asarray(probs, dtype=np.float64)
+    if probs.shape[-1] != 3 or (probs < 0).any() or (probs.sum(axis=-1) <= 0).any():
+        raise ValueError("As probabilidades são três valores >= 0 (casa, visitante, empate) com soma positiva")
+    return probs / probs.sum(axis=-1, keepdims=True)
+
+def generate(rng, sequences, length, probs=DEFAULT_PROBS, transition=None):
+    """
+    Array uint8 (sequences, length) de códigos 0/1/2, mais antigo primeiro.
+    Sem `transition`, cada resultado é sorteado com `probs`; com ela (3x3, linha =
+    resultado anterior), só o primeiro de cada sequência usa `probs`.
+    """
+    cumulative = np.cumsum(_normalize(probs))
+    draws = rng.random((sequences, length))
+    if transition is None:
+        return np.minimum(np.searchsorted(cumulative, draws, side='right'), 2).astype(np.uint8)
+    rows = np.cumsum(_normalize(transition), axis=1)
+    codes = np.empty((sequences, length), dtype=np.uint8)
+    codes[:, 0] = np.minimum(np.searchsorted(cumulative, draws[:, 0], side='right'), 2)
+    # Uma coluna por vez, todas as sequências juntas
+    for t in range(1, length):
+        codes[:, t] = np.minimum((draws[:, t, None] >= rows[codes[:, t - 1]]).sum(axis=1), 2)
+    return codes
+
+def wilson(hits, total, z=Z_95):
+    """Intervalo de confiança (Wilson) da proporção hits/total."""
+    if not total:
+        return 0.0, 0.0
+    rate = hits / total
+    center = (rate + z * z / (2 * total)) / (1 + z * z / total)
+    margin = z * math.sqrt(rate * (1 - rate) / total + z * z / (4 * total * total)) / (1 + z * z / total)
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+def difference(hits, other_hits, total, z=Z_95):
+    """Diferença entre duas taxas com `total` apostas cada e o intervalo normal dela."""
+    if not total:
+        return 0.0, 0.0, 0.0
+    a, b = hits / total, other_hits / total
+    margin = z * math.sqrt((a * (1 - a) + b * (1 - b)) / total)
+    return a - b, a - b - margin, a - b + margin
+
+class _Tally:
+    """Apostas e acertos das sugestões e das referências, somados entre os blocos."""
+
+    def __init__(self):
+        self.bets = 0
+        self.hits = 0
+        self.baseline_hits = dict.fromkeys(BASELINES, 0)
+        self.tracked_bets = 0
+        self.tracked_hits = 0
+        self.by_bet = {}  # Tipo de aposta -> [apostas, acertos]
+        self.by_guarantee = {}  # Padrão de garantia -> [apostas, acertos]
+
+    def add(self, rng, codes, s, length):
+        # A última rodada de cada sequência não tem resultado seguinte nela
+        following = np.roll(codes, -1)
+        scored = (np.arange(len(codes)) % length) != length - 1
+        bet = s['bet']
+        placed = scored & (bet != BET_NONE)
+        bets = bet[placed]
+        actual = following[placed]
+        hits = bets == actual
+        self.bets += len(bets)
+        self.hits += int(hits.sum())
+        self.baseline_hits['aleatório'] += int((rng.integers(0, 3, len(bets)) == actual).sum())
+        self.baseline_hits['embaralhado'] += int((rng.permutation(bets) == actual).sum())
+        tracked = s['confidence'][placed] >= TRACKED_CONFIDENCE  # A regra de add_result
+        self.tracked_bets += int(tracked.sum())
+        self.tracked_hits += int(hits[tracked].sum())
+        for key, table, labels in ((bets, self.by_bet, BET_TYPES), (s['guarantee'][placed], self.by_guarantee,
+                                                                     s['guarantee_labels'])):
+            total = np.bincount(key, minlength=len(labels))
+            good = np.bincount(key, weights=hits, minlength=len(labels))
+            for k in np.flatnonzero(total):
+                pair = table.setdefault(labels[k], [0, 0])
+                pair[0] += int(total[k])
+                pair[1] += int(good[k])
+
+def _rate_row(hits, total):
+    low, high = wilson(hits, total)
+    return {'bets': total, 'hits': hits, 'rate': hits / total if total else 0.0, 'ci': (low, high)}
+
+def check_analyzer(codes, s, length, sequences):
+    """
+    Passa as `sequences` primeiras sequências pelo IncrementalAnalyzer (push e
+    análise sem cache) e retorna (rodadas, segundos, divergências com `s`).
+    """
+    rounds = mismatches = 0
+    elapsed = 0.0
+    for i in range(min(sequences, len(codes) // length)):
+        analyzer = core.IncrementalAnalyzer()
+        start = time.perf_counter()
+        for offset, code in enumerate(codes[i * length:(i + 1) * length].tobytes()):
+            analyzer.push(core.RESULT_TYPES[code])
+            suggestion = analyzer.analysis(cache=None)['suggestion']
+            n = i * length + offset
+            mismatches += (suggestion['bet_type'] != BET_TYPES[s['bet'][n]]
+                           or suggestion['confidence'] != s['confidence'][n]
+                           or suggestion['guarantee_pattern'] != s['guarantee_labels'][s['guarantee'][n]])
+        elapsed += time.perf_counter() - start
+        rounds += length
+    return rounds, elapsed, mismatches
+
+def simulate(rounds, length, probs=DEFAULT_PROBS, transition=None, seed=DEFAULT_SEED,
+             analyzer_sequences=ANALYZER_SEQUENCES, batch_rounds=BATCH_ROUNDS):
+    """
+    Simula `rounds` rodadas em sequências de `length` e retorna o relatório
+    (dict): acertos das sugestões, das referências e por aposta/garantia,
+    com intervalos de confiança, e as rodadas/s de cada etapa. ValueError se
+    as regras ativas não são DEFAULT_RULES.
+    """
+    if not core.uses_default_rules():
+        raise ValueError("O simulador só pontua DEFAULT_RULES, e as regras ativas são outras "
+                         "(volte às regras padrão com set_rule_set(DEFAULT_RULES))")
+    if length < 2:
+        raise ValueError("Cada sequência precisa de pelo menos 2 rodadas")
+    rng = np.random.default_rng(seed)
+    sequences = max(1, rounds // length)
+    per_batch = max(1, batch_rounds // length)
+    tally = _Tally()
+    timings = {'generate': 0.0, 'suggest': 0.0}
+    analyzer = None
+    done = 0
+    while done < sequences:
+        count = min(per_batch, sequences - done)
+        start = time.perf_counter()
+        codes = generate(rng, count, length, probs, transition).ravel()
+        timings['generate'] += time.perf_counter() - start
+        start = time.perf_counter()
+        s = suggest(codes, sequence_length=length)
+        timings['suggest'] += time.perf_counter() - start
+        tally.add(rng, codes, s, length)
+        if analyzer is None and analyzer_sequences:
+            analyzer = check_analyzer(codes, s, length, analyzer_sequences)
+        done += count
+
+    simulated = sequences * length
+    report = {
+        'rounds': simulated, 'sequences': sequences, 'length': length, 'seed': seed,
+        'probs': _normalize(probs).tolist(),
+        'transition': None if transition is None else _normalize(transition).tolist(),
+        'suggestions': _rate_row(tally.hits, tally.bets),
+        'tracked': _rate_row(tally.tracked_hits, tally.tracked_bets),
+        'baselines': {}, 'by_bet': {}, 'by_guarantee': {},
+        'rounds_per_second': {stage: simulated / seconds if seconds > 0 else float(simulated)
+                              for stage, seconds in timings.items()},
+    }
+    for name, hits in tally.baseline_hits.items():
+        row = _rate_row(hits, tally.bets)
+        row['difference'] = difference(tally.hits, hits, tally.bets)
+        report['baselines'][name] = row
+    for key, table in (('by_bet', tally.by_bet), ('by_guarantee', tally.by_guarantee)):
+        report[key] = {label: _rate_row(hits, total) for label, (total, hits) in table.items()}
+    if analyzer is not None:
+        checked, seconds, mismatches = analyzer
+        report['analyzer'] = {'rounds': checked, 'rounds_per_second': checked / seconds if seconds > 0 else 0.0,
+                              'mismatches': mismatches}
+    return report
+
+# --- Relatório ---
+
+def _format_rate(row):
+    low, high = row['ci']
+    return f"{row['rate']:7.2%} [{low:6.2%}, {high:6.2%}]  {row['hits']:>9}/{row['bets']:<9}"
+
+def format_report(report, top=15):
+    """Relatório em texto, com os `top` padrões de garantia mais sugeridos."""
+    lines = [f"{report['rounds']:,} rodadas em {report['sequences']} sequências de {report['length']} "
+             f"(casa/visitante/empate {' / '.join(f'{p:.2f}' for p in report['probs'])}"
+             f"{', Markov de ordem 1' if report['transition'] else ''})",
+             f"  sugestões     {_format_rate(report['suggestions'])}",
+             f"  confiança>=70 {_format_rate(report['tracked'])}"]
+    for name, row in report['baselines'].items():
+        diff, low, high = row['difference']
+        lines.append(f"  {name:13} {_format_rate(row)}  sugestões - {name}: {diff:+.2%} [{low:+.2%}, {high:+.2%}]")
+    for key, title in (('by_bet', "Por aposta:"), ('by_guarantee', "Por padrão de garantia:")):
+        lines.append(title)
+        rows = sorted(report[key].items(), key=lambda item: -item[1]['bets'])
+        for label, row in rows[:top]:
+            lines.append(f"  {_format_rate(row)}  {label}")
+        if len(rows) > top:
+            lines.append(f"  ... mais {len(rows) - top} (todos no --json)")
+    speeds = report['rounds_per_second']
+    lines.append(f"Rodadas/s: geração {speeds['generate']:,.0f}, sugestão vetorizada {speeds['suggest']:,.0f}")
+    if 'analyzer' in report:
+        checked = report['analyzer']
+        lines.append(f"IncrementalAnalyzer: {checked['rounds']:,} rodadas a {checked['rounds_per_second']:,.0f} rodadas/s, "
+                     f"{checked['mismatches']} divergências com a sugestão vetorizada")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulação de Monte Carlo das sugestões contra apostadores ao acaso.")
+    parser.add_argument('--rounds', type=int, default=1_000_000, help="Rodadas simuladas no total")
+    parser.add_argument('--length', type=int, default=10_000, help="Rodadas por sequência independente")
+    parser.add_argument('--probs', type=float, nargs=3, default=DEFAULT_PROBS, metavar=('CASA', 'VISITANTE', 'EMPATE'))
+    parser.add_argument('--markov', type=float, nargs=9, metavar='P',
+                        help="Matriz de transição por linhas (depois de casa, de visitante, de empate)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--analyzer', type=int, default=ANALYZER_SEQUENCES, metavar='N',
+                        help="Passa as N primeiras sequências pelo IncrementalAnalyzer (tempo e conferência; 0 desliga)")
+    parser.add_argument('--top', type=int, default=15, help="Padrões de garantia listados")
+    parser.add_argument('--json', help="Grava o relatório em JSON")
+    args = parser.parse_args(argv)
+
+    transition = np.reshape(args.markov, (3, 3)) if args.markov else None
+    try:
+        report = simulate(args.rounds, args.length, args.probs, transition, args.seed, args.analyzer)
+    except ValueError as e:
+        parser.error(str(e))
+    print(format_report(report, args.top))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if report.get('analyzer', {}).get('mismatches') else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
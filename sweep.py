@@ -0,0 +1,243 @@
+"""
+Busca de parâmetros das regras de sugestão sobre um histórico gravado.
+
+Cada configuração troca limites e pontuações de DEFAULT_RULES (veja
+PARAMETERS) e o limite de confiança usado para acompanhar a garantia. Todas
+são avaliadas contra o mesmo histórico: a sugestão de cada rodada é conferida
+com o resultado seguinte, como em `add_result`. O histórico é copiado uma vez
+para memória compartilhada e os workers do pool de processos só o anexam.
+Cada tarefa avalia um lote de configurações em uma única passada pelo
+histórico, então a análise de cada rodada é feita uma vez por lote.
+
+Os resultados vão sendo acrescentados em um arquivo JSON Lines; rodar de
+novo com o mesmo arquivo pula as configurações já avaliadas.
+
+Uso:
+    python sweep.py resultados.txt --param zig_zag_min_count=2,3,4 --param break_chance_min=50,60,70
+    python sweep.py --log-dir data --random 500 --param score.draw_delayed=60,70,80,90 --out sweep.jsonl
+"""
+import argparse
+import concurrent.futures
+import copy
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from multiprocessing import shared_memory
+
+import analysis_core as core
+from result_log import read_log_codes
+
+# Parâmetros ajustáveis: nome -> [(regra, campo), ...]. O campo é 'min_count',
+# 'score' ou o nome da métrica de uma condição (muda o valor comparado).
+PARAMETERS = {
+    'zig_zag_min_count': [('zig_zag_home', 'min_count'), ('zig_zag_away', 'min_count')],
+    'break_chance_min': [('high_break_red', 'break_chance'), ('high_break_blue', 'break_chance')],
+    'draw_delay_min': [('draw_delayed', 'time_since_last_draw')],
+    'draw_frequency_max': [('draw_delayed', 'draw_frequency')],
+}
+PARAMETERS.update({f"score.{rule['name']}": [(rule['name'], 'score')] for rule in core.DEFAULT_RULES})
+CONFIDENCE_PARAMETER = 'confidence_min'  # Limite de confiança para contar a aposta (add_result usa 70)
+DEFAULT_CONFIDENCE_MIN = 70
+
+def build_rules(config, base_rules=core.DEFAULT_RULES):
+    """Cópia das regras com os parâmetros de `config` aplicados."""
+    rules = copy.deepcopy(base_rules)
+    by_name = {rule['name']: rule for rule in rules}
+    for name, value in config.items():
+        if name == CONFIDENCE_PARAMETER:
+            continue
+        if name not in PARAMETERS:
+            raise ValueError(f"Parâmetro desconhecido: {name}. Use um de {sorted(PARAMETERS) + [CONFIDENCE_PARAMETER]}")
+        for rule_name, field in PARAMETERS[name]:
+            rule = by_name[rule_name]
+            if field in ('min_count', 'score'):
+                rule[field] = value
+            else:
+                for condition in rule['conditions']:
+                    if condition[0] == field:
+                        condition[2] = value
+    return rules
+
+def config_key(config):
+    return json.dumps(config, sort_keys=True)
+
+# --- Workers ---
+
+_shared = None  # Memória compartilhada com o histórico, anexada uma vez por worker
+
+def _attach(name):
+    global _shared
+    _shared = shared_memory.SharedMemory(name=name)
+
+def _evaluate_batch(configs, size):
+    """Avalia um lote de configurações em uma passada pelo histórico compartilhado."""
+    codes = _shared.buf[:size]
+    engines = [core.RuleEngine(build_rules(config)) for config in configs]
+    thresholds = [config.get(CONFIDENCE_PARAMETER, DEFAULT_CONFIDENCE_MIN) for config in configs]
+    pending = [None] * len(configs)  # Aposta acompanhada de cada configuração para a próxima rodada
+    bets = [0] * len(configs)
+    hits = [0] * len(configs)
+    analyzer = core.IncrementalAnalyzer()
+    for code in codes:
+        result = core.RESULT_TYPES[code]
+        for k, bet in enumerate(pending):
+            if bet is not None:
+                bets[k] += 1
+                hits[k] += core.check_guarantee_status(bet, result, None)
+        analyzer.push(result)
+        if analyzer.size < core.MIN_RESULTS_FOR_SUGGESTION:
+            continue
+        analysis = analyzer.analysis()
+        window = [core.RESULT_TYPES[c] for c in analyzer.window]
+        inputs = (window, analysis['surf_analysis'], analysis['color_analysis'], analysis['break_patterns'],
+                  analysis['break_probability'], analysis['draw_specifics'])
+        for k, engine in enumerate(engines):
+            suggestion = core.generate_advanced_suggestion(*inputs, engine=engine)
+            tracked = suggestion['bet_type'] != 'none' and suggestion['confidence'] >= thresholds[k]
+            pending[k] = suggestion['bet_type'] if tracked else None
+    codes.release()
+    return [{'config': config, 'rounds': size, 'bets': bets[k], 'hits': hits[k]} for k, config in enumerate(configs)]
+
+# --- Busca ---
+
+def grid(space):
+    """Todas as combinações de {parâmetro: [valores]}."""
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+def random_search(space, count, seed):
+    """`count` combinações distintas sorteadas de {parâmetro: [valores]}."""
+    rnd = random.Random(seed)
+    total = math.prod(len(values) for values in space.values())
+    names = sorted(space)
+    seen = {}
+    while len(seen) < min(count, total):
+        config = {name: rnd.choice(space[name]) for name in names}
+        seen.setdefault(config_key(config), config)
+    return list(seen.values())
+
+def _load_checkpoint(path):
+    done = {}
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # Linha cortada por uma interrupção
+                done[config_key(row['config'])] = row
+    return done
+
+def _end_line(path):
+    """Encerra uma última linha cortada por uma interrupção, para o próximo resultado não continuá-la."""
+    with open(path, 'rb+') as f:
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+
+def sweep(codes, configs, workers=None, out=None, batch_size=None, progress=None):
+    """
+    Avalia `configs` contra `codes` (bytes, do mais antigo ao mais recente) em
+    um pool de processos. Com `out`, cada resultado é acrescentado ao arquivo e
+    as configurações que já estão nele não são avaliadas de novo.
+    Retorna a lista de resultados (também os do checkpoint).
+    """
+    done = _load_checkpoint(out)
+    todo = [config for config in configs if config_key(config) not in done]
+    results = [done[config_key(config)] for config in configs if config_key(config) in done]
+    if not todo:
+        return results
+
+    workers = workers or os.cpu_count() or 1
+    # Lotes suficientes para ocupar todos os núcleos até o fim, mas grandes o
+    # bastante para a análise de cada rodada ser dividida por várias configurações
+    batch_size = batch_size or max(1, min(32, math.ceil(len(todo) / (workers * 4))))
+    batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+
+    if out and os.path.exists(out):
+        _end_line(out)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(codes)))
+    shm.buf[:len(codes)] = codes
+    checkpoint = open(out, 'a', encoding='utf-8') if out else None
+    try:
+        with concurrent.futures.ProcessPoolExecutor(workers, initializer=_attach, initargs=(shm.name,)) as pool:
+            futures = [pool.submit(_evaluate_batch, batch, len(codes)) for batch in batches]
+            for future in concurrent.futures.as_completed(futures):
+                for row in future.result():
+                    results.append(row)
+                    if checkpoint:
+                        checkpoint.write(json.dumps(row) + '\n')
+                if checkpoint:
+                    checkpoint.flush()
+                if progress:
+                    progress(len(results), len(configs))
+    finally:
+        if checkpoint:
+            checkpoint.close()
+        shm.close()
+        shm.unlink()
+    return results
+
+def rank(results, min_coverage=0.0):
+    """Resultados com taxa de acerto e cobertura, do melhor para o pior."""
+    ranked = []
+    for row in results:
+        rounds = max(1, row['rounds'] - 1)
+        coverage = row['bets'] / rounds
+        if coverage < min_coverage:
+            continue
+        hit_rate = row['hits'] / row['bets'] if row['bets'] else 0.0
+        ranked.append(dict(row, hit_rate=hit_rate, coverage=coverage))
+    ranked.sort(key=lambda row: (row['hit_rate'], row['coverage']), reverse=True)
+    return ranked
+
+def _parse_param(text):
+    name, _, values = text.partition('=')
+    if name not in PARAMETERS and name != CONFIDENCE_PARAMETER:
+        raise argparse.ArgumentTypeError(f"Parâmetro desconhecido: {name}")
+    return name, [float(v) if '.' in v else int(v) for v in values.split(',') if v]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Busca de parâmetros das regras de sugestão.")
+    parser.add_argument('path', nargs='?', help="Arquivo com um resultado por linha, mais antigo primeiro")
+    parser.add_argument('--log-dir', help="Usa o results.log completo desta pasta")
+    parser.add_argument('--param', action='append', type=_parse_param, default=[], metavar='NOME=V1,V2,...',
+                        help=f"Valores de um parâmetro ({', '.join(sorted(PARAMETERS))}, {CONFIDENCE_PARAMETER})")
+    parser.add_argument('--random', type=int, metavar='N', help="Sorteia N combinações em vez da grade completa")
+    parser.add_argument('--seed', type=int, default=27)
+    parser.add_argument('--workers', type=int, help="Processos (padrão: todos os núcleos)")
+    parser.add_argument('--out', help="Arquivo JSON Lines de checkpoint/resultados (retoma se já existir)")
+    parser.add_argument('--min-coverage', type=float, default=0.0, help="Cobertura mínima para o ranking (0 a 1)")
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.log_dir:
+        codes = read_log_codes(os.path.join(args.log_dir, 'results.log'))
+    elif args.path:
+        codes = bytes(core.RESULT_CODES[r] for r in core.read_results(args.path))
+    else:
+        parser.error("Informe um arquivo de resultados ou --log-dir")
+
+    space = dict(args.param) or {CONFIDENCE_PARAMETER: [DEFAULT_CONFIDENCE_MIN]}
+    configs = random_search(space, args.random, args.seed) if args.random else grid(space)
+    print(f"{len(configs)} configurações sobre {len(codes)} rodadas com {args.workers or os.cpu_count()} processos")
+
+    start = time.perf_counter()
+    results = sweep(codes, configs, args.workers, args.out,
+                    progress=lambda done, total: print(f"\r{done}/{total}", end='', file=sys.stderr, flush=True))
+    print(file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    print(f"Concluído em {elapsed:.1f}s")
+
+    for row in rank(results, args.min_coverage)[:args.top]:
+        print(f"  acerto {row['hit_rate']:7.2%}  cobertura {row['coverage']:7.2%}  "
+              f"({row['hits']}/{row['bets']})  {config_key(row['config'])}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
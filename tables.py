@@ -0,0 +1,230 @@
+"""
+Várias mesas do Football Studio acompanhadas no mesmo processo.
+
+Cada mesa é um `TableState` compacto (com `__slots__`): o IncrementalAnalyzer,
+que guarda o histórico com um byte por resultado, o AuditTrail e os campos da
+sugestão pendente, como em `st.session_state` no adm.py. Os resultados entram
+por `audit.record_round`, o mesmo registro da página. Um `TableRegistry`
+guarda as mesas e processa os resultados de todas em um pool de threads
+compartilhado: cada mesa tem sua fila e no máximo um worker por vez, então a
+ordem dos resultados de uma mesa é mantida sem travar as outras. `submit`
+retorna um Future de cada resultado, para esperar só pela mesa que o
+recebeu; `join` espera todas. As análises vêm do ANALYSIS_CACHE,
+compartilhado por todas as mesas.
+
+Memória por mesa (Python 3.11, medida com tracemalloc): cerca de 27 KiB,
+de tamanho fixo e sem depender dos resultados. O analisador ocupa 11 KiB: o
+histórico de 1000 bytes, as sequências (5 KiB em arrays circulares e nas
+contagens por tamanho), as contagens de padrões da janela (3 KiB) e o que
+desfaz as últimas rodadas. As somas acumuladas (8,6 KiB) e o índice de
+transições (7,3 KiB) só são montados se a mesa usar a janela longa ou as
+transições. O registro de acertos ocupa 11 KiB (1000 sugestões) e a análise
+inicial, guardada no ANALYSIS_CACHE, quase todo o restante.
+
+Uso: python tables.py --tables 500 --rounds 200 [--workers 8]
+"""
+import argparse
+import collections
+import concurrent.futures
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+from analysis_core import (
+    MAX_HISTORY_TO_STORE,
+    RESULT_TYPES,
+    HistoryBuffer,
+    IncrementalAnalyzer,
+)
+from audit import AuditTrail, record_round
+
+# Medições de latência por rodada guardadas pelo registro (p50/p99)
+LATENCY_SAMPLES = 4096
+
+class TableState:
+    """Estado de uma mesa: histórico, analisador e a sugestão pendente."""
+
+    __slots__ = ('name', 'analyzer', 'audit', 'analysis_data', 'last_suggested_bet_type',
+                 'last_guarantee_pattern', 'last_suggestion_confidence', 'guarantee_failed',
+                 'pending', 'scheduled', 'lock')
+
+    def __init__(self, name, results=None):
+        self.name = name
+        self.analyzer = IncrementalAnalyzer.from_results(results if results is not None else ())
+        self.audit = AuditTrail()
+        self.analysis_data = self.analyzer.analysis()
+        suggestion = self.analysis_data['suggestion']
+        self.last_suggested_bet_type = suggestion['bet_type']
+        self.last_guarantee_pattern = suggestion['guarantee_pattern']
+        self.last_suggestion_confidence = suggestion['confidence']
+        self.guarantee_failed = False
+        self.pending = collections.deque()  # (resultado, Future) aguardando um worker
+        self.scheduled = False  # Já há um worker drenando `pending`
+        self.lock = threading.Lock()
+
+    @property
+    def results(self):
+        """Histórico da mesa (o HistoryBuffer do analisador, mais recente primeiro)."""
+        return self.analyzer.history
+
+    def apply(self, result):
+        """Registra um resultado com `record_round`, como `add_result` do adm.py: garantia, histórico e nova sugestão."""
+        pending = {'bet_type': self.last_suggested_bet_type, 'guarantee_pattern': self.last_guarantee_pattern,
+                   'confidence': self.last_suggestion_confidence}
+        hit, self.analysis_data = record_round(self.analyzer, self.audit, pending, result)
+        self.guarantee_failed = hit is False
+
+        suggestion = self.analysis_data['suggestion']
+        self.last_suggested_bet_type = suggestion['bet_type']
+        self.last_guarantee_pattern = suggestion['guarantee_pattern']
+        self.last_suggestion_confidence = suggestion['confidence']
+
+class TableRegistry:
+    """Mesas por nome e o pool de workers que aplica os resultados recebidos."""
+
+    def __init__(self, workers=None):
+        self.tables = {}
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers or min(32, (os.cpu_count() or 1) + 4), thread_name_prefix='table')
+        self._idle = threading.Condition(self._lock)
+        self._busy = 0  # Mesas com worker agendado
+        self.latencies = collections.deque(maxlen=LATENCY_SAMPLES)  # Tempo de `apply` por rodada
+        self.rounds = 0
+
+    def add_table(self, name, results=None):
+        """Cria (ou retorna, se já existir) a mesa `name`."""
+        with self._lock:
+            table = self.tables.get(name)
+            if table is None:
+                table = self.tables[name] = TableState(name, results)
+            return table
+
+    def remove_table(self, name):
+        with self._lock:
+            self.tables.pop(name, None)
+
+    def get(self, name):
+        return self.tables[name]
+
+    def submit(self, name, result):
+        """
+        Enfileira um resultado para a mesa `name` sem esperar a análise.
+        Retorna um Future com a análise depois dele (ou o erro de `apply`),
+        concluído quando os anteriores da mesma mesa já foram aplicados.
+        """
+        if result not in RESULT_TYPES:
+            raise ValueError(f"Resultado inválido: {result!r}")
+        table = self.tables[name]
+        future = concurrent.futures.Future()
+        with table.lock:
+            table.pending.append((result, future))
+            if table.scheduled:
+                return future
+            table.scheduled = True
+            with self._lock:
+                self._busy += 1
+        self._executor.submit(self._drain, table)
+        return future
+
+    def _drain(self, table):
+        latencies = []
+        while True:
+            with table.lock:
+                if not table.pending:
+                    table.scheduled = False
+                    break
+                result, future = table.pending.popleft()
+            start = time.perf_counter()
+            try:
+                table.apply(result)
+            except Exception as e:  # Vai para quem espera o Future; a fila da mesa continua
+                future.set_exception(e)
+                continue
+            latencies.append(time.perf_counter() - start)
+            future.set_result(table.analysis_data)
+        with self._lock:
+            self.latencies.extend(latencies)
+            self.rounds += len(latencies)
+            self._busy -= 1
+            if not self._busy:
+                self._idle.notify_all()
+
+    def join(self, timeout=None):
+        """Espera até que todos os resultados enfileirados tenham sido aplicados."""
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._busy, timeout)
+
+    def latency_stats(self):
+        """Rodadas processadas e tempo de análise por rodada (p50/p99) em ms."""
+        with self._lock:
+            samples = sorted(self.latencies)
+            rounds = self.rounds
+        if not samples:
+            return {'rounds': rounds, 'p50_ms': 0, 'p99_ms': 0}
+        return {
+            'rounds': rounds,
+            'p50_ms': round(samples[len(samples) // 2] * 1000, 4),
+            'p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 4),
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+# --- Linha de Comando ---
+
+def _measure_table_bytes(count, seed):
+    """Bytes por mesa com o histórico cheio (tracemalloc, média de `count` mesas)."""
+    rnd = random.Random(seed)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tables = []
+    for i in range(count):
+        results = HistoryBuffer()
+        results.extend_codes(bytes(rnd.choices(range(3), weights=(45, 45, 10), k=MAX_HISTORY_TO_STORE)))
+        tables.append(TableState(f'mesa-{i}', results))
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede latência e memória com muitas mesas no mesmo processo.")
+    parser.add_argument('--tables', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=200, help="Resultados por mesa")
+    parser.add_argument('--workers', type=int, help="Threads do pool (padrão: núcleos + 4, até 32)")
+    parser.add_argument('--seed', type=int, default=27)
+    args = parser.parse_args(argv)
+
+    print(f"Memória por mesa (histórico cheio): {_measure_table_bytes(min(args.tables, 200), args.seed) / 1024:.1f} KiB")
+
+    registry = TableRegistry(args.workers)
+    names = [f'mesa-{i}' for i in range(args.tables)]
+    for name in names:
+        registry.add_table(name)
+    rnd = random.Random(args.seed)
+    # Cada rodada chega a todas as mesas de uma vez; mede até a última ser analisada
+    ticks = []
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        tick = time.perf_counter()
+        for name in names:
+            registry.submit(name, rnd.choices(RESULT_TYPES, weights=(45, 45, 10))[0])
+        registry.join()
+        ticks.append(time.perf_counter() - tick)
+    elapsed = time.perf_counter() - start
+    registry.close()
+
+    stats = registry.latency_stats()
+    ticks.sort()
+    print(f"{stats['rounds']} rodadas em {args.tables} mesas: {elapsed:.2f}s "
+          f"({stats['rounds'] / max(elapsed, 1e-9):,.0f} rodadas/s)")
+    print(f"Análise por rodada de uma mesa: p50 {stats['p50_ms']} ms | p99 {stats['p99_ms']} ms")
+    print(f"Rodada em todas as mesas: p50 {ticks[len(ticks) // 2] * 1000:.2f} ms | "
+          f"máx {ticks[-1] * 1000:.2f} ms")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+IncrementalAnalyzer: a cada rodada, inclusive depois que o histórico
+armazenado enche e os resultados mais antigos começam a sair, `analysis()`
+é igual a `update_analysis` recalculada do zero sobre o mesmo histórico.
+As somas acumuladas e o índice de transições são montados só no primeiro
+uso: montados em qualquer ponto de uma sequência de rodadas e desfazimentos
+(inclusive com o histórico cheio, quando desfazer devolve o resultado que
+tinha saído), eles continuam iguais aos de um analisador novo sobre o mesmo
+histórico, assim como os padrões mantidos a cada rodada são os de uma
+passada de scan_window.
+
+Uso: python -m pytest test_analyzer.py
+"""
+import random
+
+import analysis_core as core
+
+SEED = 27
+WEIGHTS = (45, 45, 10)
+
+def test_matches_update_analysis_every_round():
+    rnd = random.Random(SEED)
+    analyzer = core.IncrementalAnalyzer()
+    results = []  # Mais recente primeiro, como o histórico da sessão
+    for _ in range(core.MAX_HISTORY_TO_STORE + 300):
+        result = rnd.choices(core.RESULT_TYPES, weights=WEIGHTS)[0]
+        analyzer.push(result)
+        results.insert(0, result)
+        del results[core.MAX_HISTORY_TO_STORE:]
+        assert analyzer.analysis() == core.update_analysis(results)
+
+def _assert_same_state(analyzer):
+    codes = analyzer.history.codes()[::-1]
+    fresh = core.IncrementalAnalyzer.from_codes(codes)
+    assert analyzer.window == fresh.window and analyzer.cache_key() == fresh.cache_key()
+    scan = core.scan_window(analyzer.history)
+    assert analyzer.break_patterns == scan.break_patterns and analyzer.draw_patterns == scan.draw_patterns
+    assert analyzer.window_stats((1, 27, 100, 500, 1000)) == fresh.window_stats((1, 27, 100, 500, 1000))
+    assert analyzer.markov._counts == core.MarkovIndex(fresh.history)._counts
+    assert analyzer.markov.signal() == fresh.markov.signal()
+    assert (analyzer.analysis(cache=None, long_window=500, markov=True) ==
+            fresh.analysis(cache=None, long_window=500, markov=True))
+
+def test_lazy_indexes_follow_pushes_and_undos():
+    rnd = random.Random(SEED)
+    codes = bytes(rnd.choices(range(3), weights=WEIGHTS, k=core.MAX_HISTORY_TO_STORE + core.UNDO_DEPTH))
+    for build_at in (0, 3, 40):
+        analyzer = core.IncrementalAnalyzer.from_codes(codes)
+        assert analyzer._prefix is None and analyzer._markov is None
+        for step in range(300):
+            if step == build_at:
+                analyzer.prefix, analyzer.markov  # Montados a partir daqui
+            if analyzer.undo_depth and rnd.random() < 0.45:
+                analyzer.undo()
+            else:
+                analyzer.push(rnd.choices(core.RESULT_TYPES, weights=WEIGHTS)[0])
+            if step % 25 == 0:
+                _assert_same_state(analyzer)
+        _assert_same_state(analyzer)
+
+def test_lazy_indexes_on_short_history():
+    analyzer = core.IncrementalAnalyzer()
+    analyzer.prefix, analyzer.markov
+    for result in ('home', 'home', 'draw', 'away', 'home', 'away', 'away', 'draw'):
+        analyzer.push(result)
+        _assert_same_state(analyzer)
+    while analyzer.undo_depth:
+        analyzer.undo()
+        _assert_same_state(analyzer)
@@ -0,0 +1,103 @@
+"""
+Contadores do AuditTrail: depois de qualquer mistura de registros,
+desfazimentos e correções, inclusive com o log circular já tendo dado a
+volta, os das janelas de 50 e 200 sugestões e o total são os de recontar do
+zero as sugestões acompanhadas de uma reprodução rodada a rodada.
+
+Uso: python -m pytest test_audit.py
+"""
+import collections
+import random
+
+import pytest
+
+from analysis_core import RESULT_TYPES, IncrementalAnalyzer, check_guarantee_status
+from audit import (
+    AUDIT_WINDOWS,
+    KINDS,
+    AuditTrail,
+    confidence_band,
+    is_tracked,
+    record_round,
+    replace_round,
+    undo_rounds,
+)
+
+CAPACITY = 300  # A menor que cabe a janela de 200 e as rodadas desfeitas: o log dá a volta logo
+WEIGHTS = (45, 45, 10)
+
+def _tracked_entries(results):
+    """(chaves, acertou) de cada sugestão acompanhada, reproduzindo `results` do zero."""
+    analyzer = IncrementalAnalyzer()
+    suggestion = analyzer.analysis()['suggestion']
+    entries = []
+    for result in results:
+        bet, pattern, confidence = suggestion['bet_type'], suggestion['guarantee_pattern'], suggestion['confidence']
+        if is_tracked(bet, confidence):
+            keys = {('pattern', part) for part in pattern.split(' | ')}
+            keys |= {('bet', bet), ('band', confidence_band(confidence))}
+            entries.append((keys, check_guarantee_status(bet, result, pattern)))
+        analyzer.push(result)
+        suggestion = analyzer.analysis()['suggestion']
+    return entries
+
+def _recount(entries):
+    counts = collections.defaultdict(lambda: [0, 0])
+    for keys, hit in entries:
+        for key in keys:
+            counts[key][0 if hit else 1] += 1
+    return {key: tuple(pair) for key, pair in counts.items()}
+
+def _counted(trail, window):
+    return {(kind, row[kind]): (row['acertos'], row['erros']) for kind in KINDS for row in trail.stats(kind, window)}
+
+def _assert_matches_recount(trail, results):
+    entries = _tracked_entries(results)
+    assert trail.recorded == len(entries)
+    for window in AUDIT_WINDOWS + (None,):
+        recent = entries[-window:] if window else entries
+        expected = _recount(recent)
+        assert _counted(trail, window) == expected
+        assert trail.summary(window) == (sum(hit for _, hit in recent), len(recent))
+
+@pytest.mark.parametrize('seed', (27, 5))
+def test_counters_match_recount_after_records_undos_and_replacements(seed):
+    rnd = random.Random(seed)
+    trail = AuditTrail(capacity=CAPACITY)
+    analyzer = IncrementalAnalyzer()
+    results = []  # Tudo o que está valendo, mais antigo primeiro
+    wrapped = False
+    for step in range(2000):
+        suggestion = analyzer.analysis()['suggestion']
+        choice = rnd.random()
+        if analyzer.undo_depth and choice < 0.05:
+            count = rnd.randint(1, min(analyzer.undo_depth, 10))
+            undo_rounds(analyzer, trail, count)
+            del results[-count:]
+        elif analyzer.undo_depth and choice < 0.1:
+            index = rnd.randrange(min(analyzer.undo_depth, 40))
+            result = rnd.choice(RESULT_TYPES)
+            replace_round(analyzer, trail, index, result)
+            results[-1 - index] = result
+        else:
+            result = rnd.choices(RESULT_TYPES, weights=WEIGHTS)[0]
+            record_round(analyzer, trail, suggestion, result)
+            results.append(result)
+        wrapped = wrapped or trail.recorded > CAPACITY
+        if step % 200 == 199:
+            _assert_matches_recount(trail, results)
+    _assert_matches_recount(trail, results)
+    assert wrapped  # O log deu a volta durante o teste
+
+def test_undo_across_the_ring_brings_entries_back_to_the_windows():
+    rnd = random.Random(3)
+    trail = AuditTrail(capacity=CAPACITY)
+    analyzer = IncrementalAnalyzer()
+    results = []
+    while trail.recorded < 2 * CAPACITY + 10:
+        result = rnd.choices(RESULT_TYPES, weights=WEIGHTS)[0]
+        record_round(analyzer, trail, analyzer.analysis()['suggestion'], result)
+        results.append(result)
+    undo_rounds(analyzer, trail, analyzer.undo_depth)
+    del results[-100:]
+    _assert_matches_recount(trail, results)
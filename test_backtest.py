@@ -0,0 +1,90 @@
+"""
+Backtest vetorizado: `suggest` contra a análise rodada a rodada do
+IncrementalAnalyzer em sequências aleatórias, os números das regras lidos de
+DEFAULT_RULES (mudar uma pontuação ou um limite muda o backtest junto) e a
+recusa de regras que ele não reproduz.
+
+Uso: python -m pytest test_backtest.py
+"""
+import copy
+import random
+
+import pytest
+
+import analysis_core as core
+import backtest
+
+ROUNDS = 2500
+
+def _replay(codes, sequence_length=None):
+    """(aposta, confiança, padrão de garantia) de cada rodada pela análise rodada a rodada."""
+    suggestions = []
+    for start in range(0, len(codes), sequence_length or len(codes)):
+        analyzer = core.IncrementalAnalyzer()
+        for code in codes[start:start + (sequence_length or len(codes))]:
+            analyzer.push(core.RESULT_TYPES[code])
+            s = analyzer.analysis(cache=None)['suggestion']
+            suggestions.append((s['bet_type'], s['confidence'], s['guarantee_pattern']))
+    return suggestions
+
+def _fast(codes, sequence_length=None):
+    s = backtest.suggest(codes, sequence_length)
+    return [(backtest.BET_TYPES[b], int(c), s['guarantee_labels'][g])
+            for b, c, g in zip(s['bet'], s['confidence'], s['guarantee'])]
+
+@pytest.fixture
+def rule_set():
+    """Troca DEFAULT_RULES e as regras ativas juntas, e as devolve no fim."""
+    original = core.DEFAULT_RULES
+
+    def use(rules):
+        core.DEFAULT_RULES = rules
+        core.set_rule_set(rules)
+
+    yield use
+    core.DEFAULT_RULES = original
+    core.set_rule_set(original)
+
+@pytest.mark.parametrize('weights', ((45, 45, 10), (10, 10, 80), (30, 30, 40)))
+def test_suggest_matches_analyzer(weights):
+    codes = bytes(random.Random(27).choices(range(3), weights=weights, k=ROUNDS))
+    assert _fast(codes) == _replay(codes)
+
+def test_independent_sequences():
+    codes = bytes(random.Random(5).choices(range(3), weights=(45, 45, 10), k=1200))
+    assert _fast(codes, sequence_length=300) == _replay(codes, sequence_length=300)
+
+def test_numbers_come_from_default_rules(rule_set):
+    rules = copy.deepcopy(core.DEFAULT_RULES)
+    for rule in rules:
+        rule['score'] //= 2
+        if rule['name'] == 'draw_delayed':
+            rule['conditions'] = [['time_since_last_draw', '>=', 4], ['draw_frequency', '<', 20]]
+        elif rule['name'].startswith('zig_zag'):
+            rule['min_count'] = 2
+        elif rule['name'].startswith('high_break'):
+            rule['conditions'] = [['break_chance', '>', 50]]
+    codes = bytes(random.Random(27).choices(range(3), weights=(45, 45, 10), k=ROUNDS))
+    before = _fast(codes)
+    rule_set(rules)
+    fast = _fast(codes)
+    assert fast == _replay(codes)
+    assert sum(a != b for a, b in zip(before, fast)) > ROUNDS // 2
+
+def test_rejects_other_rule_sets(rule_set):
+    codes = bytes(random.Random(27).choices(range(3), k=100))
+    default = copy.deepcopy(core.DEFAULT_RULES)
+    changed = copy.deepcopy(default)
+    changed[0]['score'] += 1
+    core.set_rule_set(changed)  # Regras ativas diferentes de DEFAULT_RULES
+    with pytest.raises(ValueError, match='regras ativas'):
+        backtest.suggest(codes)
+
+    changed[0]['conditions'][0][1] = '>='  # Operador que `suggest` não reproduz
+    rule_set(changed)
+    with pytest.raises(ValueError, match='surf_max_red'):
+        backtest.suggest(codes)
+
+    rule_set(default + [{'name': 'extra', 'bets': ['draw'], 'score': 1}])
+    with pytest.raises(ValueError, match='extra'):
+        backtest.suggest(codes)
@@ -0,0 +1,109 @@
+"""
+Exportação com as sugestões por bloco: as linhas do CSV e do Parquet são as
+mesmas de reproduzir o log rodada a rodada com um IncrementalAnalyzer,
+inclusive nas bordas de blocos menores e maiores que MAX_HISTORY_TO_STORE,
+com outras regras ativas e com os sinais opcionais, e os textos das colunas
+de dicionário ficam uma vez por arquivo.
+
+Uso: python -m pytest test_exporter.py
+"""
+import copy
+import csv
+import gzip
+import random
+
+import pytest
+
+import analysis_core as core
+import exporter
+from analysis_core import MAX_HISTORY_TO_STORE, RESULT_TYPES, IncrementalAnalyzer
+from result_log import ResultLog
+
+ROUNDS = 4000
+
+@pytest.fixture(scope='module')
+def log_path(tmp_path_factory):
+    rnd = random.Random(27)
+    log = ResultLog(tmp_path_factory.mktemp('log'))
+    log.extend(bytes(rnd.choices(range(3), weights=(45, 45, 10), k=ROUNDS)))
+    log.close()
+    return log.log_path
+
+def _replay(log_path, **options):
+    """Linhas decodificadas da reprodução rodada a rodada (a sugestão que estava na tela)."""
+    analyzer = IncrementalAnalyzer()
+    suggestion = analyzer.analysis(cache=None, **options)['suggestion']
+    rows = []
+    for n, code in enumerate(next(exporter.iter_chunks(log_path, ROUNDS, suggestions=False))['result']):
+        bet = suggestion['bet_type']
+        placed = bet != 'none'
+        rows.append((n, code, exporter.BET_TYPES.index(bet), suggestion['confidence'],
+                     (1 if bet == RESULT_TYPES[code] else 2) if placed else 0,
+                     int(placed and suggestion['confidence'] >= 70),
+                     suggestion['suggestion'], suggestion['guarantee_pattern']))
+        analyzer.push(RESULT_TYPES[code])
+        suggestion = analyzer.analysis(cache=None, **options)['suggestion']
+    return rows
+
+@pytest.fixture(scope='module')
+def reference(log_path):
+    return _replay(log_path)
+
+def _decoded(rows, labels):
+    suggestions, guarantees = labels['suggestion'], labels['guarantee_pattern']
+    return [tuple(row[:6]) + (suggestions[row[6]], guarantees[row[7]]) for row in rows]
+
+def _exported_csv(log_path, out, **options):
+    exporter.export_log(log_path, out, **options)
+    with gzip.open(out, 'rt', newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))[1:]
+    return _decoded([[int(value) for value in row] for row in rows], exporter.read_labels(out))
+
+@pytest.mark.parametrize('chunk_rows', (300, MAX_HISTORY_TO_STORE, 1777, ROUNDS))
+def test_csv_matches_round_by_round_replay(log_path, reference, tmp_path, chunk_rows):
+    out = str(tmp_path / 'historico.csv.gz')
+    report = exporter.export_log(log_path, out, chunk_rows=chunk_rows)
+    assert report['rows'] == ROUNDS
+    with gzip.open(out, 'rt', newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert tuple(rows[0]) == exporter.HISTORY_COLUMNS + exporter.SUGGESTION_COLUMNS
+    assert _decoded([[int(value) for value in row] for row in rows[1:]], exporter.read_labels(out)) == reference
+
+def test_parquet_matches_round_by_round_replay(log_path, reference, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    out = str(tmp_path / 'historico.parquet')
+    exporter.export_log(log_path, out, chunk_rows=1777)
+    table = pq.read_table(out).to_pydict()
+    assert pq.ParquetFile(out).metadata.num_row_groups == 3
+    rows = zip(*(table[name] for name in exporter.HISTORY_COLUMNS + exporter.SUGGESTION_COLUMNS))
+    labels = exporter.read_labels(out)
+    assert _decoded([row[:5] + (int(row[5]),) + row[6:] for row in rows], labels) == reference
+    # Cada texto aparece uma vez no dicionário do arquivo
+    assert all(len(texts) == len(set(texts)) for texts in labels.values())
+
+def test_history_only(log_path, tmp_path):
+    out = str(tmp_path / 'historico.csv.gz')
+    exporter.export_log(log_path, out, suggestions=False, chunk_rows=1777)
+    with gzip.open(out, 'rt', newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == list(exporter.HISTORY_COLUMNS) and len(rows) == ROUNDS + 1
+    assert exporter.read_labels(out) == {}
+
+@pytest.fixture
+def halved_rules():
+    rules = copy.deepcopy(core.DEFAULT_RULES)
+    for rule in rules:
+        rule['score'] //= 2
+    core.set_rule_set(rules)
+    yield
+    core.set_rule_set(core.DEFAULT_RULES)
+
+def test_other_rule_set_uses_the_active_rules(log_path, reference, tmp_path, halved_rules):
+    exported = _exported_csv(log_path, str(tmp_path / 'historico.csv.gz'), chunk_rows=1777)
+    assert exported == _replay(log_path)
+    assert sum(a[3] != b[3] for a, b in zip(exported, reference)) > ROUNDS // 4  # As confianças mudaram
+
+@pytest.mark.parametrize('options', ({'long_window': 500}, {'markov': True}))
+def test_optional_signals(log_path, tmp_path, options):
+    exported = _exported_csv(log_path, str(tmp_path / 'historico.csv.gz'), chunk_rows=1777, **options)
+    assert exported == _replay(log_path, **options)
@@ -0,0 +1,102 @@
+"""
+Importação em lote: CSV (cabeçalho reconhecido só quando tem a coluna,
+campos entre aspas, linhas inválidas com o número delas), JSON Lines, JSON e
+Parquet, JSON Lines grandes lidos com `mmap` dando o mesmo resultado, a
+memória de um CSV grande limitada aos códigos, e colunas que não existem
+levantando ValueError.
+
+Uso: python -m pytest test_importer.py
+"""
+import io
+import json
+import tracemalloc
+
+import pytest
+
+import importer
+from importer import import_results
+
+def _csv(tmp_path, text, name='rodadas.csv'):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+def test_csv_with_default_header(tmp_path):
+    report = import_results(_csv(tmp_path, "rodada,resultado\n1,home\n2,Away\n3,empate\n"))
+    assert bytes(report['codes']) == bytes((0, 1, 2)) and report['rejected_count'] == 0
+
+def test_csv_without_header_rejects_invalid_lines(tmp_path):
+    report = import_results(_csv(tmp_path, "home\nx\n\nR\nB\nY\n"))
+    assert bytes(report['codes']) == bytes((0, 0, 1, 2))
+    assert report['rejected'] == [(2, 'x')] and report['rows'] == 4
+
+def test_csv_named_and_indexed_column(tmp_path):
+    path = _csv(tmp_path, 'mesa;obs;cor\n1;"a;b";red\n2;"c";yellow\n3;"";\n')
+    named = import_results(path, column='cor', delimiter=';')
+    assert bytes(named['codes']) == bytes((0, 2)) and named['rejected'] == [(4, '')]
+    indexed = import_results(path, column=2, delimiter=';')
+    assert indexed['rejected'][0] == (1, 'cor')  # Sem o nome, o cabeçalho é uma linha inválida
+    assert bytes(indexed['codes']) == bytes((0, 2))
+
+def test_csv_wrong_column(tmp_path):
+    with pytest.raises(ValueError, match="Coluna 'cor'"):
+        import_results(_csv(tmp_path, "resultado\nhome\n"), column='cor')
+
+def test_csv_from_uploaded_file():
+    upload = io.BytesIO('\ufeffresult\nhome\ndraw\n'.encode('utf-8'))
+    assert bytes(import_results(upload, fmt='csv')['codes']) == bytes((0, 2))
+    assert not upload.closed  # O arquivo de quem chamou continua aberto
+
+def test_jsonl_and_json(tmp_path):
+    path = tmp_path / 'rodadas.jsonl'
+    path.write_text('{"result": "home"}\n{"result": "draw"}\nnão é json\n\n"away"\n', encoding='utf-8')
+    report = import_results(str(path))
+    assert bytes(report['codes']) == bytes((0, 2, 1)) and report['rejected'] == [(3, 'não é json')]
+
+    path = tmp_path / 'rodadas.json'
+    path.write_text(json.dumps([{'cor': 'blue'}, {'cor': 'red'}, {'cor': 'verde'}]), encoding='utf-8')
+    report = import_results(str(path), column='cor')
+    assert bytes(report['codes']) == bytes((1, 0)) and report['rejected'] == [(3, 'verde')]
+
+    path.write_text(json.dumps({'result': 'home'}), encoding='utf-8')
+    with pytest.raises(ValueError, match='lista'):
+        import_results(str(path))
+
+def test_large_jsonl_is_mapped(tmp_path, monkeypatch):
+    path = _csv(tmp_path, ''.join(json.dumps({'result': r}) + '\n' for r in ('draw', 'home', 'x') * 50), 'rodadas.jsonl')
+    buffered = import_results(path)
+    monkeypatch.setattr(importer, 'MMAP_THRESHOLD', 0)
+    mapped = import_results(path)
+    assert mapped['codes'] == buffered['codes'] and mapped['rejected'] == buffered['rejected']
+    assert len(mapped['codes']) == 100 and mapped['rejected_count'] == 50
+
+def test_large_csv_memory(tmp_path):
+    rows = 100_000
+    path = _csv(tmp_path, 'resultado\n' + 'draw\n' * rows)
+    tracemalloc.start()
+    try:
+        report = import_results(path)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert report['rows'] == rows
+    assert peak < 3 * rows  # O arquivo tem 5 bytes por linha; os códigos, 1 (mais a folga do bytearray)
+
+def test_parquet(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'rodadas.parquet')
+    pq.write_table(pa.table({'mesa': [1, 2, 3], 'cor': ['red', 'yellow', None]}), path)
+    report = import_results(path, column='cor')
+    assert bytes(report['codes']) == bytes((0, 2)) and report['rejected'] == [(3, 'None')]
+    assert import_results(path, column=1)['codes'] == report['codes']
+
+def test_parquet_wrong_column(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'rodadas.parquet')
+    pq.write_table(pa.table({'mesa': [1], 'cor': ['red']}), path)
+    with pytest.raises(ValueError, match="Coluna 'resultado'"):
+        import_results(path, column='resultado')
+    with pytest.raises(ValueError, match='2 colunas'):
+        import_results(path, column=5)
@@ -0,0 +1,71 @@
+"""
+Ingestão ao vivo: `tail_file` lendo o disco fora do laço (linhas novas, linha
+incompleta, arquivo truncado), as correções levantando os erros em quem
+chamou, em vez de sumirem dentro do laço, e recusando desfazer ou corrigir
+sobre um estado ou um log que mudou.
+
+Uso: python -m pytest test_ingest.py
+"""
+import time
+
+import pytest
+
+from ingest import Ingestor
+from result_log import ResultLog, StaleLogError, read_log_codes
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("A ingestão não chegou ao estado esperado")
+        time.sleep(0.01)
+
+def test_tail_file_reads_appended_lines(tmp_path):
+    path = tmp_path / 'feed.txt'
+    path.write_bytes(b'home\n')  # Já estava no arquivo: não entra
+    ingestor = Ingestor().start([f'file:{path}'])
+    time.sleep(0.3)
+    with open(path, 'ab') as f:
+        f.write(b'away\ndraw\nho')
+        f.flush()
+        _wait_for(lambda: ingestor.metrics.applied == 2)
+        f.write(b'me\n')  # O resto da linha incompleta
+    _wait_for(lambda: ingestor.metrics.applied == 3)
+    assert ingestor.state.codes == bytes((0, 2, 1))
+
+    path.write_bytes(b'draw\n')  # Truncado: recomeça do início
+    _wait_for(lambda: ingestor.metrics.applied == 4)
+    assert ingestor.state.codes[0] == 2
+
+def test_call_raises_in_caller():
+    ingestor = Ingestor(['home', 'away']).start()
+    with pytest.raises(IndexError):
+        ingestor._call(lambda: [][0])
+    assert ingestor._call(lambda: 42) == 42
+    assert ingestor.undo(5) == 2
+    assert ingestor.state.codes == b''
+
+def test_corrections_check_the_state_and_the_log(tmp_path):
+    log = ResultLog(tmp_path)
+    try:
+        ingestor = Ingestor(log.restore(), result_log=log).start()
+        ingestor.submit_codes(bytes((0, 1, 2, 0)))
+        seen = ingestor.state
+        ingestor.submit('away')
+        with pytest.raises(StaleLogError):
+            ingestor.undo(expected=seen)
+        with pytest.raises(StaleLogError):
+            ingestor.replace(0, 'draw', expected=seen)
+        assert ingestor.state.codes == bytes((1, 0, 2, 1, 0))
+
+        log.append('draw')  # Escrita fora da ingestão
+        with pytest.raises(StaleLogError):
+            ingestor.undo()
+        ingestor.submit('home')  # A próxima rajada relê o final do log
+        assert ingestor.state.codes == bytes((0, 2, 1, 0, 2, 1, 0))
+        ingestor.replace(1, 'away', expected=ingestor.state)
+        assert ingestor.undo(expected=ingestor.state) == 1
+        log.flush()
+        assert read_log_codes(log.log_path) == bytes((0, 1, 2, 0, 1, 1))
+    finally:
+        log.close()
@@ -0,0 +1,144 @@
+"""
+Log de resultados: a restauração depois de reabrir o log, com o final do
+arquivo cortado no meio de uma gravação, sem o checkpoint ou com ele
+corrompido, e `clear` arquivando o log antigo; as escritas com `expected`
+(acrescentar, desfazer, `replace_tail`) contra um histórico de referência,
+rejeição de quem escreve com uma versão antiga e a releitura depois de
+reabrir o log.
+
+Uso: python -m pytest test_result_log.py
+"""
+import glob
+import os
+import random
+
+import pytest
+
+from analysis_core import MAX_HISTORY_TO_STORE, RESULT_TYPES
+from result_log import LOG_MAGIC, RECENT_CODES, ResultLog, StaleLogError, read_log_codes
+
+ROUNDS = 1300  # Mais que o histórico armazenado e alguns checkpoints
+
+@pytest.fixture
+def log(tmp_path):
+    log = ResultLog(tmp_path)
+    yield log
+    log.close()
+
+def _fill(log, rounds=ROUNDS):
+    results = random.Random(27).choices(RESULT_TYPES, weights=(45, 45, 10), k=rounds)
+    for result in results:
+        log.append(result)
+    log.flush()
+    return results
+
+def _stored(results):
+    """O histórico que a restauração deve devolver, mais recente primeiro."""
+    return results[::-1][:MAX_HISTORY_TO_STORE]
+
+def test_restore_after_reopen(log, tmp_path):
+    results = _fill(log)
+    assert list(log.restore()) == _stored(results)
+    with open(log.log_path, 'rb') as f:
+        assert f.read() == LOG_MAGIC + bytes(RESULT_TYPES.index(result) for result in results)
+    log.close()
+    reopened = ResultLog(tmp_path)
+    try:
+        assert list(reopened.restore()) == _stored(results)
+    finally:
+        reopened.close()
+
+def test_torn_tail_is_dropped(log, tmp_path):
+    results = _fill(log)
+    size = os.path.getsize(log.log_path)
+    log.close()
+    with open(log.log_path, 'ab') as f:
+        f.write(b'\x01\x07\x02')  # Código inválido no meio: o resto é descartado
+    reopened = ResultLog(tmp_path)
+    try:
+        assert list(reopened.restore()) == _stored(results + ['away'])
+        assert os.path.getsize(reopened.log_path) == size + 1
+        reopened.append('draw')
+        assert list(reopened.restore())[:2] == ['draw', 'away']
+    finally:
+        reopened.close()
+
+@pytest.mark.parametrize('damage', ('remove', 'corrupt'))
+def test_checkpoint_loss_replays_the_log(log, tmp_path, damage):
+    results = _fill(log)
+    log.close()
+    if damage == 'remove':
+        os.remove(log.checkpoint_path)
+    else:
+        with open(log.checkpoint_path, 'r+b') as f:
+            f.seek(20)
+            byte = f.read(1)
+            f.seek(20)
+            f.write(bytes((byte[0] ^ 0xFF,)))
+    reopened = ResultLog(tmp_path)
+    try:
+        assert list(reopened.restore()) == _stored(results)
+    finally:
+        reopened.close()
+
+def test_clear_archives_the_log(log, tmp_path):
+    results = _fill(log, 50)
+    log.clear()
+    log.append('home')
+    assert list(log.restore()) == ['home']
+    (archive,) = glob.glob(str(tmp_path / 'results-*.log'))
+    with open(archive, 'rb') as f:
+        assert f.read() == LOG_MAGIC + bytes(RESULT_TYPES.index(result) for result in results)
+
+def test_versioned_writes_match_reference(log, tmp_path):
+    rnd = random.Random(27)
+    reference = bytearray()
+    version = log.version
+    for i in range(3000):
+        op = rnd.random()
+        if op < 0.6:
+            codes = bytes(rnd.choices(range(3), k=rnd.randrange(1, 50)))
+            version = log.extend(codes, expected=version)
+            reference += codes
+        elif op < 0.8:
+            count = rnd.randrange(1, 30)
+            version = log.undo(count, expected=version)
+            del reference[max(0, len(reference) - count):]
+        else:
+            count = rnd.randrange(1, 30)
+            codes = bytes(rnd.choices(range(3), k=count))
+            version = log.replace_tail(count, codes, expected=version)
+            del reference[max(0, len(reference) - count):]
+            reference += codes
+        if i % 97 == 0:
+            assert log.snapshot(500)[1] == bytes(reference[-500:])
+            assert log.snapshot(5000)[1] == bytes(reference[-5000:])
+    assert version == log.version and version.length == len(reference)
+    log.flush()
+    assert read_log_codes(log.log_path) == bytes(reference)
+
+    log.close()
+    reopened = ResultLog(tmp_path)
+    try:
+        assert reopened.version.length == len(reference)
+        assert reopened.recent_codes(RECENT_CODES) == bytes(reference[-RECENT_CODES:])
+    finally:
+        reopened.close()
+
+def test_stale_writes_are_rejected(log):
+    log.extend(bytes((0, 1, 2, 0)))
+    seen = log.version
+    current = log.append('away')
+    for write in (lambda: log.append('draw', expected=seen),
+                  lambda: log.undo(1, expected=seen),
+                  lambda: log.replace_tail(2, b'\x02\x02', expected=seen)):
+        with pytest.raises(StaleLogError):
+            write()
+    assert log.version == current
+    assert log.recent_codes(10) == bytes((0, 1, 2, 0, 1))
+
+    codes, version = log.changes_since(seen)
+    assert codes == b'\x01' and version == current
+    log.replace_tail(2, b'\x02\x02', expected=current)
+    assert log.changes_since(current)[0] is None  # Reescrito: quem leu antes relê o final
+    assert log.recent_codes(10) == bytes((0, 1, 2, 2, 2))
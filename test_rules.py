@@ -0,0 +1,53 @@
+"""
+Motor de regras: a conferência de rules_check.py (DEFAULT_RULES contra a
+cadeia de if/elif original, rodada a rodada, com e sem os sinais opcionais)
+e os textos das regras, montados só para a aposta escolhida.
+
+Uso: python -m pytest test_rules.py
+"""
+import pytest
+
+import analysis_core as core
+import rules_check
+
+ROUNDS = 1500
+
+@pytest.mark.parametrize('long_window, markov', ((None, False), (500, False), (None, True), (100, True)))
+def test_default_rules_match_reference(long_window, markov):
+    compared, mismatches = rules_check.check(ROUNDS, 27, long_window, markov)
+    assert compared == ROUNDS * len(rules_check._GENERATORS)
+    assert mismatches == []
+
+def _suggestion(engine, results):
+    analysis = core.update_analysis(results)
+    return core.generate_advanced_suggestion(
+        results, analysis['surf_analysis'], analysis['color_analysis'], analysis['break_patterns'],
+        analysis['break_probability'], analysis['draw_specifics'], engine=engine)
+
+def test_rule_texts_with_formats_and_missing_metrics():
+    results = ['home'] * 3 + ['away'] * 10
+    engine = core.RuleEngine([
+        {'name': 'unknown', 'conditions': [['streak', '>=', 1], ['unknown', '>', 0]], 'bets': ['home'], 'score': 95},
+        {'name': 'streak', 'conditions': [['streak', '>=', 3]], 'bets': ['draw'], 'score': 90,
+         'reason': "Sequência {streak} / quebra {break_chance:.1f}%", 'guarantee': "Sequência {streak}"},
+        {'name': 'draws', 'bets': ['draw'], 'score': 10, 'reason': "Empates {draw_frequency}%",
+         'guarantee': "Empates"},
+        {'name': 'losing', 'bets': ['away'], 'score': 10, 'reason': "{missing_metric}"},
+    ])
+    suggestion = _suggestion(engine, results)
+    assert suggestion['bet_type'] == 'draw' and suggestion['confidence'] == 100
+    assert suggestion['reason'] == "Empates 0.0%. Sequência 3 / quebra 8.3%"
+    assert suggestion['guarantee_pattern'] == "Empates | Sequência 3"
+
+    # Os textos só são montados para a aposta escolhida: o de 'losing' acima não
+    # foi formatado, e sozinho ele vence e falha com a métrica desconhecida
+    engine = core.RuleEngine([{'name': 'losing', 'bets': ['away'], 'score': 10, 'reason': "{missing_metric}"}])
+    with pytest.raises(KeyError):
+        _suggestion(engine, results)
+
+def test_rule_texts_cache_keeps_value_types():
+    # 0 e 0.0 têm o mesmo hash: o tipo entra na chave dos textos já montados
+    rule = core.RuleEngine([{'name': 'draws', 'bets': ['draw'], 'score': 10, 'reason': "{draw_frequency}"}]).rules[0]
+    for frequency, text in ((0, "0"), (0.0, "0.0"), (False, "False"), (0, "0")):
+        inputs = core._RuleInputs(['home'] * 9, 0, 9, {}, {}, {}, {'draw_frequency_27': frequency}, None, None, {})
+        assert core._rule_texts(rule, inputs, None)[0] == text
@@ -0,0 +1,175 @@
+"""
+Paridade de scan_window (e das análises que ela alimenta) com as funções
+anteriores à passada única, que percorriam a janela cada uma por conta própria.
+
+As referências abaixo são as versões antigas de analyze_colors,
+find_complex_patterns, analyze_break_probability e analyze_draw_specifics,
+comparadas em históricos aleatórios com semente fixa: de 0 a 40 resultados
+(janelas menores que NUM_RECENT_RESULTS_FOR_ANALYSIS, em que só as tabelas
+curtas das últimas posições entram) e cada rodada de históricos longos.
+
+Uso: python -m pytest test_scan_window.py
+"""
+import random
+
+import pytest
+
+import analysis_core as core
+from analysis_core import (
+    BLUE,
+    NUM_RECENT_RESULTS_FOR_ANALYSIS,
+    RED,
+    YELLOW,
+    PatternCounts,
+    PatternKind,
+    get_color,
+    get_color_emoji,
+    pattern_id,
+)
+
+SEED = 27
+WEIGHTS = (45, 45, 10)
+
+# --- Referências (implementação anterior) ---
+
+def _reference_colors(results):
+    relevant_results = results[:NUM_RECENT_RESULTS_FOR_ANALYSIS]
+    if not relevant_results:
+        return {'red': 0, 'blue': 0, 'yellow': 0, 'current_color': '', 'streak': 0, 'color_pattern_27': ''}
+    color_counts = {'red': 0, 'blue': 0, 'yellow': 0}
+    for result in relevant_results:
+        color_counts[get_color(result)] += 1
+    current_color = get_color(results[0])
+    streak = 0
+    for result in results:
+        if get_color(result) != current_color:
+            break
+        streak += 1
+    return dict(color_counts, current_color=current_color, streak=streak,
+                color_pattern_27=''.join(get_color(r)[0].upper() for r in relevant_results))
+
+def _reference_complex_patterns(results):
+    patterns = PatternCounts()
+    colors = [core.RESULT_CODES[r] for r in results[:NUM_RECENT_RESULTS_FOR_ANALYSIS]]
+    for i in range(len(colors) - 1):
+        color1, color2 = colors[i], colors[i + 1]
+        if color1 != color2:
+            patterns.add(pattern_id(PatternKind.SIMPLE_BREAK, color1, color2))
+        if i < len(colors) - 2:
+            color3 = colors[i + 2]
+            if color1 == color2 and color1 != color3:
+                patterns.add(pattern_id(PatternKind.TWO_ONE, color1, color3))
+            if color1 != color2 and color2 != color3 and color1 == color3:
+                patterns.add(pattern_id(PatternKind.ZIG_ZAG, color1, color2, color3))
+            if color2 == YELLOW and color1 != YELLOW and color3 != YELLOW and color1 != color3:
+                patterns.add(pattern_id(PatternKind.DRAW_IN_MIDDLE, color1, color3))
+            if i < len(colors) - 3:
+                color4 = colors[i + 3]
+                if color1 != color2 and color2 == color3 and color3 != color4 and color1 == color4:
+                    patterns.add(pattern_id(PatternKind.WAVE_121, color1, color2, color3, color4))
+        if i < len(colors) - 3:
+            color3, color4 = colors[i + 2], colors[i + 3]
+            if color1 == color2 and color2 == color3 and color1 != color4:
+                patterns.add(pattern_id(PatternKind.THREE_ONE, color1, color4))
+            if color1 == color2 and color3 == color4 and color1 != color3:
+                patterns.add(pattern_id(PatternKind.TWO_TWO, color1, color3))
+            if color1 != color2 and color2 == color3 and color1 == color4:
+                patterns.add(pattern_id(PatternKind.MIRROR, color1, color2, color3, color4))
+        if i < len(colors) - 5:
+            color3, color4, color5, color6 = colors[i + 2:i + 6]
+            if color1 == color2 == color3 and color4 == color5 == color6 and color1 != color4:
+                patterns.add(pattern_id(PatternKind.THREE_THREE, color1, color4))
+    for i in range(len(colors) - 1):
+        if colors[i] == colors[i + 1]:
+            patterns.add(pattern_id(PatternKind.REPEATED_PAIR, colors[i]))
+    for pid in core._block_pattern_ids(colors):
+        patterns.add(pid)
+    return patterns
+
+def _reference_break_probability(results):
+    relevant_results = results[:NUM_RECENT_RESULTS_FOR_ANALYSIS]
+    if len(relevant_results) < 2:
+        return {'break_chance': 0, 'last_break_type': ''}
+    breaks = sum(get_color(a) != get_color(b) for a, b in zip(relevant_results, relevant_results[1:]))
+    last_break_type = ""
+    if get_color(results[0]) != get_color(results[1]):
+        last_break_type = (f"Quebrou de {get_color(results[1]).capitalize()} {get_color_emoji(get_color(results[1]))} "
+                           f"para {get_color(results[0]).capitalize()} {get_color_emoji(get_color(results[0]))}")
+    return {'break_chance': round(breaks / (len(relevant_results) - 1) * 100, 2), 'last_break_type': last_break_type}
+
+def _reference_draw_specifics(results):
+    relevant_results = results[:NUM_RECENT_RESULTS_FOR_ANALYSIS]
+    if not relevant_results:
+        return {'draw_frequency_27': 0, 'time_since_last_draw': -1, 'draw_patterns': PatternCounts(),
+                'recurrent_draw': False}
+    time_since_last_draw = next((i for i, result in enumerate(results) if result == 'draw'), -1)
+    draw_patterns = PatternCounts()
+    colors = [core.RESULT_CODES[r] for r in relevant_results]
+    for i in range(len(colors) - 1):
+        color1, color2 = colors[i], colors[i + 1]
+        if color2 == YELLOW and color1 != YELLOW:
+            draw_patterns.add(pattern_id(PatternKind.BREAK_TO_DRAW, color1))
+        if i < len(colors) - 2 and colors[i + 2] == YELLOW:
+            if color1 == RED and color2 == BLUE:
+                draw_patterns.add(pattern_id(PatternKind.RED_BLUE_DRAW))
+            elif color1 == BLUE and color2 == RED:
+                draw_patterns.add(pattern_id(PatternKind.BLUE_RED_DRAW))
+    draw_indices = [i for i, r in enumerate(relevant_results) if r == 'draw']
+    recurrent_draw = any(0 <= a - b - 1 <= 3 for a, b in zip(draw_indices, draw_indices[1:]))
+    return {'draw_frequency_27': round(len(draw_indices) / len(relevant_results) * 100, 2),
+            'time_since_last_draw': time_since_last_draw, 'draw_patterns': draw_patterns,
+            'recurrent_draw': recurrent_draw}
+
+# --- Testes ---
+
+def _random_history(rnd, size, weights=WEIGHTS):
+    return rnd.choices(core.RESULT_TYPES, weights=weights, k=size)
+
+def _histories():
+    """Históricos curtos (todas as larguras de janela) e com muitos empates, mais recente primeiro."""
+    rnd = random.Random(SEED)
+    for size in range(41):
+        for weights in (WEIGHTS, (1, 1, 1), (10, 10, 80)):
+            for _ in range(25):
+                yield _random_history(rnd, size, weights)
+
+def _assert_parity(results):
+    scan = core.scan_window(results)
+    codes = bytes(core.RESULT_CODES[r] for r in results[:NUM_RECENT_RESULTS_FOR_ANALYSIS])
+    assert scan.codes == codes
+    assert scan.color_counts == (codes.count(RED), codes.count(BLUE), codes.count(YELLOW))
+    assert core.analyze_colors(results, scan) == _reference_colors(results)
+    assert core.find_complex_patterns(results, scan) == _reference_complex_patterns(results)
+    assert core.analyze_break_probability(results, scan) == _reference_break_probability(results)
+    assert core.analyze_draw_specifics(results, scan) == _reference_draw_specifics(results)
+    # Chamadas isoladas montam a própria passada
+    assert core.find_complex_patterns(results) == _reference_complex_patterns(results)
+
+def test_short_histories_match_reference():
+    for results in _histories():
+        _assert_parity(results)
+
+def test_history_buffer_matches_list():
+    rnd = random.Random(SEED)
+    for size in (0, 1, 5, 26, 27, 28, 200):
+        results = _random_history(rnd, size)
+        buffer = core.HistoryBuffer(results=results)
+        assert core.scan_window(buffer) == core.scan_window(results)
+        _assert_parity(list(buffer))
+
+@pytest.mark.parametrize('weights', (WEIGHTS, (10, 10, 80)))
+def test_every_round_of_long_history(weights):
+    rnd = random.Random(SEED)
+    results = []
+    analyzer = core.IncrementalAnalyzer()
+    for result in _random_history(rnd, 1500, weights):
+        results.insert(0, result)
+        analyzer.push(result)
+        _assert_parity(results)
+        # As fatias que entram e saem da janela usam as mesmas tabelas
+        analysis = analyzer.analysis(cache=None)
+        window = results[:core.MAX_HISTORY_TO_STORE]
+        assert analysis['color_analysis'] == _reference_colors(window)
+        assert analysis['break_patterns'] == _reference_complex_patterns(window)
+        assert analysis['break_probability'] == _reference_break_probability(window)
+        assert analysis['draw_specifics'] == _reference_draw_specifics(window)
@@ -0,0 +1,37 @@
+"""
+Simulação de Monte Carlo: as sugestões vetorizadas conferem com o
+IncrementalAnalyzer nas sequências sintéticas (independentes e com Markov),
+e a simulação recusa regras ativas diferentes de DEFAULT_RULES.
+
+Uso: python -m pytest test_simulator.py
+"""
+import copy
+
+import numpy as np
+import pytest
+
+import analysis_core as core
+import simulator
+
+@pytest.mark.parametrize('transition', (None, [[0.2, 0.7, 0.1], [0.7, 0.2, 0.1], [0.3, 0.3, 0.4]]))
+def test_parity_with_analyzer(transition):
+    transition = None if transition is None else np.array(transition)
+    report = simulator.simulate(6000, 1500, transition=transition, analyzer_sequences=2)
+    assert report['analyzer']['rounds'] == 3000 and report['analyzer']['mismatches'] == 0
+    assert report['suggestions']['bets'] > 0
+
+def test_main_checks_the_analyzer_by_default(capsys):
+    assert simulator.main(['--rounds', '2000', '--length', '1000']) == 0
+    assert '0 divergências' in capsys.readouterr().out
+
+def test_rejects_other_rule_sets():
+    rules = copy.deepcopy(core.DEFAULT_RULES)
+    rules[0]['score'] += 1
+    core.set_rule_set(rules)
+    try:
+        with pytest.raises(ValueError, match='DEFAULT_RULES'):
+            simulator.simulate(2000, 1000)
+        with pytest.raises(SystemExit):
+            simulator.main(['--rounds', '2000', '--length', '1000'])
+    finally:
+        core.set_rule_set(core.DEFAULT_RULES)
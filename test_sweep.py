@@ -0,0 +1,124 @@
+"""
+Busca de parâmetros: `build_rules` aplicando cada parâmetro sem mudar
+DEFAULT_RULES, a grade e o sorteio de configurações, a avaliação em lote
+igual à reprodução rodada a rodada com as mesmas regras ativas, e a retomada
+com o mesmo --out sem avaliar de novo o que já está no arquivo, inclusive
+depois de uma linha cortada.
+
+Uso: python -m pytest test_sweep.py
+"""
+import copy
+import json
+import random
+
+import pytest
+
+import analysis_core as core
+import sweep
+
+ROUNDS = 600
+
+@pytest.fixture(scope='module')
+def codes():
+    return bytes(random.Random(27).choices(range(3), weights=(45, 45, 10), k=ROUNDS))
+
+def _rule(rules, name):
+    return next(rule for rule in rules if rule['name'] == name)
+
+def test_build_rules():
+    default = copy.deepcopy(core.DEFAULT_RULES)
+    rules = sweep.build_rules({'zig_zag_min_count': 2, 'break_chance_min': 45, 'draw_delay_min': 9,
+                               'draw_frequency_max': 15, 'score.surf_max_red': 99, 'confidence_min': 80})
+    assert core.DEFAULT_RULES == default
+    assert _rule(rules, 'zig_zag_home')['min_count'] == _rule(rules, 'zig_zag_away')['min_count'] == 2
+    assert _rule(rules, 'high_break_red')['conditions'] == _rule(rules, 'high_break_blue')['conditions'] == \
+        [['break_chance', '>', 45]]
+    assert _rule(rules, 'draw_delayed')['conditions'] == [['time_since_last_draw', '>=', 9], ['draw_frequency', '<', 15]]
+    assert _rule(rules, 'surf_max_red')['score'] == 99
+    changed = {'zig_zag_home', 'zig_zag_away', 'high_break_red', 'high_break_blue', 'draw_delayed', 'surf_max_red'}
+    assert [rule for rule in rules if rule['name'] not in changed] == \
+        [rule for rule in default if rule['name'] not in changed]
+    with pytest.raises(ValueError, match='desconhecido'):
+        sweep.build_rules({'score.inexistente': 1})
+
+def test_grid_and_random_search():
+    space = {'zig_zag_min_count': [2, 3], 'score.draw_delayed': [60, 70, 80], 'confidence_min': [70]}
+    configs = sweep.grid(space)
+    assert len(configs) == 6 and len({sweep.config_key(config) for config in configs}) == 6
+    assert configs[0] == {'confidence_min': 70, 'score.draw_delayed': 60, 'zig_zag_min_count': 2}
+
+    sampled = sweep.random_search(space, 4, seed=1)
+    assert len(sampled) == 4 and all(config in configs for config in sampled)
+    assert len({sweep.config_key(config) for config in sampled}) == 4
+    assert sampled == sweep.random_search(space, 4, seed=1)
+    assert sorted(map(sweep.config_key, sweep.random_search(space, 50, seed=1))) == \
+        sorted(map(sweep.config_key, configs))  # Limitado ao tamanho da grade
+
+def _replay(codes, config):
+    """(apostas, acertos) reproduzindo `codes` com as regras de `config` ativas."""
+    core.set_rule_set(sweep.build_rules(config))
+    try:
+        analyzer = core.IncrementalAnalyzer()
+        bets = hits = 0
+        pending = None
+        for code in codes:
+            result = core.RESULT_TYPES[code]
+            if pending is not None:
+                bets += 1
+                hits += core.check_guarantee_status(pending, result, None)
+            analyzer.push(result)
+            if analyzer.size < core.MIN_RESULTS_FOR_SUGGESTION:
+                continue
+            suggestion = analyzer.analysis(cache=None)['suggestion']
+            tracked = suggestion['bet_type'] != 'none' and \
+                suggestion['confidence'] >= config.get('confidence_min', sweep.DEFAULT_CONFIDENCE_MIN)
+            pending = suggestion['bet_type'] if tracked else None
+        return bets, hits
+    finally:
+        core.set_rule_set(core.DEFAULT_RULES)
+
+def test_batch_matches_replay_with_active_rules(codes):
+    configs = [{}, {'zig_zag_min_count': 2, 'score.draw_delayed': 95, 'confidence_min': 60}]
+    results = sweep.sweep(codes, configs, workers=1, batch_size=2)
+    assert [(row['bets'], row['hits']) for row in results] == [_replay(codes, config) for config in configs]
+    assert results[0]['bets'] != results[1]['bets']
+
+def _checkpoint_rows(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def _first_run(codes, tmp_path):
+    """Argumentos da linha de comando e as linhas gravadas por uma primeira busca."""
+    history = tmp_path / 'resultados.txt'
+    history.write_text('\n'.join(core.RESULT_TYPES[code] for code in codes) + '\n', encoding='utf-8')
+    out = tmp_path / 'sweep.jsonl'
+    args = [str(history), '--workers', '1', '--out', str(out)]
+    assert sweep.main(args + ['--param', 'zig_zag_min_count=2,3']) == 0
+    first = _checkpoint_rows(out)
+    assert sorted(row['config']['zig_zag_min_count'] for row in first) == [2, 3]
+    return args, out, first
+
+def test_resume_does_not_evaluate_twice(codes, tmp_path, capsys):
+    args, out, first = _first_run(codes, tmp_path)
+    with open(out, 'w', encoding='utf-8') as f:  # Marca as já avaliadas
+        for row in first:
+            f.write(json.dumps(dict(row, hits=-1)) + '\n')
+    assert sweep.main(args + ['--param', 'zig_zag_min_count=2,3,4']) == 0
+    rows = _checkpoint_rows(out)
+    keys = [sweep.config_key(row['config']) for row in rows]
+    assert len(keys) == len(set(keys)) == 3
+    assert [row['hits'] for row in rows[:2]] == [-1, -1]  # Vieram do arquivo, não foram avaliadas de novo
+    assert rows[2]['config']['zig_zag_min_count'] == 4 and rows[2]['hits'] >= 0
+
+    assert sweep.sweep(codes, [row['config'] for row in rows], out=str(out)) == rows  # Nada a avaliar
+    assert '3 configurações' in capsys.readouterr().out
+
+def test_resume_after_a_cut_line(codes, tmp_path):
+    args, out, first = _first_run(codes, tmp_path)
+    with open(out, 'a', encoding='utf-8') as f:
+        f.write('{"config": {"zig_')  # Linha cortada, como numa interrupção
+    assert sweep.main(args + ['--param', 'zig_zag_min_count=2,3,4']) == 0
+    lines = out.read_text(encoding='utf-8').splitlines()
+    assert lines[2] == '{"config": {"zig_'  # Ficou sozinha, sem juntar com a seguinte
+    rows = [json.loads(line) for n, line in enumerate(lines) if n != 2]
+    assert rows[:2] == first and rows[2]['config']['zig_zag_min_count'] == 4
@@ -0,0 +1,124 @@
+"""
+TableRegistry: com resultados enviados de várias threads ao mesmo tempo,
+cada mesa os aplica na ordem em que chegaram; o Future de `submit` só
+termina depois dos anteriores da mesma mesa, e `join` espera todas as mesas.
+
+Uso: python -m pytest test_tables.py
+"""
+import random
+import threading
+
+import pytest
+
+import tables
+from analysis_core import RESULT_TYPES
+from tables import TableRegistry
+
+@pytest.fixture
+def registry():
+    registry = TableRegistry(workers=4)
+    yield registry
+    registry.close()
+
+def _history(table):
+    """Resultados da mesa, mais antigo primeiro."""
+    return list(table.results)[::-1]
+
+def test_each_table_keeps_its_order_across_threads(registry):
+    threads, tables_per_thread, rounds = 6, 3, 150
+    sequences = {}
+    for t in range(threads):
+        for k in range(tables_per_thread):
+            name = f'mesa-{t}-{k}'
+            registry.add_table(name)
+            sequences[name] = random.Random(name).choices(RESULT_TYPES, weights=(45, 45, 10), k=rounds)
+    start = threading.Barrier(threads)
+
+    def send(t):
+        names = [f'mesa-{t}-{k}' for k in range(tables_per_thread)]
+        start.wait()
+        for n in range(rounds):
+            for name in names:  # Intercala as mesas da thread
+                registry.submit(name, sequences[name][n])
+
+    workers = [threading.Thread(target=send, args=(t,)) for t in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert registry.join(timeout=30)
+    for name, sequence in sequences.items():
+        assert _history(registry.get(name)) == sequence
+    assert registry.latency_stats()['rounds'] == threads * tables_per_thread * rounds
+
+def test_shared_table_applies_every_result_once(registry):
+    registry.add_table('mesa')
+    threads, rounds = 3, 200
+
+    def send(result):
+        for _ in range(rounds):
+            registry.submit('mesa', result)
+
+    workers = [threading.Thread(target=send, args=(result,)) for result in RESULT_TYPES[:threads]]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert registry.join(timeout=30)
+    history = _history(registry.get('mesa'))
+    assert len(history) == threads * rounds
+    assert all(history.count(result) == rounds for result in RESULT_TYPES[:threads])
+
+def test_futures_follow_the_table_order(registry):
+    registry.add_table('mesa')
+    results = random.Random(1).choices(RESULT_TYPES, k=60)
+    futures = [registry.submit('mesa', result) for result in results]
+    assert [future.result(timeout=10)['stats']['total'] for future in futures] == [min(n, 27) for n in range(1, 61)]
+    assert [future.result()['color_analysis']['color_pattern_27'][0] for future in futures] == \
+        [{'home': 'R', 'away': 'B', 'draw': 'Y'}[result] for result in results]
+
+def test_future_waits_only_for_its_table(registry, monkeypatch):
+    registry.add_table('lenta')
+    registry.add_table('rápida')
+    release = threading.Event()
+    apply = tables.TableState.apply
+
+    def slow_apply(table, result):
+        if table.name == 'lenta':
+            release.wait(10)
+        apply(table, result)
+
+    monkeypatch.setattr(tables.TableState, 'apply', slow_apply)
+    slow = registry.submit('lenta', 'home')
+    fast = registry.submit('rápida', 'draw')
+    assert fast.result(timeout=5)['stats']['draw'] == 1
+    assert not slow.done()
+    assert registry.join(timeout=0.05) is False  # A mesa lenta ainda não terminou
+    release.set()
+    assert registry.join(timeout=5)
+    assert slow.result()['stats']['home'] == 1
+
+def test_apply_error_goes_to_the_future(registry, monkeypatch):
+    registry.add_table('mesa')
+    apply = tables.TableState.apply
+    calls = []
+
+    def failing_apply(table, result):
+        calls.append(result)
+        if len(calls) == 2:
+            raise RuntimeError("falhou")
+        apply(table, result)
+
+    monkeypatch.setattr(tables.TableState, 'apply', failing_apply)
+    futures = [registry.submit('mesa', result) for result in ('home', 'away', 'draw')]
+    assert registry.join(timeout=5)
+    with pytest.raises(RuntimeError, match='falhou'):
+        futures[1].result()
+    assert futures[2].result()['stats']['total'] == 2
+    assert _history(registry.get('mesa')) == ['home', 'draw']
+
+def test_submit_rejects_invalid_results(registry):
+    registry.add_table('mesa')
+    with pytest.raises(ValueError):
+        registry.submit('mesa', 'empate')
+    assert registry.join(timeout=1)
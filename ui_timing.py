@@ -0,0 +1,137 @@
+"""
+Tempo até a página (adm.py) voltar a responder a cada clique, medido com o
+AppTest do Streamlit, sem navegador.
+
+Grava `--history` resultados num log temporário, abre a página e mede cada
+execução disparada por uma ação: os botões de resultado (em sequência),
+desfazer e os widgets que só mudam um painel (janela do acompanhamento e
+quantidade exibida no histórico). Mostra p50/p99 por ação e quantos blocos
+de texto a página enviou, que é o que o navegador tem de redesenhar.
+
+O AppTest executa o script inteiro mesmo quando o widget está num fragmento,
+então a coluna "painel" traz o p50 da seção `ui.<painel>` do diagnostics:
+é o que o navegador espera quando só aquele fragmento roda. Os cronômetros
+do diagnostics ficam ligados durante a medição, nas duas versões da página.
+
+Para comparar com a página de antes dos painéis em fragmentos:
+    git show <commit>:adm.py > adm_antes.py
+    python ui_timing.py adm_antes.py
+    python ui_timing.py adm.py
+
+Uso: python ui_timing.py [adm.py] [--history 1000] [--clicks 30]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import diagnostics
+from analysis_core import MAX_HISTORY_TO_STORE
+from audit import AUDIT_WINDOWS
+from result_log import ResultLog
+
+WEIGHTS = (45, 45, 10)
+RESULT_BUTTONS = ("CASA", "VISITANTE", "EMPATE")
+
+def _find(widgets, label):
+    """Primeiro widget cujo rótulo começa com `label` (os botões terminam com emojis)."""
+    for widget in widgets:
+        if widget.label.startswith(label):
+            return widget
+    return None
+
+def _click_result(rnd):
+    def act(at, i):
+        button = _find(at.button, rnd.choices(RESULT_BUTTONS, weights=WEIGHTS)[0])
+        return button.click() if button else None
+    return act
+
+def _click_undo(at, i):
+    button = _find(at.button, "Desfazer")
+    return button.click() if button else None
+
+def _audit_window(at, i):
+    radio = _find(at.radio, "Janela")
+    options = AUDIT_WINDOWS + (None,)
+    return radio.set_value(options[i % len(options)]) if radio else None
+
+def _history_size(at, i):
+    slider = _find(at.slider, "Resultados exibidos")
+    return slider.set_value(100 + 100 * (i % 2)) if slider else None
+
+def _panel_p50(panel):
+    """p50 (ms) da seção `ui.<panel>` desde o último `diagnostics.reset()`, ou None."""
+    for stage in diagnostics.snapshot():
+        if stage['stage'] == f'ui.{panel}':
+            return stage['p50_ms']
+    return None
+
+def measure(at, act, clicks):
+    """(p50 ms, p99 ms, blocos de texto) de `clicks` ações; None se a página não tem o widget."""
+    timings = []
+    diagnostics.reset()
+    for i in range(clicks):
+        widget = act(at, i)
+        if widget is None:
+            return None
+        start = time.perf_counter()
+        widget.run()
+        timings.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    timings.sort()
+    return (timings[len(timings) // 2] * 1000, timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000,
+            len(at.markdown))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tempo por clique na página, sem navegador (AppTest).")
+    parser.add_argument('script', nargs='?', default='adm.py')
+    parser.add_argument('--history', type=int, default=MAX_HISTORY_TO_STORE, help="Resultados já registrados")
+    parser.add_argument('--clicks', type=int, default=30, help="Execuções medidas por ação")
+    parser.add_argument('--seed', type=int, default=27)
+    args = parser.parse_args(argv)
+
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError as e:
+        raise ImportError("A medição requer o pacote 'streamlit' (com streamlit.testing).") from e
+
+    rnd = random.Random(args.seed)
+    data_dir = tempfile.mkdtemp(prefix='ui-timing-')
+    log = ResultLog(data_dir)
+    log.extend(bytes(rnd.choices(range(3), weights=WEIGHTS, k=args.history)))
+    log.close()
+    os.environ['FOOTBALL_STUDIO_DATA_DIR'] = data_dir
+    os.environ.pop('FOOTBALL_STUDIO_FEEDS', None)
+    diagnostics.enable()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+
+    at = AppTest.from_file(os.path.abspath(args.script), default_timeout=60)
+    start = time.perf_counter()
+    at.run()
+    print(f"{args.script}: {args.history} resultados, {args.clicks} execuções por ação "
+          f"(abertura {(time.perf_counter() - start) * 1000:.1f} ms)")
+    # Ação, função e o painel (fragmento) que ela executa sozinho no navegador
+    actions = (
+        ("resultado", _click_result(rnd), None),
+        ("desfazer", _click_undo, None),
+        ("janela do acompanhamento", _audit_window, 'audit'),
+        ("resultados exibidos", _history_size, 'history'),
+    )
+    with open(args.script, encoding='utf-8') as f:
+        fragments = 'fragment' in f.read()  # A página antiga executa tudo a cada clique
+    for name, act, panel in actions:
+        report = measure(at, act, args.clicks)
+        if report is None:
+            print(f"  {name:26} (não existe nesta versão da página)")
+            continue
+        p50, p99, blocks = report
+        panel_p50 = _panel_p50(panel) if panel and fragments else None
+        panel_text = f"  painel {panel_p50:6.1f} ms" if panel_p50 is not None else ""
+        print(f"  {name:26} p50 {p50:8.1f} ms  p99 {p99:8.1f} ms  blocos de texto {blocks}{panel_text}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())